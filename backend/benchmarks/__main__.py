@@ -0,0 +1,91 @@
+"""
+Benchmark suite of the Naive Bayes pipeline.
+
+Run from the backend directory:
+    python -m benchmarks run --rows 200000 --output results.json
+    python -m benchmarks run --compare baseline.json
+    python -m benchmarks compare baseline.json results.json
+    python -m benchmarks generate --rows 1000000 --output dataset.csv
+"""
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.suite import DEFAULT_PARAMS, run_suite, compare_results
+from benchmarks.synthetic_data import write_dataset
+import argparse
+import json
+
+
+def add_dataset_arguments(parser):
+    for name in ("rows", "features", "cardinality", "classes", "seed"):
+        parser.add_argument(f"--{name}", type=int, default=DEFAULT_PARAMS[name])
+
+
+def print_comparison(comparison):
+    """
+    Prints a comparison table and returns the number of regressions.
+    """
+    for entry in comparison:
+        flag = "REGRESSION" if entry["regression"] else ""
+        change = (f"{entry['change']:+.2f} pts" if "accuracy" in entry["metric"]
+                  else f"{entry['change'] * 100:+.1f}%")
+        print(f"{entry['metric']:<40} {entry['baseline']:>16.6g} {entry['current']:>16.6g} {change:>10} {flag}")
+    regressions = sum(entry["regression"] for entry in comparison)
+    print(f"{regressions} regression(s)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Naive Bayes benchmark suite.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Run the benchmark and write the results as JSON.")
+    add_dataset_arguments(run)
+    run.add_argument("--streaming", action="store_true", help="Train in streaming mode.")
+    for name in ("chunk_size", "workers", "repeat", "single_predictions", "batch_size", "high_cardinality_features",
+                 "high_cardinality", "hash_threshold"):
+        run.add_argument(f"--{name.replace('_', '-')}", dest=name, type=int, default=DEFAULT_PARAMS[name])
+    run.add_argument("--output", help="File to write the results to (default: stdout).")
+    run.add_argument("--compare", metavar="BASELINE", help="Compare the results against a saved baseline.")
+    run.add_argument("--threshold", type=float, default=0.10, help="Allowed relative slowdown (default 0.10).")
+
+    compare = commands.add_parser("compare", help="Compare two saved results.")
+    compare.add_argument("baseline")
+    compare.add_argument("current")
+    compare.add_argument("--threshold", type=float, default=0.10, help="Allowed relative slowdown (default 0.10).")
+
+    generate = commands.add_parser("generate", help="Write the synthetic dataset as CSV.")
+    add_dataset_arguments(generate)
+    generate.add_argument("--output", required=True)
+
+    args = parser.parse_args()
+    if args.command == "generate":
+        write_dataset(args.output, args.rows, args.features, args.cardinality, args.classes, args.seed)
+        return 0
+
+    if args.command == "compare":
+        with open(args.baseline) as handle:
+            baseline = json.load(handle)
+        with open(args.current) as handle:
+            current = json.load(handle)
+        return 1 if print_comparison(compare_results(baseline, current, args.threshold)) else 0
+
+    params = {name: getattr(args, name) for name in DEFAULT_PARAMS}
+    results = run_suite(params)
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as handle:
+            handle.write(output + "\n")
+    else:
+        print(output)
+    if args.compare:
+        with open(args.compare) as handle:
+            baseline = json.load(handle)
+        return 1 if print_comparison(compare_results(baseline, results, args.threshold)) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
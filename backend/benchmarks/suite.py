@@ -0,0 +1,283 @@
+from benchmarks.synthetic_data import write_dataset
+from naive_bayes_logic.management import new_model_data, run_training, install_trained_model, predict_workflow, \
+    predict_batch_workflow, get_memory_usage, save_trained_model
+from naive_bayes_logic.prediction_cache import PredictionCache
+from naive_bayes_logic.tools import Tools
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+
+# Default size of the benchmark dataset and of the prediction runs
+DEFAULT_PARAMS = {
+    "rows": 200_000,
+    "features": 20,
+    "cardinality": 10,
+    "classes": 3,
+    "seed": 0,
+    "streaming": False,
+    "chunk_size": 100_000,
+    "workers": 1,
+    "repeat": 3,
+    "single_predictions": 2_000,
+    "batch_size": 10_000,
+    # Exact vs hashed comparison, on the same dataset plus ID-like columns; 0 columns skips it
+    "high_cardinality_features": 2,
+    "high_cardinality": 100_000,
+    "hash_threshold": 10_000
+}
+
+# Cold starts measured: the inference-only server, the full API, and the full API once it has also
+# loaded the model counts (as it does for an append, and as every worker did at startup before)
+STARTUP_SCENARIOS = {
+    "inference_main": ("inference_main", "inference_main.sync_model()"),
+    "main": ("main", "main.sync_model()"),
+    "main_with_counts": ("main", "main.sync_model(); main.load_counts()")
+}
+
+# Imports an entry point and loads the model, then prints the startup report
+_STARTUP_SCRIPT = """
+import time
+started_at = time.perf_counter()
+import json, {module}
+{load}
+print(json.dumps({module}.Tools.get_startup_report(started_at)))
+"""
+
+
+def _percentiles_us(seconds):
+    values = np.asarray(seconds) * 1e6
+    p50, p95, p99 = np.percentile(values, [50, 95, 99]).tolist()
+    return {"mean": float(values.mean()), "p50": p50, "p95": p95, "p99": p99}
+
+
+def benchmark_training(dataset_path, params):
+    """
+    Times every stage of the training pipeline, keeping the fastest of params['repeat'] runs,
+    then measures the peak traced memory of one more run.
+    Args:
+        dataset_path (str): Path to the CSV dataset.
+        params (dict): Benchmark parameters.
+    Returns:
+        tuple: (results dict, output of the fastest run_training).
+    """
+    options = {"streaming": params["streaming"], "chunk_size": params["chunk_size"], "workers": params["workers"]}
+    best = None
+    for _ in range(params["repeat"]):
+        start = time.perf_counter()
+        trained = run_training(dataset_path, **options)
+        end = time.perf_counter()
+        if best is None or end - start < best["total_s"]:
+            best = {"total_s": end - start, "stages_s": trained["stage_seconds"], "trained": trained}
+
+    # Measured separately, as tracing allocations slows the pipeline down
+    tracemalloc.start()
+    run_training(dataset_path, **options)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    trained = best.pop("trained")
+    best["peak_traced_bytes"] = peak
+    return best, trained
+
+
+def benchmark_prediction(model_data, df, params):
+    """
+    Measures single-record and batch prediction latency on rows of the dataset.
+    The prediction cache is disabled, so every call is scored.
+    Args:
+        model_data (dict): Model state with the trained model.
+        df (pd.DataFrame): The dataset the rows are taken from.
+        params (dict): Benchmark parameters.
+    Returns:
+        dict: 'single_us' latency statistics and 'batch' timings.
+    """
+    feature_columns = list(df.columns[:-1])
+    rng = np.random.default_rng(params["seed"])
+
+    records = df.iloc[rng.integers(0, len(df), params["single_predictions"])][feature_columns].to_dict("records")
+    latencies = []
+    for record in records:
+        start = time.perf_counter()
+        predict_workflow(record, model_data)
+        latencies.append(time.perf_counter() - start)
+
+    batch = df.iloc[rng.integers(0, len(df), params["batch_size"])][feature_columns]
+    columns = {column: batch[column].tolist() for column in feature_columns}
+    timings = []
+    for _ in range(params["repeat"]):
+        start = time.perf_counter()
+        predict_batch_workflow(columns=columns, model_data=model_data)
+        timings.append(time.perf_counter() - start)
+    best = min(timings)
+    return {
+        "single_us": _percentiles_us(latencies),
+        "batch": {"rows": len(batch), "total_ms": best * 1000, "per_row_us": best / max(len(batch), 1) * 1e6}
+    }
+
+
+def benchmark_hashing(params):
+    """
+    Trains on the benchmark dataset with params['high_cardinality_features'] ID-like columns added,
+    once keeping every value (exact) and once hashing the columns above params['hash_threshold'],
+    and reports the accuracy, training time and memory of both.
+    Args:
+        params (dict): Benchmark parameters.
+    Returns:
+        dict: 'exact' and 'hashed', each with 'accuracy', 'total_s', 'model_bytes', 'counts_bytes'
+              and 'peak_traced_bytes'; None if no high-cardinality column is asked for.
+    """
+    if not params["high_cardinality_features"]:
+        return None
+    hashing = {}
+    with tempfile.TemporaryDirectory() as directory:
+        dataset_path = write_dataset(os.path.join(directory, "benchmark_ids.csv"), params["rows"], params["features"],
+                                     params["cardinality"], params["classes"], params["seed"],
+                                     params["high_cardinality_features"], params["high_cardinality"])
+        for mode, hash_threshold in (("exact", 0), ("hashed", params["hash_threshold"])):
+            options = {"streaming": params["streaming"], "chunk_size": params["chunk_size"],
+                       "workers": params["workers"], "hash_threshold": hash_threshold}
+            start = time.perf_counter()
+            trained = run_training(dataset_path, **options)
+            total = time.perf_counter() - start
+
+            tracemalloc.start()
+            run_training(dataset_path, **options)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            model_data = new_model_data()
+            install_trained_model(trained, model_data)
+            model_memory = get_memory_usage(model_data)
+            hashing[mode] = {"accuracy": model_data["accuracy"], "total_s": total,
+                             "model_bytes": model_memory["model_bytes"], "counts_bytes": model_memory["counts_bytes"],
+                             "peak_traced_bytes": peak}
+    return hashing
+
+
+def benchmark_startup(model_path):
+    """
+    Measures every startup scenario in a fresh interpreter: the time to import the entry point
+    and load the saved model, the resident memory afterwards, and whether pandas was imported.
+    Args:
+        model_path (str): Saved model the entry points load.
+    Returns:
+        dict: Scenario -> 'startup_seconds', 'startup_rss_bytes' and 'pandas_loaded'.
+    """
+    backend_directory = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    startup = {}
+    with tempfile.TemporaryDirectory() as directory:  # The entry points create their working directories here
+        environment = {**os.environ, "MODEL_PATH": model_path,
+                       "PYTHONPATH": os.pathsep.join(filter(None, [backend_directory, os.environ.get("PYTHONPATH")]))}
+        for scenario, (module, load) in STARTUP_SCENARIOS.items():
+            output = subprocess.run([sys.executable, "-c", _STARTUP_SCRIPT.format(module=module, load=load)],
+                                    cwd=directory, env=environment, capture_output=True, text=True, check=True).stdout
+            startup[scenario] = json.loads(output.strip().splitlines()[-1])
+    return startup
+
+
+def run_suite(params=None):
+    """
+    Generates the synthetic dataset and runs the whole benchmark.
+    Args:
+        params (dict, optional): Overrides of DEFAULT_PARAMS.
+    Returns:
+        dict: 'params', 'environment' and 'results', ready to be written as JSON.
+    """
+    params = {**DEFAULT_PARAMS, **(params or {})}
+    with tempfile.TemporaryDirectory() as directory:
+        dataset_path = write_dataset(os.path.join(directory, "benchmark.csv"), params["rows"], params["features"],
+                                     params["cardinality"], params["classes"], params["seed"])
+        training, trained = benchmark_training(dataset_path, params)
+        df = pd.read_csv(dataset_path, dtype=str)
+
+    model_data = new_model_data()
+    model_data["prediction_cache"] = PredictionCache(0)
+    install_trained_model(trained, model_data)
+    prediction = benchmark_prediction(model_data, df, params)
+    with tempfile.TemporaryDirectory() as directory:
+        model_path = os.path.join(directory, "model.nbm")
+        save_trained_model(model_path, model_data)
+        startup = benchmark_startup(model_path)
+    hashing = benchmark_hashing(params)
+
+    model_memory = get_memory_usage(model_data)
+    return {
+        "params": params,
+        "environment": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count()
+        },
+        "results": {
+            "accuracy": model_data["accuracy"],
+            "train": training,
+            "predict": prediction,
+            "startup": startup,
+            "hashing": hashing,
+            "memory": {
+                "model_bytes": model_memory["model_bytes"],
+                "counts_bytes": model_memory["counts_bytes"],
+                "peak_traced_bytes": training.pop("peak_traced_bytes"),
+                # ru_maxrss is in KiB on Linux and in bytes on macOS
+                "max_rss_bytes": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+                                 * (1 if sys.platform == "darwin" else 1024),
+                "process_rss_bytes": Tools.get_process_rss()
+            }
+        }
+    }
+
+
+def _flatten(results, prefix=""):
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(_flatten(value, name + "."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def compare_results(baseline, current, threshold=0.10, accuracy_tolerance=0.5, noise_floor_s=0.01):
+    """
+    Compares two benchmark outputs metric by metric.
+    Timings and memory regress when they grow by more than threshold (relative);
+    accuracy regresses when it drops by more than accuracy_tolerance percentage points.
+    Args:
+        baseline (dict): Output of run_suite saved earlier.
+        current (dict): Output of run_suite to check.
+        threshold (float): Allowed relative growth of timings and memory.
+        accuracy_tolerance (float): Allowed accuracy drop, in percentage points.
+        noise_floor_s (float): Stage timings (in seconds) that grow by less than this never regress,
+            so stages that take a few milliseconds are not flagged for timer noise.
+    Returns:
+        list: One dict per metric found in both: 'metric', 'baseline', 'current', 'change' and 'regression'.
+    """
+    baseline_metrics = _flatten(baseline["results"])
+    current_metrics = _flatten(current["results"])
+    comparison = []
+    for metric, before in baseline_metrics.items():
+        after = current_metrics.get(metric)
+        if after is None or metric.endswith(".rows"):
+            continue
+        if "accuracy" in metric:
+            change = after - before
+            regression = change < -accuracy_tolerance
+        else:
+            change = (after - before) / before if before else 0.0
+            regression = change > threshold
+            if metric.endswith("_s") and after - before < noise_floor_s:
+                regression = False
+        comparison.append({"metric": metric, "baseline": before, "current": after,
+                           "change": change, "regression": regression})
+    return comparison
@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+
+# Share of every class-conditional value distribution that is specific to the class;
+# the rest is common to all classes, which keeps the classification task from being trivial
+CLASS_SIGNAL = 0.15
+
+
+def _draw_feature(rng, class_codes, classes, cardinality):
+    """
+    Draws the value codes of one feature from a skewed distribution per class over its values.
+    """
+    shared = rng.dirichlet(np.full(cardinality, 0.5))
+    probabilities = ((1 - CLASS_SIGNAL) * shared
+                     + CLASS_SIGNAL * rng.dirichlet(np.full(cardinality, 0.5), size=classes))
+    cumulative = probabilities.cumsum(axis=1)
+    cumulative[:, -1] = 1.0
+    draws = rng.random(len(class_codes))
+    codes = np.empty(len(class_codes), dtype=np.intp)
+    for class_code in range(classes):
+        rows_of_class = class_codes == class_code
+        codes[rows_of_class] = np.searchsorted(cumulative[class_code], draws[rows_of_class], side="right")
+    return codes
+
+
+def generate_dataset(rows, features, cardinality, classes, seed=0, target_column="label",
+                     high_cardinality_features=0, high_cardinality=100_000):
+    """
+    Generates a deterministic synthetic categorical dataset with a learnable signal.
+    The class of every row is drawn first; each feature value is then drawn from a
+    distribution that depends on the class, so the features carry information about it.
+    Args:
+        rows (int): Number of rows.
+        features (int): Number of feature columns.
+        cardinality (int): Number of distinct values per feature.
+        classes (int): Number of classes.
+        seed (int): Random seed; the same arguments always produce the same dataset.
+        target_column (str): Name of the target column, which comes last.
+        high_cardinality_features (int): Number of additional ID-like feature columns.
+        high_cardinality (int): Number of possible values of each of them, most of them rare.
+    Returns:
+        pd.DataFrame: The dataset, with string values 'v0', 'v1', ... (and 'id0', 'id1', ... in the
+                      high-cardinality columns 'h0', 'h1', ...) and classes 'c0', 'c1', ...
+    """
+    rng = np.random.default_rng(seed)
+    class_codes = rng.choice(classes, size=rows, p=rng.dirichlet(np.full(classes, 5.0)))
+    value_labels = np.array([f"v{value}" for value in range(cardinality)], dtype=object)
+
+    data = {}
+    for position in range(features):
+        data[f"f{position}"] = value_labels[_draw_feature(rng, class_codes, classes, cardinality)]
+    if high_cardinality_features:
+        id_labels = np.array([f"id{value}" for value in range(high_cardinality)], dtype=object)
+        for position in range(high_cardinality_features):
+            data[f"h{position}"] = id_labels[_draw_feature(rng, class_codes, classes, high_cardinality)]
+
+    data[target_column] = np.array([f"c{code}" for code in range(classes)], dtype=object)[class_codes]
+    return pd.DataFrame(data)
+
+
+def write_dataset(path, rows, features, cardinality, classes, seed=0, high_cardinality_features=0,
+                  high_cardinality=100_000):
+    """
+    Generates a synthetic dataset and writes it as CSV.
+    Args:
+        path (str): Destination file path.
+        rows (int): Number of rows.
+        features (int): Number of feature columns.
+        cardinality (int): Number of distinct values per feature.
+        classes (int): Number of classes.
+        seed (int): Random seed.
+        high_cardinality_features (int): Number of additional ID-like feature columns.
+        high_cardinality (int): Number of possible values of each of them.
+    Returns:
+        str: The path.
+    """
+    generate_dataset(rows, features, cardinality, classes, seed, high_cardinality_features=high_cardinality_features,
+                     high_cardinality=high_cardinality).to_csv(path, index=False)
+    return path
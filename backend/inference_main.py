@@ -0,0 +1,168 @@
+import sys
+import os
+import time
+
+# Taken before the dependencies are imported, for the startup report of /status
+STARTED_AT = time.perf_counter()
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import JSONResponse, PlainTextResponse
+from fastapi.middleware.cors import CORSMiddleware
+from naive_bayes_logic.management import predict_workflow, predict_many_workflow, predict_batch_workflow, \
+    get_model_status, load_trained_model
+from naive_bayes_logic.model_store import ModelStore
+from naive_bayes_logic.prediction_batcher import PredictionBatcher
+from naive_bayes_logic.metrics import MetricsRegistry, registry as metrics_registry
+from naive_bayes_logic.tools import Tools
+from backend.models import PredictionRequest, PredictionResponse, BatchPredictionRequest, BatchPredictionResponse, \
+    ModelStatusResponse
+from contextlib import asynccontextmanager
+import logging
+
+# Inference-only server for prediction replicas: it serves a model saved by the main API
+# (main.py) and never trains, so it only needs NumPy and the standard library. pandas and
+# the training modules are never imported, which makes cold starts faster and workers smaller.
+# Run it with: uvicorn inference_main:app (from the backend directory)
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# File the model is loaded from; a new version saved by the main API is picked up before the next request,
+# at most once per MODEL_STORE_CHECK_INTERVAL_MS (0 = every request)
+MODEL_PATH = os.environ.get("MODEL_PATH", os.path.join("saved_models", "model.nbm"))
+model_store = ModelStore(MODEL_PATH, check_interval_ms=float(os.environ.get("MODEL_STORE_CHECK_INTERVAL_MS", "0")))
+
+# Opt-in micro-batching of /predict, configured as in the main API
+prediction_batcher = None
+if os.environ.get("PREDICT_BATCHING", "0") == "1":
+    prediction_batcher = PredictionBatcher(predict_many_workflow,
+                                           max_batch_size=int(os.environ.get("PREDICT_BATCH_MAX_SIZE", "64")),
+                                           max_wait_ms=float(os.environ.get("PREDICT_BATCH_WINDOW_MS", "2")))
+
+# Import time, model loading time and memory of this worker at startup, reported by /status
+startup_report = None
+
+
+def sync_model():
+    """
+    Loads the model file if it was replaced since this worker last loaded it.
+    Only the compiled tables are loaded: the counts are needed to update a model, not to serve it.
+    """
+    signature = model_store.changed()
+    if signature is not None:
+        load_trained_model(MODEL_PATH, with_counts=False)
+        model_store.mark_loaded(signature)
+        logger.info(f"Loaded saved model from {MODEL_PATH}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Loads the saved model at startup and reports how long starting took and how much memory it holds.
+    """
+    global startup_report
+    try:
+        sync_model()
+    except Exception as e:
+        logger.error(f"Could not load saved model from {MODEL_PATH}: {e}", exc_info=True)
+    startup_report = Tools.get_startup_report(STARTED_AT)
+    logger.info(f"Started in {startup_report['startup_seconds']:.3f}s with "
+                f"{(startup_report['startup_rss_bytes'] or 0) / 2**20:.1f} MiB resident")
+    yield
+
+
+app = FastAPI(
+    title="Naive Bayes Inference API",
+    description="Prediction-only API serving a saved Naive Bayes model.",
+    version="1.0.0",
+    lifespan=lifespan
+)
+
+
+@app.middleware("http")
+async def sync_saved_model(request, call_next):
+    """
+    Picks up a new version of the model file before serving the request.
+    """
+    try:
+        sync_model()
+    except Exception as e:
+        logger.error(f"Could not load saved model from {MODEL_PATH}: {e}", exc_info=True)
+    return await call_next(request)
+
+# Configure CORS
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],  # Allows all origins
+    allow_credentials=True,
+    allow_methods=["*"],  # Allows all methods (GET, POST, PUT, DELETE, etc.)
+    allow_headers=["*"],  # Allows all headers
+)
+
+
+@app.post("/predict", response_model=PredictionResponse)
+async def predict(request: PredictionRequest):
+    """
+    Makes a prediction using the saved Naive Bayes model based on provided features.
+    With PREDICT_BATCHING=1 the request is scored together with the ones arriving at the same time.
+    """
+    try:
+        if prediction_batcher is not None:
+            prediction_result = await prediction_batcher.submit(request.features)
+        else:
+            prediction_result = predict_workflow(request.features)
+        logger.info(f"Prediction made: {prediction_result['prediction']}")
+        return JSONResponse(content=prediction_result, status_code=200)
+    except ValueError as e:
+        logger.warning(f"Prediction input error: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error during prediction: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Error during prediction: {e}")
+
+
+@app.post("/predict/batch", response_model=BatchPredictionResponse)
+async def predict_batch(request: BatchPredictionRequest):
+    """
+    Scores a batch of records, given either as a list of records or as columns, in one vectorized call.
+    Rows that fail validation are reported in 'errors' without failing the rest of the batch.
+    """
+    try:
+        batch_result = predict_batch_workflow(records=request.records, columns=request.columns)
+        logger.info(f"Batch prediction made for {len(batch_result['predictions'])} rows "
+                    f"({len(batch_result['errors'])} rejected)")
+        return JSONResponse(content=batch_result, status_code=200)
+    except ValueError as e:
+        logger.warning(f"Batch prediction input error: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error during batch prediction: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Error during batch prediction: {e}")
+
+
+@app.get("/status", response_model=ModelStatusResponse)
+async def get_status():
+    """
+    Returns the status of the served model, including accuracy and features, and the startup report.
+    """
+    try:
+        status = get_model_status()
+        status["prediction_batching"] = prediction_batcher.get_stats() if prediction_batcher is not None else None
+        status["runtime"] = startup_report
+        logger.info(f"Model status requested: {status['status']}")
+        return JSONResponse(content=status, status_code=200)
+    except Exception as e:
+        logger.error(f"Error getting model status: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Error retrieving model status: {e}")
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """
+    Returns the prediction stage timings of this worker in the Prometheus text format.
+    """
+    return PlainTextResponse(metrics_registry.render(), media_type=MetricsRegistry.CONTENT_TYPE)
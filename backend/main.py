@@ -1,16 +1,37 @@
 import sys
 import os
+import time
+
+# Taken before the dependencies are imported, for the startup report of /status
+STARTED_AT = time.perf_counter()
 
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from fastapi import FastAPI, UploadFile, File, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, UploadFile, File, HTTPException, Query
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from naive_bayes_logic.management import train_model_workflow, predict_workflow, get_model_status
-from backend.models import PredictionRequest, PredictionResponse, TrainResponse, ModelStatusResponse
-import shutil
+from naive_bayes_logic.management import install_trained_model, count_appended_data, install_appended_data, \
+    predict_workflow, predict_many_workflow, predict_batch_workflow, get_model_status, save_trained_model, \
+    load_trained_model, read_trained_model, get_memory_usage, trained_model_data, predict_file_workflow, \
+    HASH_THRESHOLD, NUMERIC_THRESHOLD
+from naive_bayes_logic.training_jobs import TrainingJobManager
+from naive_bayes_logic.model_cache import ModelCache
+from naive_bayes_logic.model_store import ModelStore
+from naive_bayes_logic.model_registry import ModelRegistry
+from naive_bayes_logic.prediction_batcher import PredictionBatcher
+from naive_bayes_logic.model_storage import FORMAT_VERSION
+from naive_bayes_logic.feature_hashing import FeatureHashing
+from naive_bayes_logic.metrics import Histogram, Gauge, MetricsRegistry, registry as metrics_registry
+from naive_bayes_logic.tools import Tools
+from backend.models import PredictionRequest, PredictionResponse, BatchPredictionRequest, BatchPredictionResponse, \
+    TrainResponse, AppendResponse, TrainingJobResponse, ModelStatusResponse, ModelRegistryResponse
+from contextlib import asynccontextmanager
+from functools import partial
+import hashlib
 import logging
+import uuid
 
 
 
@@ -18,12 +39,131 @@ import logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# File the trained model is saved to after every /train and /train/append, and loaded from at startup
+MODEL_PATH = os.environ.get("MODEL_PATH", os.path.join("saved_models", "model.nbm"))
+
+# The model file is shared by all workers (uvicorn --workers N): each request first checks it for a
+# version saved by another worker, at most once per MODEL_STORE_CHECK_INTERVAL_MS (0 = every request)
+model_store = ModelStore(MODEL_PATH, check_interval_ms=float(os.environ.get("MODEL_STORE_CHECK_INTERVAL_MS", "0")))
+
+# Training runs in worker processes so the event loop keeps serving /predict and /status meanwhile.
+# With TRAINING_PROFILE_DIR set, the first training job after startup is profiled with cProfile.
+# The status of the last TRAINING_JOBS_KEPT finished jobs can be polled; older ones are forgotten
+training_jobs = TrainingJobManager(max_workers=int(os.environ.get("TRAINING_WORKERS", "1")),
+                                   profile_dir=os.environ.get("TRAINING_PROFILE_DIR"),
+                                   max_finished_jobs=int(os.environ.get("TRAINING_JOBS_KEPT", "100")))
+
+# Models trained by /train, keyed by the hash of the uploaded file and the training parameters,
+# so re-posting an identical dataset skips training; MODEL_CACHE_SIZE=0 disables it
+model_cache = ModelCache(os.environ.get("MODEL_CACHE_DIR", "model_cache"),
+                         max_entries=int(os.environ.get("MODEL_CACHE_SIZE", "8")))
+
+# Named models served by /models/{name}/...; the least recently used ones are dropped from memory
+# (and reloaded from MODEL_REGISTRY_DIR on their next use) beyond MODEL_REGISTRY_MEMORY_MB
+model_registry = ModelRegistry(os.environ.get("MODEL_REGISTRY_DIR", os.path.join("saved_models", "registry")),
+                               memory_budget_bytes=int(float(os.environ.get("MODEL_REGISTRY_MEMORY_MB", "512"))
+                                                       * 1024 * 1024))
+
+# Opt-in micro-batching of /predict: concurrent single-record requests arriving within
+# PREDICT_BATCH_WINDOW_MS (or until PREDICT_BATCH_MAX_SIZE are queued) are scored together
+prediction_batcher = None
+if os.environ.get("PREDICT_BATCHING", "0") == "1":
+    prediction_batcher = PredictionBatcher(predict_many_workflow,
+                                           max_batch_size=int(os.environ.get("PREDICT_BATCH_MAX_SIZE", "64")),
+                                           max_wait_ms=float(os.environ.get("PREDICT_BATCH_WINDOW_MS", "2")))
+
+# Metrics served by /metrics, next to the workflow stage timings registered by naive_bayes_logic.metrics
+REQUEST_SECONDS = metrics_registry.register(Histogram(
+    "naive_bayes_http_request_duration_seconds",
+    "Time to respond to a request, per method, route and status code.",
+    ("method", "route", "status")))
+metrics_registry.register(Gauge(
+    "naive_bayes_model_version", "Version of the served model, bumped on every training and append.",
+    collect_values=lambda: {(): trained_model_data["model_version"]}))
+metrics_registry.register(Gauge(
+    "naive_bayes_memory_bytes", "Memory held by the served model tables, its counts and the whole process.",
+    ("kind",),
+    collect_values=lambda: {(kind.removesuffix("_bytes"),): value for kind, value in get_memory_usage().items()}))
+metrics_registry.register(Gauge(
+    "naive_bayes_prediction_cache_events_total", "Hits, misses and evictions of the served model's prediction cache.",
+    ("event",), metric_type="counter",
+    collect_values=lambda: {(event,): trained_model_data["prediction_cache"].get_stats()[event]
+                            for event in ("hits", "misses", "evictions")}))
+metrics_registry.register(Gauge(
+    "naive_bayes_training_jobs", "Training jobs of this worker, per status (queued includes running jobs).", ("status",),
+    collect_values=lambda: {(status,): sum(job["status"] == status for job in training_jobs.jobs.values())
+                            for status in ("queued", "completed", "failed", "cancelled")}))
+
+# Import time, model loading time and memory of this worker at startup, reported by /status
+startup_report = None
+
+# Media type of every output format of /predict/file
+PREDICT_FILE_MEDIA_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+# Size of the blocks an upload is copied and hashed in
+UPLOAD_BLOCK_SIZE = 1024 * 1024
+
+# Accepted upload names: plain, gzip or zstd compressed CSV, Parquet and Feather/Arrow IPC
+# (format and compression are detected from the content)
+UPLOAD_SUFFIXES = (".csv", ".csv.gz", ".csv.gzip", ".csv.zst", ".csv.zstd",
+                   ".parquet", ".pq", ".feather", ".arrow", ".arrows", ".ipc")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Loads the saved model at startup, if there is one, so a restart does not require retraining.
+    """
+    global startup_report
+    try:
+        sync_model()
+    except Exception as e:
+        logger.error(f"Could not load saved model from {MODEL_PATH}: {e}", exc_info=True)
+    startup_report = Tools.get_startup_report(STARTED_AT)
+    logger.info(f"Started in {startup_report['startup_seconds']:.3f}s with "
+                f"{(startup_report['startup_rss_bytes'] or 0) / 2**20:.1f} MiB resident")
+    yield
+    training_jobs.shutdown()
+
+
 app = FastAPI(
     title="Naive Bayes Classifier API",
     description="API for training a Naive Bayes model and making predictions.",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
+
+@app.middleware("http")
+async def sync_shared_model(request, call_next):
+    """
+    Picks up a model saved by another worker before serving the request.
+    """
+    try:
+        sync_model()
+    except Exception as e:
+        logger.error(f"Could not load saved model from {MODEL_PATH}: {e}", exc_info=True)
+    return await call_next(request)
+
+
+@app.middleware("http")
+async def record_request_metrics(request, call_next):
+    """
+    Observes the latency of every request, including the model sync above, into the per-route histogram.
+    Requests are labelled with the route template (e.g. /train/jobs/{job_id}), so ids and model names
+    do not create new series. Streamed responses are timed until their headers are sent.
+    """
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        REQUEST_SECONDS.labels(request.method, route.path if route is not None else "unmatched",
+                               status).observe(time.perf_counter() - start)
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -38,43 +178,285 @@ UPLOAD_DIR = "uploaded_datasets"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
 
+def check_upload_name(file: UploadFile):
+    """
+    Rejects uploads that are not (optionally compressed) CSV, Parquet or Feather/Arrow files.
+    """
+    if not file.filename.lower().endswith(UPLOAD_SUFFIXES):
+        raise HTTPException(status_code=400, detail="Only CSV (optionally .gz or .zst compressed), Parquet and "
+                                                    "Feather/Arrow files are allowed.")
+
+
+async def save_upload(file: UploadFile):
+    """
+    Hands an upload to a training process by saving it under a unique name, so concurrent uploads
+    of the same file never collide. Compressed uploads are kept compressed; the training process
+    decompresses them while parsing. The content is hashed while it is copied, and reading the
+    upload in blocks through the async API keeps the event loop free for other requests.
+    Returns the file path and the SHA-256 hex digest.
+    """
+    check_upload_name(file)
+    file_path = os.path.join(UPLOAD_DIR, f"{uuid.uuid4().hex}_{os.path.basename(file.filename)}")
+    digest = hashlib.sha256()
+    with open(file_path, "wb") as buffer:
+        while block := await file.read(UPLOAD_BLOCK_SIZE):
+            digest.update(block)
+            buffer.write(block)
+    logger.info(f"File '{file.filename}' uploaded successfully to {file_path}")
+    return file_path, digest.hexdigest()
+
+
+def get_training_params(streaming, cv_folds, stratified):
+    """
+    Training parameters that change the trained model or its evaluation, used in the model cache key.
+    The chunk size is left out: streaming splits rows by position, so it does not affect the model.
+    """
+    # Imported here: the training modules (and pandas) are only loaded once a model is trained
+    from naive_bayes_logic.receiving_information import ReceivingInformation
+    return {
+        "streaming": streaming,
+        "cv_folds": cv_folds,
+        "stratified": stratified,
+        "train_fraction": ReceivingInformation.TRAIN_FRACTION,
+        "split_seed": ReceivingInformation.SPLIT_SEED,
+        "hash_threshold": HASH_THRESHOLD,
+        "numeric_threshold": NUMERIC_THRESHOLD,
+        "hash_buckets": FeatureHashing.DEFAULT_BUCKETS,
+        "format_version": FORMAT_VERSION
+    }
+
+
+def sync_model():
+    """
+    Loads the shared model file if another worker replaced it since this one last loaded or saved it.
+    The new version is mapped and swapped in with a single dict update. Its counts are left out until
+    an append needs them, so a worker that only serves predictions never imports pandas.
+    """
+    signature = model_store.changed()
+    if signature is not None:
+        load_trained_model(MODEL_PATH, with_counts=False)
+        model_store.mark_loaded(signature)
+        logger.info(f"Loaded saved model from {MODEL_PATH}")
+
+
+async def load_counts():
+    """
+    Loads the counts of a served model that was loaded without them, for an append to update.
+    Must be called under the store lock, right after sync_model, so the file holds the served version.
+    The file is read in the thread pool (loading the counts imports pandas) and swapped in on the event loop.
+    """
+    if trained_model_data["compiled_model"] is not None and trained_model_data["counts"] is None:
+        install_trained_model(await run_in_threadpool(read_trained_model, MODEL_PATH))
+        logger.info(f"Loaded model counts from {MODEL_PATH}")
+
+
+def publish_model(model_data=None):
+    """
+    Saves the served model to the shared model file, for the other workers to pick up.
+    Run off the event loop, it is given a snapshot of the served model state (dict(trained_model_data)),
+    so a model swapped in meanwhile is not saved in its place.
+    """
+    model_store.mark_loaded(ModelStore.get_signature(save_trained_model(MODEL_PATH, model_data)))
+    logger.info(f"Model saved to {MODEL_PATH}")
+
+
+async def install_and_save(trained, cache_key=None, name=None):
+    """
+    Swaps a model trained by a background job in as the served model (or as the named model
+    of the registry) and saves it, also to the model cache when a cache key is given.
+    The swap runs on the event loop, between requests; the files are written in the thread pool.
+    """
+    if name is not None:
+        result = await run_in_threadpool(model_registry.install, name, trained)
+        model_data = await run_in_threadpool(model_registry.get, name)
+        logger.info(f"Model '{name}' training completed with accuracy: {result['accuracy']:.2f}%")
+    else:
+        # Under the store lock, so an append running in another worker cannot overwrite the new model
+        async with model_store.async_lock():
+            result = install_trained_model(trained)
+            logger.info(f"Model training completed with accuracy: {result['accuracy']:.2f}%")
+            model_data = dict(trained_model_data)
+            await run_in_threadpool(publish_model, model_data)
+    if cache_key is not None and model_cache.max_entries > 0:
+        await run_in_threadpool(save_trained_model, model_cache.get_path(cache_key), model_data)
+        evicted = model_cache.evict()
+        logger.info(f"Model cached as {cache_key} ({evicted} evicted)")
+    return result
+
+
+async def install_cached_model(cached_path, name=None):
+    """
+    Serves a model from the model cache instead of training it again. Returns the model metadata.
+    """
+    if name is not None:
+        result = await run_in_threadpool(model_registry.install_file, name, cached_path)
+    else:
+        async with model_store.async_lock():
+            result = install_trained_model(await run_in_threadpool(read_trained_model, cached_path))
+            await run_in_threadpool(publish_model, dict(trained_model_data))
+    result["message"] = "Model loaded from cache: this dataset was already trained with the same parameters."
+    logger.info(f"Model loaded from cache {cached_path}")
+    return result
+
+
+async def submit_training_job(file, streaming, chunk_size, cv_folds=0, stratified=False, name=None):
+    """
+    Saves the upload and submits it as a background training job. Returns the job id.
+    The trained model replaces the served model, or the named model of the registry when a name is given.
+    If the same file was already trained with the same parameters, the cached model is
+    installed right away and the job is recorded as completed.
+    """
+    if name is not None:
+        try:
+            model_registry.check_name(name)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    if cv_folds == 1:
+        raise HTTPException(status_code=400, detail="Cross-validation needs at least 2 folds.")
+    if cv_folds and streaming:
+        raise HTTPException(status_code=400, detail="Cross-validation is not available in streaming mode.")
+    file_path, content_hash = await save_upload(file)
+    cache_key = model_cache.get_key(content_hash, get_training_params(streaming, cv_folds, stratified))
+    cached_path = model_cache.lookup(cache_key)
+    if cached_path is not None:
+        try:
+            result = await install_cached_model(cached_path, name)
+        except Exception as e:
+            logger.warning(f"Could not load cached model {cached_path}, training instead: {e}")
+        else:
+            os.remove(file_path)
+            job_id = training_jobs.record_completed(result)
+            logger.info(f"Training job {job_id} for '{file.filename}' served from the model cache")
+            return job_id
+
+    job_id = training_jobs.submit(file_path, partial(install_and_save, cache_key=cache_key, name=name),
+                                  streaming=streaming, chunk_size=chunk_size, cv_folds=cv_folds, stratified=stratified)
+    logger.info(f"Training job {job_id} submitted for '{file.filename}'")
+    return job_id
+
+
 @app.post("/train", response_model=TrainResponse)
-async def train_model(file: UploadFile = File(...)):
+async def train_model(file: UploadFile = File(...),
+                      streaming: bool = Query(False, description="Train from fixed-size chunks with bounded memory."),
+                      chunk_size: int = Query(100_000, gt=0, description="Rows per chunk in streaming mode."),
+                      cv_folds: int = Query(0, ge=0, description="Also run k-fold cross-validation; 0 skips it."),
+                      stratified: bool = Query(False, description="Stratify the cross-validation folds by class.")):
+    """
+    Uploads a dataset, trains the Naive Bayes model, and returns its accuracy.
+    With streaming=true the file is read in chunks and split by a per-row hash,
+    so datasets larger than memory can be trained.
+    With cv_folds=k the response also reports the mean and standard deviation of the accuracy over k folds.
+    Training runs as a background job; this request simply waits for it to finish.
+    """
+    return await train_and_wait(file, streaming, chunk_size, cv_folds, stratified)
+
+
+async def train_and_wait(file, streaming, chunk_size, cv_folds, stratified, name=None):
+    """
+    Submits a training job and waits for it, mapping its outcome to a response.
+    """
+    try:
+        job_id = await submit_training_job(file, streaming, chunk_size, cv_folds, stratified, name)
+        job = await training_jobs.wait(job_id)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error during model training: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Error during model training: {e}")
+
+    if job["status"] == "cancelled":
+        raise HTTPException(status_code=409, detail="Model training was cancelled.")
+    if job["status"] != "completed":
+        logger.error(f"Error during model training: {job['error']}")
+        raise HTTPException(status_code=500, detail=f"Error during model training: {job['error']}")
+    return JSONResponse(content=job["result"], status_code=200)
+
+
+@app.post("/train/jobs", response_model=TrainingJobResponse, status_code=202)
+async def submit_training(file: UploadFile = File(...),
+                          streaming: bool = Query(False, description="Train from fixed-size chunks with bounded memory."),
+                          chunk_size: int = Query(100_000, gt=0, description="Rows per chunk in streaming mode."),
+                          cv_folds: int = Query(0, ge=0, description="Also run k-fold cross-validation; 0 skips it."),
+                          stratified: bool = Query(False, description="Stratify the cross-validation folds by class.")):
+    """
+    Uploads a dataset and starts training it in the background. Returns the job id to poll.
+    The current model keeps serving until the new one is ready, then it is swapped in atomically.
+    """
+    try:
+        job_id = await submit_training_job(file, streaming, chunk_size, cv_folds, stratified)
+        return JSONResponse(content=training_jobs.get_status(job_id), status_code=202)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error submitting training job: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Error submitting training job: {e}")
+
+
+@app.get("/train/jobs/{job_id}", response_model=TrainingJobResponse)
+async def get_training_job(job_id: str):
     """
-    Uploads a CSV dataset, trains the Naive Bayes model, and returns its accuracy.
+    Returns the status and stage-level progress (load, clean, split, count, evaluate, cross_validate) of a training job.
     """
-    if not file.filename.endswith(".csv"):
-        raise HTTPException(status_code=400, detail="Only CSV files are allowed.")
+    try:
+        return JSONResponse(content=training_jobs.get_status(job_id), status_code=200)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e.args[0]))
+
 
-    file_path = os.path.join(UPLOAD_DIR, file.filename)
+@app.delete("/train/jobs/{job_id}", response_model=TrainingJobResponse)
+async def cancel_training_job(job_id: str):
+    """
+    Cancels a training job. A running job stops at its next stage or chunk; the served model is not affected.
+    """
     try:
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        if not training_jobs.cancel(job_id):
+            raise HTTPException(status_code=409, detail="Training job has already finished.")
+        logger.info(f"Training job {job_id} cancellation requested")
+        return JSONResponse(content=training_jobs.get_status(job_id), status_code=200)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e.args[0]))
 
-        logger.info(f"File '{file.filename}' uploaded successfully to {file_path}")
 
-        # Run the training workflow
-        result = train_model_workflow(file_path)
-        logger.info(f"Model training completed with accuracy: {result['accuracy']:.2f}%")
+@app.post("/train/append", response_model=AppendResponse)
+async def append_training_data(file: UploadFile = File(...),
+                               chunk_size: int = Query(100_000, gt=0, description="Rows per chunk.")):
+    """
+    Uploads a file of new labelled rows and folds its counts into the trained model without retraining.
+    The upload is parsed chunk by chunk straight from the request's spooled file, without another copy.
+    Parsing and counting run in the thread pool, so other requests are served meanwhile; the updated
+    model is swapped in on the event loop.
+    """
+    check_upload_name(file)
+    try:
+        # Append to the latest version saved by any worker, and keep the others out until it is saved
+        async with model_store.async_lock():
+            sync_model()
+            await load_counts()
+            appended = await run_in_threadpool(count_appended_data, file.file, chunk_size)
+            result = install_appended_data(appended)
+            logger.info(f"Model updated with {result['rows_added']} new rows")
+            await run_in_threadpool(publish_model, dict(trained_model_data))
 
         return JSONResponse(content=result, status_code=200)
+    except ValueError as e:
+        logger.warning(f"Append input error: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        logger.error(f"Error during model training: {e}", exc_info=True)
-        raise HTTPException(status_code=500, detail=f"Error during model training: {e}")
-    finally:
-        # Clean up the uploaded file after processing
-        if os.path.exists(file_path):
-            os.remove(file_path)
-            logger.info(f"Cleaned up uploaded file: {file_path}")
+        logger.error(f"Error while appending training data: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Error while appending training data: {e}")
 
 
 @app.post("/predict", response_model=PredictionResponse)
 async def predict(request: PredictionRequest):
     """
     Makes a prediction using the trained Naive Bayes model based on provided features.
+    With PREDICT_BATCHING=1 the request is scored together with the ones arriving at the same time.
     """
     try:
-        prediction_result = predict_workflow(request.features)
+        if prediction_batcher is not None:
+            prediction_result = await prediction_batcher.submit(request.features)
+        else:
+            prediction_result = predict_workflow(request.features)
         logger.info(f"Prediction made: {prediction_result['prediction']}")
         return JSONResponse(content=prediction_result, status_code=200)
     except ValueError as e:
@@ -85,6 +467,51 @@ async def predict(request: PredictionRequest):
         raise HTTPException(status_code=500, detail=f"Error during prediction: {e}")
 
 
+@app.post("/predict/batch", response_model=BatchPredictionResponse)
+async def predict_batch(request: BatchPredictionRequest):
+    """
+    Scores a batch of records, given either as a list of records or as columns, in one vectorized call.
+    Rows that fail validation are reported in 'errors' without failing the rest of the batch.
+    """
+    try:
+        batch_result = predict_batch_workflow(records=request.records, columns=request.columns)
+        logger.info(f"Batch prediction made for {len(batch_result['predictions'])} rows "
+                    f"({len(batch_result['errors'])} rejected)")
+        return JSONResponse(content=batch_result, status_code=200)
+    except ValueError as e:
+        logger.warning(f"Batch prediction input error: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error during batch prediction: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Error during batch prediction: {e}")
+
+
+@app.post("/predict/file")
+async def predict_file(file: UploadFile = File(...),
+                       output_format: str = Query("csv", description="Output format: 'csv' or 'ndjson'."),
+                       chunk_size: int = Query(100_000, gt=0, description="Rows read and scored at a time.")):
+    """
+    Scores every row of an uploaded file of feature columns (CSV, optionally .gz or .zst compressed,
+    Parquet or Feather/Arrow) and streams the results back chunk by chunk as they are scored.
+    The upload is parsed straight from the request's spooled file, so memory stays bounded by chunk_size.
+    Missing cells are scored as the 'nan' value of their feature when the model has one. Rows with
+    unknown values, or other missing ones, are reported in the 'error' column instead of failing the file.
+    The first chunk is read and checked in the thread pool; the rest are read as the response streams.
+    """
+    check_upload_name(file)
+    try:
+        results = await run_in_threadpool(predict_file_workflow, file.file, chunk_size=chunk_size,
+                                          output_format=output_format)
+        logger.info(f"Scoring file '{file.filename}' as {output_format}")
+        return StreamingResponse(results, media_type=PREDICT_FILE_MEDIA_TYPES[output_format])
+    except ValueError as e:
+        logger.warning(f"File prediction input error: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error during file prediction: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Error during file prediction: {e}")
+
+
 @app.get("/status", response_model=ModelStatusResponse)
 async def get_status():
     """
@@ -92,8 +519,81 @@ async def get_status():
     """
     try:
         status = get_model_status()
+        status["prediction_batching"] = prediction_batcher.get_stats() if prediction_batcher is not None else None
+        status["runtime"] = startup_report
         logger.info(f"Model status requested: {status['status']}")
         return JSONResponse(content=status, status_code=200)
     except Exception as e:
         logger.error(f"Error getting model status: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Error retrieving model status: {e}")
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """
+    Returns the metrics of this worker in the Prometheus text format: request latency per route,
+    the duration of every training and prediction stage, and model, cache and training job gauges.
+    """
+    return PlainTextResponse(metrics_registry.render(), media_type=MetricsRegistry.CONTENT_TYPE)
+
+
+@app.get("/models", response_model=ModelRegistryResponse)
+async def list_models():
+    """
+    Lists the named models, which of them are loaded, and the memory they hold against the budget.
+    """
+    try:
+        return JSONResponse(content=model_registry.get_stats(), status_code=200)
+    except Exception as e:
+        logger.error(f"Error listing models: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Error listing models: {e}")
+
+
+@app.post("/models/{name}/train", response_model=TrainResponse)
+async def train_named_model(name: str,
+                            file: UploadFile = File(...),
+                            streaming: bool = Query(False, description="Train from fixed-size chunks with bounded memory."),
+                            chunk_size: int = Query(100_000, gt=0, description="Rows per chunk in streaming mode."),
+                            cv_folds: int = Query(0, ge=0, description="Also run k-fold cross-validation; 0 skips it."),
+                            stratified: bool = Query(False, description="Stratify the cross-validation folds by class.")):
+    """
+    Uploads a dataset and trains the named model with it, creating or replacing it. Other models are not affected.
+    """
+    return await train_and_wait(file, streaming, chunk_size, cv_folds, stratified, name)
+
+
+@app.post("/models/{name}/predict", response_model=PredictionResponse)
+async def predict_named_model(name: str, request: PredictionRequest):
+    """
+    Makes a prediction with the named model, loading it from disk if it is not in memory.
+    """
+    try:
+        prediction_result = predict_workflow(request.features, await run_in_threadpool(model_registry.get, name))
+        logger.info(f"Prediction made with model '{name}': {prediction_result['prediction']}")
+        return JSONResponse(content=prediction_result, status_code=200)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e.args[0]))
+    except ValueError as e:
+        logger.warning(f"Prediction input error: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error during prediction: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Error during prediction: {e}")
+
+
+@app.get("/models/{name}/status", response_model=ModelStatusResponse)
+async def get_named_model_status(name: str):
+    """
+    Returns the status of the named model, including accuracy and features.
+    """
+    try:
+        status = get_model_status(await run_in_threadpool(model_registry.get, name))
+        logger.info(f"Model '{name}' status requested: {status['status']}")
+        return JSONResponse(content=status, status_code=200)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e.args[0]))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error getting model status: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Error retrieving model status: {e}")
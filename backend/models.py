@@ -8,14 +8,67 @@ class PredictionResponse(BaseModel):
     prediction: str
     full_results: Dict[str, float]
 
+class BatchPredictionRequest(BaseModel):
+    records: Optional[List[Dict[str, Any]]] = None
+    columns: Optional[Dict[str, List[Any]]] = None
+
+class BatchRowError(BaseModel):
+    row: int
+    error: str
+
+class BatchPredictionResponse(BaseModel):
+    classes: List[str]
+    predictions: List[Optional[str]]
+    probabilities: List[Optional[List[float]]]
+    errors: List[BatchRowError]
+
+class CrossValidationResult(BaseModel):
+    folds: int
+    stratified: bool
+    fold_accuracies: List[float]
+    mean_accuracy: float
+    std_accuracy: float
+
 class TrainResponse(BaseModel):
     message: str
     accuracy: float
+    confusion_matrix: Optional[Dict[str, Dict[str, int]]] = None
+    class_metrics: Optional[Dict[str, Dict[str, float]]] = None
+    cross_validation: Optional[CrossValidationResult] = None
+    features: Dict[str, List[str]]
+    target_column: str
+
+class AppendResponse(BaseModel):
+    message: str
+    rows_added: int
+    accuracy: Optional[float]
     features: Dict[str, List[str]]
     target_column: str
 
+class TrainingJobResponse(BaseModel):
+    job_id: str
+    status: str
+    stage: Optional[str]
+    progress: float
+    rows: Optional[int]
+    result: Optional[TrainResponse]
+    error: Optional[str]
+    profile_path: Optional[str] = None
+
 class ModelStatusResponse(BaseModel):
     status: str
     accuracy: Optional[float]
     features: Optional[Dict[str, List[str]]]
     target_column: Optional[str]
+    memory: Optional[Dict[str, Optional[int]]] = None
+    prediction_cache: Optional[Dict[str, int]] = None
+    prediction_batching: Optional[Dict[str, Any]] = None
+    runtime: Optional[Dict[str, Any]] = None
+
+class ModelRegistryResponse(BaseModel):
+    models: List[str]
+    loaded: List[str]
+    memory_bytes: int
+    memory_budget_bytes: int
+    loads: int
+    evictions: int
@@ -0,0 +1,37 @@
+import re
+
+# Number literals as pandas parses them in a CSV file
+_NUMBER_PATTERN = re.compile(r"[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?")
+_INTEGER_PATTERN = re.compile(r"[+-]?\d+")
+# Spellings pandas parses as booleans
+_BOOLEANS = {"True": "True", "TRUE": "True", "true": "True", "False": "False", "FALSE": "False", "false": "False"}
+
+
+def canonical_value(text):
+    """
+    Get the string a value is counted as. Numbers get one form whatever their spelling or the dtype
+    their column was parsed with: integral numbers as integers ('3' for '3', '3.0' and '03'), others
+    in shortest float form ('2.5' for '2.50'). Booleans are 'True' and 'False', as pandas parses them.
+    Training data and prediction inputs both go through it, so they are compared in the same form.
+    Args:
+        text (str): The value as text.
+    Returns:
+        str: The canonical string of the value.
+    """
+    if _INTEGER_PATTERN.fullmatch(text):
+        return str(int(text))  # Exact, even for integer IDs beyond float precision
+    if _NUMBER_PATTERN.fullmatch(text):
+        number = float(text)
+        return str(int(number)) if number.is_integer() and abs(number) < 2 ** 53 else repr(number)
+    return _BOOLEANS.get(text, text)
+
+
+def canonical_strings(values):
+    """
+    Get the canonical string of every value of a sequence.
+    Args:
+        values: Values (list or np.ndarray), converted with str() first.
+    Returns:
+        list: The canonical strings, in order.
+    """
+    return [canonical_value(str(value)) for value in values]
@@ -0,0 +1,359 @@
+from naive_bayes_logic.canonical_values import canonical_value, canonical_strings
+from naive_bayes_logic.feature_hashing import FeatureHashing
+from naive_bayes_logic.numeric_bins import NumericBins, MISSING_BIN, INVALID_BIN
+from naive_bayes_logic.sparse_table import SparseTable
+from naive_bayes_logic.tools import Tools
+import numpy as np
+
+
+def _sparse_probabilities(count_table, denominators):
+    """
+    Divide the stored cells of a count table by the row count of their class, keeping the table sparse.
+    """
+    sparse = count_table if isinstance(count_table, SparseTable) else SparseTable.from_dense(count_table)
+    return sparse.with_data(sparse.data / denominators[sparse.indices])
+
+
+class CompiledModel:
+    """
+    Integer-encoded, log-space representation of a trained Naive Bayes model.
+    Each feature gets a value -> index vocabulary and a dense
+    (n_classes, n_values + 1) log-probability table, where the extra last
+    column holds the smoothing fallback used for values never seen in training.
+    Scoring a row is one gather per feature plus a sum.
+    Features whose values are seen with few of the classes (many classes, long-tailed
+    values) get a SparseTable of the cells that differ from the fallback instead; the
+    fallback of the other cells is added on the fly when scoring.
+    Numeric features are binned first and hashed features hashed first;
+    their vocabulary holds the bin or bucket labels.
+    """
+
+    def __init__(self, class_labels, log_priors, feature_names, vocabularies, log_tables, fallback_log_probs,
+                 numeric_bins=None, feature_hashing=None):
+        """
+        Initialize the compiled model from prebuilt arrays.
+        Args:
+            class_labels (list): Class names, in table row order.
+            log_priors (np.ndarray): Log prior per class, shape (n_classes,).
+            feature_names (list): Feature column names, in encoding order.
+            vocabularies (list): Per feature, a dict mapping a string value to its column index.
+            log_tables (list): Per feature, an array of shape (n_classes, n_values + 1),
+                or a SparseTable of shape (n_classes, n_values) without the fallback cells.
+            fallback_log_probs (np.ndarray): Log smoothing fallback per class, shape (n_classes,).
+            numeric_bins (NumericBins, optional): Bins of the numeric features; the others are categorical.
+            feature_hashing (FeatureHashing, optional): Buckets of the hashed categorical features.
+        """
+        self.class_labels = list(class_labels)
+        self.log_priors = log_priors
+        self.feature_names = list(feature_names)
+        self.vocabularies = vocabularies
+        self.log_tables = log_tables
+        self.fallback_log_probs = fallback_log_probs
+        self.numeric_bins = NumericBins() if numeric_bins is None else numeric_bins
+        self.feature_hashing = FeatureHashing() if feature_hashing is None else feature_hashing
+
+    @classmethod
+    def from_counts(cls, class_labels, class_counts, feature_names, vocabularies, count_tables, numeric_bins=None,
+                    feature_hashing=None):
+        """
+        Build a compiled model from raw per-(class, feature, value) counts.
+        Args:
+            class_labels (list): Class names, in table row order.
+            class_counts (np.ndarray): Number of training rows per class.
+            feature_names (list): Feature column names.
+            vocabularies (list): Per feature, a dict mapping a string value to its column index.
+            count_tables (list): Per feature, an int array of shape (n_classes, n_values), or a SparseTable.
+                Features with a sparse enough table get a sparse log table.
+            numeric_bins (NumericBins, optional): Bins of the numeric features.
+            feature_hashing (FeatureHashing, optional): Buckets of the hashed features.
+        Returns:
+            CompiledModel: The compiled model.
+        """
+        counts = np.asarray(class_counts, dtype=np.float64)
+        # Guard against classes with no rows so the division stays finite; their tables are all fallback anyway
+        denominators = np.maximum(counts, 1)
+        probability_tables = [_sparse_probabilities(table, denominators) if SparseTable.is_sparse(table)
+                              else SparseTable.as_dense(table).astype(np.float64) / denominators[:, None]
+                              for table in count_tables]
+        return cls._from_probabilities(class_labels, counts, feature_names,
+                                       [dict(vocabulary) for vocabulary in vocabularies], probability_tables,
+                                       numeric_bins, feature_hashing)
+
+    @classmethod
+    def _from_probabilities(cls, class_labels, class_counts, feature_names, vocabularies, probability_tables,
+                            numeric_bins=None, feature_hashing=None):
+        """
+        Turn conditional probability tables into log tables with the smoothing fallback applied.
+        """
+        with np.errstate(divide="ignore"):
+            # A class without training rows (e.g. in a cross-validation fold) can never be predicted
+            log_priors = np.log(class_counts / class_counts.sum())
+        # Smoothing fallback for values a class has not seen, as the model has always used: 1 / (class_count + 1)
+        fallback_log_probs = -np.log(class_counts + 1)
+
+        log_tables = [probabilities.with_data(np.log(probabilities.data)) if isinstance(probabilities, SparseTable)
+                      else cls._dense_log_table(probabilities, fallback_log_probs)
+                      for probabilities in probability_tables]
+        return cls(class_labels, log_priors, feature_names, vocabularies, log_tables, fallback_log_probs,
+                   numeric_bins, feature_hashing)
+
+    @staticmethod
+    def _dense_log_table(probabilities, fallback_log_probs):
+        """
+        Turn a dense conditional probability table into a log table with the fallback column appended.
+        """
+        table = np.empty((probabilities.shape[0], probabilities.shape[1] + 1), dtype=np.float64)
+        with np.errstate(divide="ignore"):
+            table[:, :-1] = np.log(probabilities)
+        # Zero probabilities fall back to the smoothing value, exactly like unseen values
+        table[:, :-1] = np.where(probabilities > 0, table[:, :-1], fallback_log_probs[:, None])
+        table[:, -1] = fallback_log_probs
+        return table
+
+    def refreshed(self, class_labels, class_counts, vocabularies, count_tables, touched_classes):
+        """
+        Return a copy of this model updated to new counts, where only the classes in
+        touched_classes (and the classes and values that did not exist before) changed.
+        Rows of untouched classes are copied as they are, with fallback values for new columns.
+        Sparse tables are recompiled whole, which costs as much as their stored cells.
+        Args:
+            class_labels (list): Class names; existing classes keep their position.
+            class_counts (np.ndarray): Number of training rows per class.
+            vocabularies (list): Per feature, the (possibly grown) value -> index dict.
+            count_tables (list): Per feature, an int array of shape (n_classes, n_values), or a SparseTable.
+            touched_classes (set): Indices of the classes whose counts changed.
+        Returns:
+            CompiledModel: The refreshed model.
+        """
+        counts = np.asarray(class_counts, dtype=np.float64)
+        fallback_log_probs = -np.log(counts + 1)
+        n_classes = len(class_labels)
+        rows = np.array(sorted(set(touched_classes) | set(range(len(self.class_labels), n_classes))), dtype=np.intp)
+
+        log_tables = []
+        for position, old_table in enumerate(self.log_tables):
+            count_table = count_tables[position]
+            if SparseTable.is_sparse(count_table):
+                probabilities = _sparse_probabilities(count_table, np.maximum(counts, 1))
+                log_tables.append(probabilities.with_data(np.log(probabilities.data)))
+                continue
+            count_table = SparseTable.as_dense(count_table)
+            if isinstance(old_table, SparseTable):
+                log_tables.append(self._dense_log_table(count_table / np.maximum(counts, 1)[:, None],
+                                                        fallback_log_probs))
+                continue
+            n_values = len(vocabularies[position])
+            table = np.empty((n_classes, n_values + 1), dtype=np.float64)
+            table[:] = fallback_log_probs[:, None]
+            old_classes, old_width = old_table.shape[0], old_table.shape[1] - 1
+            table[:old_classes, :old_width] = old_table[:, :-1]
+            if len(rows):
+                touched_counts = np.asarray(count_table[rows], dtype=np.float64)
+                with np.errstate(divide="ignore"):
+                    touched = np.log(touched_counts / np.maximum(counts, 1)[rows, None])
+                table[rows, :-1] = np.where(touched_counts > 0, touched, fallback_log_probs[rows, None])
+            log_tables.append(table)
+
+        with np.errstate(divide="ignore"):
+            # A class left without rows (e.g. after subtracting counts) can never be predicted
+            log_priors = np.log(counts / counts.sum())
+        return CompiledModel(class_labels, log_priors, self.feature_names,
+                             [dict(vocabulary) for vocabulary in vocabularies], log_tables, fallback_log_probs,
+                             self.numeric_bins, self.feature_hashing)
+
+    def get_value_key(self, column, value):
+        """
+        Get the vocabulary key of a single feature value: its canonical string, as the training values
+        were counted (so 1.0 and '1.0' find '1'), or its bin or bucket label for a numeric or hashed feature.
+        Args:
+            column (str): Feature name.
+            value: The value.
+        Returns:
+            str: The key to look up in the vocabulary of the feature, or None for a non-number in a numeric feature.
+        """
+        if column in self.numeric_bins:
+            return self.numeric_bins.get_label(column, value)
+        if column in self.feature_hashing:
+            return self.feature_hashing.get_label(column, value)
+        return canonical_value(str(value))
+
+    def encode(self, customer_values):
+        """
+        Encode a single record into one integer code per feature.
+        Unknown values map to the fallback column of their feature.
+        Args:
+            customer_values (dict): Feature name -> value.
+        Returns:
+            np.ndarray: Integer codes, shape (n_features,).
+        """
+        codes = np.empty(len(self.feature_names), dtype=np.intp)
+        for position, column in enumerate(self.feature_names):
+            vocabulary = self.vocabularies[position]
+            codes[position] = vocabulary.get(self.get_value_key(column, customer_values[column]), len(vocabulary))
+        return codes
+
+    def _encode_numeric_column(self, column, vocabulary, values):
+        """
+        Encode a numeric feature column through its bins: one searchsorted and one gather.
+        Non-numbers map to the fallback column, like unknown values; missing values to the 'nan' entry.
+        """
+        labels = self.numeric_bins.get_labels(column)
+        lookup = np.empty(len(labels) + 2, dtype=np.intp)
+        lookup[:len(labels)] = [vocabulary.get(label, len(vocabulary)) for label in labels]
+        lookup[INVALID_BIN] = len(vocabulary)
+        lookup[MISSING_BIN] = vocabulary.get("nan", len(vocabulary))
+        return lookup[self.numeric_bins.bin_indices(column, values)]
+
+    def encode_columns(self, columns):
+        """
+        Encode many records at once, one feature column at a time.
+        Each column is reduced to its unique values first, so the canonical
+        string and the vocabulary lookup run once per distinct value rather than once per row.
+        Category columns are encoded from their categories and integer codes,
+        numeric columns from their bins and hashed columns from their buckets.
+        Args:
+            columns (dict): Feature name -> sequence of values (list, np.ndarray or pd.Series).
+        Returns:
+            np.ndarray: Integer codes, shape (n_rows, n_features).
+        """
+        encoded = []
+        for position, column in enumerate(self.feature_names):
+            vocabulary = self.vocabularies[position]
+            if column in self.numeric_bins:
+                encoded.append(self._encode_numeric_column(column, vocabulary, columns[column]))
+                continue
+            if column in self.feature_hashing:
+                # The buckets are the vocabulary of a hashed feature, in order, so a bucket index is its code
+                encoded.append(self.feature_hashing.bucket_indices(column, columns[column]))
+                continue
+            if hasattr(columns[column], "cat"):
+                categories = canonical_strings(columns[column].cat.categories)
+                # Missing values have code -1, which picks the trailing 'nan' entry
+                category_codes = np.array([vocabulary.get(value, len(vocabulary)) for value in categories + ["nan"]],
+                                          dtype=np.intp)
+                encoded.append(category_codes[columns[column].cat.codes.to_numpy()])
+                continue
+            values = np.asarray(columns[column]).astype(str)
+            uniques, inverse = np.unique(values, return_inverse=True)
+            unique_codes = np.array([vocabulary.get(value, len(vocabulary)) for value in canonical_strings(uniques)],
+                                    dtype=np.intp)
+            encoded.append(unique_codes[inverse.reshape(-1)])
+        if not encoded:
+            return np.empty((0, 0), dtype=np.intp)
+        return np.column_stack(encoded)
+
+    def log_scores(self, codes):
+        """
+        Compute the unnormalized log score of every class.
+        Args:
+            codes (np.ndarray): Encoded rows, shape (n_features,) or (n_rows, n_features).
+        Returns:
+            np.ndarray: Log scores, shape (n_classes,) or (n_rows, n_classes).
+        """
+        codes = np.asarray(codes)
+        # Sparse tables add their fallback to every class up front, then the difference of their stored cells
+        n_sparse = sum(isinstance(table, SparseTable) for table in self.log_tables)
+        if codes.ndim == 1:
+            scores = self.log_priors.copy()
+            if n_sparse:
+                scores += n_sparse * self.fallback_log_probs
+            for position, table in enumerate(self.log_tables):
+                if isinstance(table, SparseTable):
+                    table.add_column(scores, codes[position], self.fallback_log_probs)
+                else:
+                    scores += table[:, codes[position]]
+            return scores
+
+        scores = np.repeat(self.log_priors[:, None], codes.shape[0], axis=1)
+        if n_sparse:
+            scores += n_sparse * self.fallback_log_probs[:, None]
+        for position, table in enumerate(self.log_tables):
+            if isinstance(table, SparseTable):
+                table.add_columns(scores, codes[:, position], self.fallback_log_probs)
+            else:
+                scores += np.take(table, codes[:, position], axis=1)
+        return scores.T
+
+    @staticmethod
+    def normalize(log_scores):
+        """
+        Convert log scores into posterior probabilities that sum to one.
+        Args:
+            log_scores (np.ndarray): Log scores, shape (n_classes,) or (n_rows, n_classes).
+        Returns:
+            np.ndarray: Posterior probabilities, same shape as the input.
+        """
+        shifted = np.exp(log_scores - log_scores.max(axis=-1, keepdims=True))
+        return shifted / shifted.sum(axis=-1, keepdims=True)
+
+    def predict(self, customer_values):
+        """
+        Predict the class of a single record.
+        Args:
+            customer_values (dict): Feature name -> value.
+        Returns:
+            dict: 'prediction' with the most probable class and 'full_results'
+                  with the posterior probability of every class.
+        """
+        return self.predict_codes(self.encode(customer_values))
+
+    def predict_codes(self, codes):
+        """
+        Predict the class of a single record that has already been encoded.
+        Args:
+            codes (np.ndarray): Integer codes, shape (n_features,).
+        Returns:
+            dict: 'prediction' with the most probable class and 'full_results'
+                  with the posterior probability of every class.
+        """
+        scores = self.log_scores(codes)
+        posteriors = self.normalize(scores)
+        return {
+            "prediction": self.class_labels[int(np.argmax(scores))],
+            "full_results": {label: float(p) for label, p in zip(self.class_labels, posteriors)}
+        }
+
+    def unknown_mask(self, codes):
+        """
+        Flag the encoded values that were never seen in training.
+        Args:
+            codes (np.ndarray): Encoded rows, shape (n_rows, n_features).
+        Returns:
+            np.ndarray: Boolean mask of the same shape, True where the value is unknown.
+        """
+        return codes == np.array([len(vocabulary) for vocabulary in self.vocabularies], dtype=np.intp)
+
+    def predict_batch(self, columns=None, codes=None):
+        """
+        Predict the class of many records in one vectorized call.
+        Args:
+            columns (dict, optional): Feature name -> sequence of values, all of the same length.
+            codes (np.ndarray, optional): Already encoded rows, shape (n_rows, n_features).
+        Returns:
+            tuple: (list of predicted class labels, np.ndarray of posteriors with shape (n_rows, n_classes)).
+        """
+        if codes is None:
+            codes = self.encode_columns(columns)
+        scores = self.log_scores(codes)
+        predicted = np.argmax(scores, axis=1)
+        return [self.class_labels[index] for index in predicted], self.normalize(scores)
+
+    def memory_usage(self):
+        """
+        Estimate the memory held by the compiled model.
+        Returns:
+            int: Approximate size in bytes of the tables, priors and vocabularies.
+        """
+        arrays = self.log_tables + [self.log_priors, self.fallback_log_probs]
+        return sum(array.nbytes for array in arrays) + Tools.get_vocabularies_size(self.vocabularies)
+
+    def get_features(self):
+        """
+        Get the values seen in training for every feature.
+        Numeric and hashed features take any value, so they are listed without values (a free-form input).
+        Returns:
+            dict: {feature_column: list of string values}, in vocabulary order.
+        """
+        return {column: [] if column in self.numeric_bins or column in self.feature_hashing
+                else list(self.vocabularies[position])
+                for position, column in enumerate(self.feature_names)}
@@ -0,0 +1,442 @@
+from naive_bayes_logic.compiled_model import CompiledModel
+from naive_bayes_logic.feature_hashing import FeatureHashing
+from naive_bayes_logic.numeric_bins import NumericBins
+from naive_bayes_logic.sparse_table import SparseTable
+from naive_bayes_logic.tools import Tools
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import numpy as np
+import pandas as pd  # Added for type hinting and potential DataFrame operations
+
+# Chunk handed to forked counting workers; they inherit it instead of receiving a pickled copy
+_shared_chunk = {}
+
+
+def _factorize_as_strings(series):
+    """
+    Factorize a column, comparing its values as strings (the same representation as astype(str)).
+    The hashing runs on the raw values; only the uniques are converted to strings.
+    Args:
+        series (pd.Series): Column to factorize.
+    Returns:
+        tuple: (np.ndarray of codes, one per row; list of unique string values).
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return _factorize_categorical(series)
+    values = series.to_numpy() if series.dtype.kind == "f" else series
+    if isinstance(values, np.ndarray):
+        # Hash floats by their bits: equality would merge 0.0 and -0.0, whose strings differ
+        bits_dtype = np.dtype(f"i{values.dtype.itemsize}")
+        codes, uniques = pd.factorize(values.view(bits_dtype), use_na_sentinel=False)
+        uniques = uniques.view(values.dtype)
+    else:
+        codes, uniques = pd.factorize(values, use_na_sentinel=False)
+    strings = np.asarray(uniques, dtype=object).astype(str)
+    if len(set(strings.tolist())) < len(strings):
+        # Distinct raw values with the same string form (e.g. 1 and "1") must share a code
+        string_codes, strings = pd.factorize(strings)
+        codes = string_codes[codes]
+    return codes, list(strings)
+
+
+def _factorize_categorical(series):
+    """
+    Factorize a category column from its integer codes, without hashing any row.
+    Only the categories are converted to strings; unused categories are dropped
+    and missing values become 'nan', as astype(str) would make them.
+    Args:
+        series (pd.Series): Column of category dtype.
+    Returns:
+        tuple: (np.ndarray of codes, one per row; list of unique string values).
+    """
+    categories = np.asarray(series.cat.categories, dtype=object).astype(str)
+    codes = series.cat.codes.to_numpy().astype(np.intp)
+    codes[codes < 0] = len(categories)  # Missing values
+    categories = np.append(categories, "nan")
+    used = np.flatnonzero(np.bincount(codes, minlength=len(categories)))
+    remap = np.empty(len(categories), dtype=np.intp)
+    remap[used] = np.arange(len(used))
+    strings, string_codes = np.unique(categories[used], return_inverse=True)
+    if len(strings) == len(used):
+        # Categories are distinct, keep them in order of their codes
+        return remap[codes], categories[used].tolist()
+    # Distinct categories with the same string form (e.g. 1 and "1") must share a code
+    return string_codes.reshape(-1)[remap[codes]], strings.tolist()
+
+
+def _count_column(series, class_codes, n_classes):
+    """
+    Count one feature column per class: one factorize and one bincount.
+    Args:
+        series (pd.Series): Feature values.
+        class_codes (np.ndarray): Class code of every row.
+        n_classes (int): Number of classes.
+    Returns:
+        tuple: (list of unique string values, int64 array of shape (n_classes, n_uniques)).
+    """
+    codes, uniques = _factorize_as_strings(series)
+    n_uniques = len(uniques)
+    table = np.bincount(class_codes * n_uniques + codes, minlength=n_classes * n_uniques)
+    return uniques, table.reshape(n_classes, n_uniques).astype(np.int64, copy=False)
+
+
+def _count_shared_column(column):
+    """
+    Worker entry point: count a column of the chunk inherited from the parent process.
+    """
+    return _count_column(_shared_chunk["frame"][column], _shared_chunk["class_codes"], _shared_chunk["n_classes"])
+
+
+class CountAccumulator:
+    """
+    Accumulates the per-(class, feature, value) counts a Naive Bayes model needs,
+    one dataframe chunk at a time. Memory depends on the vocabulary sizes only,
+    never on the number of rows that have been added.
+    Feature columns are independent, so large chunks are counted column-parallel
+    across forked worker processes.
+    Numeric feature columns (converted to floats at ingest) are counted per quantile bin,
+    and categorical columns above the hashing threshold per hash bucket. Both are decided on the first chunk (unless
+    they are given) and kept for every later chunk, so the columns of all chunks share
+    one vocabulary.
+    """
+
+    # Smallest chunk (rows x feature columns) worth spreading across worker processes
+    PARALLEL_MIN_CELLS = 2_000_000
+
+    def __init__(self, workers=1, numeric_bins=None, feature_hashing=None, hash_threshold=0):
+        """
+        Initialize an empty accumulator. Feature and class vocabularies grow as chunks are added.
+        Args:
+            workers (int): Number of processes used to count large chunks. 1 counts in-process.
+            numeric_bins (NumericBins, optional): Bins of the numeric columns, e.g. fitted on the whole
+                dataset; by default they are fitted on the first chunk.
+            feature_hashing (FeatureHashing, optional): Hashed columns; by default the categorical columns
+                with more than hash_threshold distinct values in the first chunk.
+            hash_threshold (int): Cardinality above which a categorical column is hashed; 0 hashes no column.
+        """
+        self.workers = workers
+        self.numeric_bins = numeric_bins
+        self.feature_hashing = feature_hashing
+        self.hash_threshold = hash_threshold
+        self.target_column = None
+        self.feature_names = None
+        self.class_labels = []
+        self.class_index = {}
+        self.class_counts = np.zeros(0, dtype=np.int64)
+        self.vocabularies = []
+        self.counts = []  # One (n_classes, n_values) int64 array (or SparseTable, once compacted) per feature
+
+    @classmethod
+    def from_arrays(cls, target_column, feature_names, class_labels, class_counts, vocabularies, counts, workers=1,
+                    numeric_bins=None, feature_hashing=None):
+        """
+        Rebuild an accumulator from previously saved counts.
+        Read-only (e.g. memory-mapped) arrays are fine: add_frame is only ever run on a copy.
+        Args:
+            target_column (str): Name of the target column.
+            feature_names (list): Feature column names.
+            class_labels (list): Class names, in table row order.
+            class_counts (np.ndarray): Number of rows per class.
+            vocabularies (list): Per feature, a dict mapping a string value to its column index.
+            counts (list): Per feature, an int array of shape (n_classes, n_values), or a SparseTable.
+            workers (int): Number of processes used to count large chunks.
+            numeric_bins (NumericBins, optional): Bins of the numeric columns.
+            feature_hashing (FeatureHashing, optional): Hashed columns.
+        Returns:
+            CountAccumulator: The rebuilt accumulator.
+        """
+        accumulator = cls(workers, NumericBins() if numeric_bins is None else numeric_bins,
+                          FeatureHashing() if feature_hashing is None else feature_hashing)
+        accumulator.target_column = target_column
+        accumulator.feature_names = list(feature_names)
+        accumulator.class_labels = list(class_labels)
+        accumulator.class_index = {label: index for index, label in enumerate(accumulator.class_labels)}
+        accumulator.class_counts = class_counts
+        accumulator.vocabularies = vocabularies
+        accumulator.counts = counts
+        return accumulator
+
+    def add_frame(self, df):
+        """
+        Add the counts of a cleaned dataframe chunk. The last column is the target.
+        Rows with a missing target are ignored, as they would be by a groupby.
+        Args:
+            df (pd.DataFrame): A chunk of cleaned data, with the same columns as the previous chunks
+                (in any order, as long as the target stays last).
+        Raises:
+            ValueError: If the columns do not match the ones already accumulated.
+        Returns:
+            set: Codes of the classes whose counts changed.
+        """
+        if df.empty:
+            return set()
+        if self.feature_names is None:
+            self.target_column = Tools.get_the_target_column(df)
+            self.feature_names = [col for col in df.columns if col != self.target_column]
+            labelled = df[df[self.target_column].notna()]
+            if self.numeric_bins is None:
+                self.numeric_bins = NumericBins.fit(labelled, self.feature_names)
+            if self.feature_hashing is None:
+                self.feature_hashing = FeatureHashing.fit(
+                    labelled, [column for column in self.feature_names if column not in self.numeric_bins],
+                    self.hash_threshold)
+            self.vocabularies = [self._initial_vocabulary(column) for column in self.feature_names]
+            self.counts = [np.zeros((0, len(vocabulary)), dtype=np.int64) for vocabulary in self.vocabularies]
+        elif (Tools.get_the_target_column(df) != self.target_column
+              or set(df.columns) != set(self.feature_names) | {self.target_column}):
+            raise ValueError(
+                f"Columns do not match the trained model. Expected features {self.feature_names} "
+                f"and target '{self.target_column}' as the last column.")
+
+        df = df[df[self.target_column].notna()]
+        if df.empty:
+            return set()
+        transformed = {column: transform.to_categorical(column, df[column]) for column in self.feature_names
+                       for transform in (self.numeric_bins, self.feature_hashing) if column in transform}
+        if transformed:
+            df = df.assign(**transformed)
+
+        codes, uniques = _factorize_as_strings(df[self.target_column])
+        class_codes = self._merge_uniques(uniques, self.class_index, self.class_labels)[codes]
+        n_classes = len(self.class_labels)
+        self.class_counts = self._grow(self.class_counts, (n_classes,))
+        self.class_counts += np.bincount(class_codes, minlength=n_classes)
+
+        for position, (uniques, local_table) in enumerate(self._count_features(df, class_codes, n_classes)):
+            value_codes = self._merge_uniques(uniques, self.vocabularies[position])
+            self._add_table(position, None, value_codes, local_table)
+
+        return set(np.unique(class_codes).tolist())
+
+    def _add_table(self, position, class_codes, value_codes, table):
+        """
+        Add a count table over some of the classes and values to the counts of a feature,
+        growing them to the current classes and vocabulary. A SparseTable stays sparse unless
+        it gets too dense: only its stored cells and the added ones are touched.
+        Args:
+            position (int): Feature position.
+            class_codes (np.ndarray): Class code of every row of table, or None if its rows are all the classes.
+            value_codes (np.ndarray): Distinct value code of every column of table.
+            table (np.ndarray or SparseTable): The counts to add.
+        """
+        shape = (len(self.class_labels), len(self.vocabularies[position]))
+        current = self.counts[position]
+        if isinstance(current, SparseTable):
+            classes, values, counts = SparseTable.cells(table)
+            current = current.added(shape, classes if class_codes is None else class_codes[classes],
+                                    value_codes[values], counts)
+            self.counts[position] = current if SparseTable.is_sparse(current) else current.to_dense()
+            return
+        current = self._grow(current, shape)
+        # The codes are distinct, so the fancy-indexed add has no repeated cells
+        if class_codes is None:
+            current[:, value_codes] += SparseTable.as_dense(table)
+        else:
+            current[np.ix_(class_codes, value_codes)] += SparseTable.as_dense(table)
+        self.counts[position] = current
+
+    def _initial_vocabulary(self, column):
+        """
+        Get the vocabulary a feature starts with: every bin or bucket of a numeric or hashed column,
+        in order, even if no row falls into it yet, and nothing for a categorical column.
+        """
+        for transform in (self.numeric_bins, self.feature_hashing):
+            if column in transform:
+                return {label: index for index, label in enumerate(transform.get_labels(column))}
+        return {}
+
+    def _count_features(self, df, class_codes, n_classes):
+        """
+        Count every feature column of a chunk, in parallel when the chunk is large enough.
+        Args:
+            df (pd.DataFrame): The chunk.
+            class_codes (np.ndarray): Class code of every row.
+            n_classes (int): Number of classes.
+        Returns:
+            list: (uniques, count table) for each feature, in feature order.
+        """
+        workers = min(self.workers, len(self.feature_names))
+        parallel = (workers > 1 and len(df) * len(self.feature_names) >= self.PARALLEL_MIN_CELLS
+                    and "fork" in multiprocessing.get_all_start_methods())
+        if not parallel:
+            return [_count_column(df[column], class_codes, n_classes) for column in self.feature_names]
+
+        _shared_chunk.update(frame=df, class_codes=class_codes, n_classes=n_classes)
+        try:
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("fork")) as pool:
+                return list(pool.map(_count_shared_column, self.feature_names))
+        finally:
+            _shared_chunk.clear()
+
+    @staticmethod
+    def _merge_uniques(uniques, vocabulary, labels=None):
+        """
+        Map the unique values of a chunk to vocabulary codes, adding unseen values to the vocabulary.
+        Args:
+            uniques (list): Distinct string values.
+            vocabulary (dict): Value -> code mapping, extended in place.
+            labels (list, optional): Code -> value list, extended in place when given.
+        Returns:
+            np.ndarray: The vocabulary code of every unique value.
+        """
+        codes = np.empty(len(uniques), dtype=np.intp)
+        for index, value in enumerate(uniques):
+            code = vocabulary.get(value)
+            if code is None:
+                code = vocabulary[value] = len(vocabulary)
+                if labels is not None:
+                    labels.append(value)
+            codes[index] = code
+        return codes
+
+    @staticmethod
+    def _grow(array, shape):
+        """
+        Zero-pad an array up to the given shape, keeping the existing counts in place.
+        """
+        if array.shape == shape:
+            return array
+        grown = np.zeros(shape, dtype=array.dtype)
+        grown[tuple(slice(0, size) for size in array.shape)] = array
+        return grown
+
+    def copy(self):
+        """
+        Get an independent copy of the accumulated counts.
+        SparseTables are never changed in place (adding counts builds a new one), so they are shared.
+        Returns:
+            CountAccumulator: The copy.
+        """
+        duplicate = CountAccumulator(self.workers, self.numeric_bins, self.feature_hashing, self.hash_threshold)
+        duplicate.target_column = self.target_column
+        duplicate.feature_names = None if self.feature_names is None else list(self.feature_names)
+        duplicate.class_labels = list(self.class_labels)
+        duplicate.class_index = dict(self.class_index)
+        duplicate.class_counts = self.class_counts.copy()
+        duplicate.vocabularies = [dict(vocabulary) for vocabulary in self.vocabularies]
+        duplicate.counts = [table if isinstance(table, SparseTable) else table.copy() for table in self.counts]
+        return duplicate
+
+    def merge(self, other):
+        """
+        Add the counts of another accumulator, e.g. one filled from a different part of the data.
+        Values and classes it has that this one lacks are added.
+        Args:
+            other (CountAccumulator): Counts over the same feature columns, in the same order.
+        Raises:
+            ValueError: If the columns, the numeric bins or the hashed columns do not match.
+        Returns:
+            set: Codes of the classes whose counts changed.
+        """
+        if other.feature_names is None:
+            return set()
+        if self.feature_names is None:
+            self.numeric_bins = other.numeric_bins
+            self.feature_hashing = other.feature_hashing
+            self.target_column = other.target_column
+            self.feature_names = list(other.feature_names)
+            self.vocabularies = [{} for _ in self.feature_names]
+            self.counts = [np.zeros((0, 0), dtype=np.int64) for _ in self.feature_names]
+        elif other.target_column != self.target_column or other.feature_names != self.feature_names:
+            raise ValueError("Cannot merge counts over different columns.")
+        elif other.numeric_bins != self.numeric_bins:
+            raise ValueError("Cannot merge counts of numeric columns binned differently.")
+        elif other.feature_hashing != self.feature_hashing:
+            raise ValueError("Cannot merge counts of columns hashed differently.")
+
+        class_codes = self._merge_uniques(other.class_labels, self.class_index, self.class_labels)
+        self.class_counts = self._grow(self.class_counts, (len(self.class_labels),))
+        self.class_counts[class_codes] += other.class_counts
+        for position, vocabulary in enumerate(self.vocabularies):
+            value_codes = self._merge_uniques(list(other.vocabularies[position]), vocabulary)
+            self._add_table(position, class_codes, value_codes, other.counts[position])
+        return set(class_codes.tolist())
+
+    def subtract(self, other):
+        """
+        Get the counts of this accumulator without those of another one that was merged into it.
+        The vocabularies are kept whole, so values only the other one saw are left with zero counts.
+        Args:
+            other (CountAccumulator): Counts previously merged into this accumulator.
+        Returns:
+            CountAccumulator: A new accumulator; this one is left untouched.
+        """
+        difference = self.copy()
+        class_codes = np.array([self.class_index[label] for label in other.class_labels], dtype=np.intp)
+        difference.class_counts[class_codes] -= other.class_counts
+        for position, vocabulary in enumerate(self.vocabularies):
+            value_codes = np.array([vocabulary[value] for value in other.vocabularies[position]], dtype=np.intp)
+            other_table = other.counts[position]
+            difference._add_table(position, class_codes, value_codes,
+                                  other_table.with_data(-other_table.data) if isinstance(other_table, SparseTable)
+                                  else -other_table)
+        return difference
+
+    def get_features(self):
+        """
+        Get the values seen for every feature, in the order they were first counted.
+        Numeric and hashed features take any value, so they are listed without values (a free-form input).
+        Returns:
+            dict: {feature_column: list of string values}.
+        """
+        return {column: [] if column in self.numeric_bins or column in self.feature_hashing
+                else list(self.vocabularies[position])
+                for position, column in enumerate(self.feature_names)}
+
+    def get_percentage_of_values(self):
+        """
+        Get the conditional probabilities in the nested-dictionary layout of DataAnalyzer.
+        Returns:
+            dict: {class_label: {feature_column: pd.Series of value percentages}}.
+        """
+        percentage_of_values = {}
+        for row, class_label in enumerate(self.class_labels):
+            percentage_of_values[class_label] = {}
+            for position, column in enumerate(self.feature_names):
+                index = pd.Index(list(self.vocabularies[position]), dtype=object)
+                percentage_of_values[class_label][column] = pd.Series(
+                    SparseTable.as_dense(self.counts[position])[row] / self.class_counts[row], index=index)
+        return percentage_of_values
+
+    def memory_usage(self):
+        """
+        Estimate the memory held by the accumulated counts.
+        Returns:
+            int: Approximate size in bytes of the count tables and vocabularies.
+        """
+        return (sum(table.nbytes for table in self.counts) + self.class_counts.nbytes
+                + Tools.get_vocabularies_size(self.vocabularies))
+
+    def compact(self):
+        """
+        Store the count tables that are mostly zeros as SparseTables, as the compiled model stores
+        their log tables. Training counts on dense tables and compacts them once done; later chunks
+        are added to the SparseTables directly.
+        """
+        self.counts = [SparseTable.from_dense(table)
+                       if not isinstance(table, SparseTable) and SparseTable.is_sparse(table) else table
+                       for table in self.counts]
+
+    def compile(self):
+        """
+        Build the compiled scoring model from the accumulated counts.
+        Returns:
+            CompiledModel: The compiled model.
+        """
+        if not self.class_labels:
+            raise ValueError("Cannot compile a model without any training rows.")
+        return CompiledModel.from_counts(self.class_labels, self.class_counts, self.feature_names,
+                                         self.vocabularies, self.counts, self.numeric_bins, self.feature_hashing)
+
+    def refresh(self, compiled_model, touched_classes):
+        """
+        Bring a compiled model up to date after new chunks were added, recomputing
+        only the table rows of the classes whose counts changed.
+        Args:
+            compiled_model (CompiledModel): The model compiled before the new chunks were added.
+            touched_classes (set): Class codes returned by add_frame.
+        Returns:
+            CompiledModel: A new compiled model; the given one is left untouched.
+        """
+        return compiled_model.refreshed(self.class_labels, self.class_counts, self.vocabularies,
+                                        self.counts, touched_classes)
@@ -0,0 +1,193 @@
+from naive_bayes_logic.compiled_model import CompiledModel
+from naive_bayes_logic.count_accumulator import CountAccumulator
+from naive_bayes_logic.feature_hashing import FeatureHashing
+from naive_bayes_logic.model_testing import ModelTesting
+from naive_bayes_logic.numeric_bins import NumericBins
+from naive_bayes_logic.receiving_information import ReceivingInformation
+from naive_bayes_logic.sparse_table import SparseTable
+from naive_bayes_logic.tools import Tools
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import numpy as np
+import pandas as pd  # Added for type hinting and potential DataFrame operations
+
+# State handed to forked fold workers; they inherit it instead of receiving a pickled copy
+_shared_folds = {}
+
+
+def _evaluate_shared_fold(fold):
+    """
+    Worker entry point: evaluate a fold with the state inherited from the parent process.
+    """
+    return CrossValidation.evaluate_fold(_shared_folds["df"], _shared_folds["fold_ids"], _shared_folds["total"],
+                                         _shared_folds["fold_counts"], fold, _shared_folds["numeric_columns"])
+
+
+class CrossValidation:
+    """
+    K-fold cross-validation of the Naive Bayes model.
+    Every fold is counted once; the model of fold k is compiled from the total counts
+    minus the counts of fold k, so the categorical columns are never recounted per fold.
+    Numeric columns are binned on the training rows of each fold only, so the held-out rows
+    never shape the bins; they are counted per fold, with the bins of the fold.
+    The hashed columns are chosen on the cardinality of the whole dataset, which involves no labels.
+    The folds are evaluated in parallel across forked worker processes.
+    """
+
+    def __init__(self, df, folds=5, stratified=False, seed=ReceivingInformation.SPLIT_SEED, workers=1,
+                 hash_threshold=0):
+        """
+        Initialize the cross-validation.
+        Args:
+            df (pd.DataFrame): The cleaned dataset, with the target as the last column.
+            folds (int): Number of folds, at least 2.
+            stratified (bool): Keep the class proportions of the dataset in every fold.
+            seed (int): Seed of the random fold assignment.
+            workers (int): Number of processes the folds are evaluated on.
+            hash_threshold (int): Cardinality above which a categorical column is hashed; 0 hashes no column.
+        Raises:
+            ValueError: If there are fewer than 2 folds or fewer rows than folds.
+        """
+        if folds < 2:
+            raise ValueError("Cross-validation needs at least 2 folds.")
+        if len(df) < folds:
+            raise ValueError(f"Cannot split {len(df)} rows into {folds} folds.")
+        self.df = df
+        self.folds = folds
+        self.stratified = stratified
+        self.seed = seed
+        self.workers = workers
+        self.hash_threshold = hash_threshold
+        self.fold_accuracies = []
+
+    def assign_folds(self):
+        """
+        Assign every row to a fold at random. With stratification the rows of each class
+        are dealt out round-robin, so every fold gets its share of every class.
+        Returns:
+            np.ndarray: Fold index of every row.
+        """
+        n_rows = len(self.df)
+        order = np.random.default_rng(self.seed).permutation(n_rows)
+        fold_ids = np.empty(n_rows, dtype=np.intp)
+        if not self.stratified:
+            fold_ids[order] = np.arange(n_rows) % self.folds
+            return fold_ids
+
+        class_codes, _ = pd.factorize(self.df[Tools.get_the_target_column(self.df)], use_na_sentinel=False)
+        grouped = order[np.argsort(class_codes[order], kind="stable")]
+        group_codes = class_codes[grouped]
+        # Position of every row within its class group
+        group_starts = np.flatnonzero(np.r_[True, group_codes[1:] != group_codes[:-1]])
+        group_sizes = np.diff(np.r_[group_starts, n_rows])
+        rank = np.arange(n_rows) - np.repeat(group_starts, group_sizes)
+        fold_ids[grouped] = rank % self.folds
+        return fold_ids
+
+    @staticmethod
+    def evaluate_fold(df, fold_ids, total, fold_counts, fold, numeric_columns=()):
+        """
+        Evaluate one fold: compile the model of the other folds and score the rows of this one.
+        Args:
+            df (pd.DataFrame): The dataset.
+            fold_ids (np.ndarray): Fold index of every row.
+            total (CountAccumulator): Counts of all folds, over the columns that are not numeric.
+            fold_counts (list): Counts of each fold, over the same columns.
+            fold (int): The fold to evaluate.
+            numeric_columns (list): Numeric feature columns, binned and counted on the other folds' rows.
+        Returns:
+            float: Accuracy percentage on the fold.
+        """
+        counts = total.subtract(fold_counts[fold])
+        if numeric_columns:
+            target_column = Tools.get_the_target_column(df)
+            training = df[fold_ids != fold]
+            numeric_counts = CountAccumulator(numeric_bins=NumericBins.fit(
+                training[training[target_column].notna()], numeric_columns))
+            numeric_counts.add_frame(training[list(numeric_columns) + [target_column]])
+            compiled_model = CrossValidation._compile_together(counts, numeric_counts)
+        else:
+            compiled_model = counts.compile()
+        examination = ModelTesting(df[fold_ids == fold], compiled_model)
+        examination.evaluate_model_accuracy()
+        return examination.get_model_accuracy()
+
+    @staticmethod
+    def _compile_together(counts, numeric_counts):
+        """
+        Compile one model from the counts of the categorical columns and those of the numeric columns,
+        both over the same rows. The numeric tables are aligned on the classes of the categorical counts,
+        which hold every class of the dataset.
+        """
+        rows = np.array([numeric_counts.class_index.get(label, -1) for label in counts.class_labels], dtype=np.intp)
+        numeric_tables = []
+        for table in numeric_counts.counts:
+            table = SparseTable.as_dense(table)
+            aligned = np.zeros((len(rows), table.shape[1]), dtype=table.dtype)
+            aligned[rows >= 0] = table[rows[rows >= 0]]
+            numeric_tables.append(aligned)
+        return CompiledModel.from_counts(counts.class_labels, counts.class_counts,
+                                         counts.feature_names + numeric_counts.feature_names,
+                                         counts.vocabularies + numeric_counts.vocabularies,
+                                         counts.counts + numeric_tables, numeric_counts.numeric_bins,
+                                         counts.feature_hashing)
+
+    def run(self):
+        """
+        Count the folds and evaluate each of them.
+        """
+        fold_ids = self.assign_folds()
+        target_column = Tools.get_the_target_column(self.df)
+        labelled = self.df[self.df[target_column].notna()]
+        feature_names = [column for column in self.df.columns if column != target_column]
+        # Numeric columns (converted to floats at ingest) are binned per fold, in evaluate_fold
+        numeric_columns = [column for column in feature_names if self.df[column].dtype.kind == "f"]
+        categorical_columns = [column for column in feature_names if column not in numeric_columns]
+        # Hash the columns once for the whole dataset, so the fold counts can be merged and subtracted
+        feature_hashing = FeatureHashing.fit(labelled, categorical_columns, self.hash_threshold)
+        categorical_df = self.df[categorical_columns + [target_column]]
+        fold_counts = []
+        total = CountAccumulator(self.workers, NumericBins(), feature_hashing)
+        for fold in range(self.folds):
+            counts = CountAccumulator(self.workers, NumericBins(), feature_hashing)
+            counts.add_frame(categorical_df[fold_ids == fold])
+            fold_counts.append(counts)
+            total.merge(counts)
+
+        workers = min(self.workers, self.folds)
+        if workers <= 1 or "fork" not in multiprocessing.get_all_start_methods():
+            self.fold_accuracies = [self.evaluate_fold(self.df, fold_ids, total, fold_counts, fold, numeric_columns)
+                                    for fold in range(self.folds)]
+            return
+
+        _shared_folds.update(df=self.df, fold_ids=fold_ids, total=total, fold_counts=fold_counts,
+                             numeric_columns=numeric_columns)
+        try:
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("fork")) as pool:
+                self.fold_accuracies = list(pool.map(_evaluate_shared_fold, range(self.folds)))
+        finally:
+            _shared_folds.clear()
+
+    def get_fold_accuracies(self):
+        """
+        Get the accuracy of every fold.
+        Returns:
+            list: Accuracy percentages, in fold order.
+        """
+        return self.fold_accuracies
+
+    def get_mean_accuracy(self):
+        """
+        Get the mean accuracy over the folds.
+        Returns:
+            float: Accuracy percentage.
+        """
+        return float(np.mean(self.fold_accuracies))
+
+    def get_std_accuracy(self):
+        """
+        Get the standard deviation of the accuracy over the folds.
+        Returns:
+            float: Standard deviation, in percentage points.
+        """
+        return float(np.std(self.fold_accuracies))
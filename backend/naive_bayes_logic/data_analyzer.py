@@ -1,3 +1,4 @@
+from naive_bayes_logic.count_accumulator import CountAccumulator
 from naive_bayes_logic.tools import Tools
 import pandas as pd  # Added for type hinting and potential DataFrame operations
 
@@ -8,50 +9,52 @@ class DataAnalyzer:
     of feature values per class label for a Naive Bayes classifier.
     """
 
-    def __init__(self, train_df, info_df):
+    def __init__(self, train_df, info_df, workers=1, hash_threshold=0):
         """
         Initialize with training data and information dataframe.
         Args:
             train_df (pd.DataFrame): The training dataframe.
             info_df (pd.DataFrame): Dataframe containing feature information.
+            workers (int): Number of processes the feature columns are counted on.
+            hash_threshold (int): Cardinality above which a categorical column is hashed; 0 hashes no column.
         """
         self.train_df = train_df
         self.info_df = info_df
+        self.workers = workers
+        self.hash_threshold = hash_threshold
         self.percentage_of_values = {}
+        self.counts = None  # CountAccumulator, built by trainer()
 
     def trainer(self):
         """
-        Calculate the percentage of each feature value per class.
-        Stores the results in self.percentage_of_values as a nested dictionary:
-        {class_label: {feature_column: pd.Series of value percentages}}.
+        Count each feature value per class. The raw counts are kept in self.counts
+        (a CountAccumulator), so the model can be updated later without retraining;
+        the percentages are derived from them on demand.
         """
         target_col = Tools.get_the_target_column(self.train_df)
         # Exclude the target column from feature columns
         feature_cols = [col for col in self.info_df.columns if col != target_col]
 
-        # Collect all unique values for each feature across the entire training set
-        all_unique_values = {col: self.train_df[col].astype(str).unique() for col in feature_cols}
-
-        grouped = self.train_df.groupby(target_col)
-
-        for class_name, group in grouped:
-            self.percentage_of_values[class_name] = {}
-            for col in feature_cols:
-                # Convert column to string type before value_counts to ensure consistency
-                counts = group[col].astype(str).value_counts()
-
-                # Reindex with all possible unique values for the feature, filling missing with 0
-                # This ensures that if a value doesn't appear in a specific class group,
-                # it still has an entry with count 0, which is important for smoothing later.
-                reindexed = counts.reindex(all_unique_values[col], fill_value=0)
-
-                # Dividing each value by the frequency of the class as a whole
-                self.percentage_of_values[class_name][col] = reindexed / group.shape[0]
+        self.counts = CountAccumulator(self.workers, hash_threshold=self.hash_threshold)
+        self.counts.add_frame(self.train_df[feature_cols + [target_col]])
+        self.percentage_of_values = {}
 
     def get_percentage_of_values(self):
         """
-        Get the computed percentages of feature values per class.
+        Get the computed percentages of feature values per class, as a nested dictionary:
+        {class_label: {feature_column: pd.Series of value percentages}}.
         Returns:
             dict: Nested dictionary of probabilities.
         """
+        if not self.percentage_of_values and self.counts is not None and self.counts.class_labels:
+            # Dividing each value count by the frequency of the class as a whole
+            self.percentage_of_values = self.counts.get_percentage_of_values()
         return self.percentage_of_values
+
+    def get_counts(self):
+        """
+        Get the raw per-(class, feature, value) counts behind the percentages.
+        Returns:
+            CountAccumulator: The accumulated counts, or None before trainer() ran.
+        """
+        return self.counts
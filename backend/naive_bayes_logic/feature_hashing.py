@@ -0,0 +1,121 @@
+from naive_bayes_logic.canonical_values import canonical_value
+import zlib
+import numpy as np
+
+
+def _hash_buckets(strings, n_buckets):
+    """
+    Hash string values into buckets with CRC32, which unlike hash() is the same in every process.
+    The values are hashed in canonical form, so a value lands in the same bucket however it is spelled.
+    """
+    return np.fromiter((zlib.crc32(canonical_value(value).encode("utf-8")) % n_buckets for value in strings),
+                       dtype=np.intp, count=len(strings))
+
+
+class FeatureHashing:
+    """
+    Hashed representation of the very high-cardinality categorical columns of a model (IDs, SKUs, free-form codes).
+    The values of a hashed column are hashed into a fixed number of buckets and counted per bucket,
+    so its tables are sized by the bucket count, not by the number of distinct values. Values that
+    share a bucket share their counts, and a value never seen in training still gets the counts of
+    its bucket. The buckets are the vocabulary of the column, in bucket order, so a bucket index is
+    also its code. Scoring only needs FeatureHashing and NumPy.
+    """
+
+    # Number of buckets of a hashed column
+    DEFAULT_BUCKETS = 2 ** 14
+
+    def __init__(self, buckets=None):
+        """
+        Initialize from the bucket count of every hashed column.
+        Args:
+            buckets (dict, optional): Column name -> number of buckets.
+        """
+        self.buckets = {column: int(n_buckets) for column, n_buckets in (buckets or {}).items()}
+        self._labels = {column: [f"#{bucket}" for bucket in range(n_buckets)]
+                        for column, n_buckets in self.buckets.items()}
+
+    def __eq__(self, other):
+        return isinstance(other, FeatureHashing) and self.buckets == other.buckets
+
+    def __contains__(self, column):
+        return column in self.buckets
+
+    @classmethod
+    def fit(cls, df, columns, threshold, n_buckets=DEFAULT_BUCKETS):
+        """
+        Select the columns to hash: those with more than threshold distinct values. In streaming mode only
+        the first chunk is measured, which holds a fraction of the distinct values of a long-tailed column.
+        Args:
+            df (pd.DataFrame): Data the cardinalities are measured on, e.g. the first training chunk.
+            columns (list): Categorical feature columns to consider.
+            threshold (int): Cardinality above which a column is hashed; 0 or None hashes no column.
+            n_buckets (int): Number of buckets per hashed column.
+        Returns:
+            FeatureHashing: The hashed columns (none if no column is above the threshold).
+        """
+        if not threshold:
+            return cls()
+        return cls({column: n_buckets for column in columns if df[column].nunique(dropna=False) > threshold})
+
+    def get_labels(self, column):
+        """
+        Get the bucket labels of a hashed column, in bucket order; they are its values in the model.
+        Args:
+            column (str): A hashed column.
+        Returns:
+            list: Labels '#0', '#1', ...
+        """
+        return self._labels[column]
+
+    def bucket_indices(self, column, values):
+        """
+        Find the bucket of every value of a hashed column, hashing each distinct value once.
+        Values are hashed in their canonical string form, as categorical values are compared.
+        Args:
+            column (str): A hashed column.
+            values: Column values (list, np.ndarray or pd.Series).
+        Returns:
+            np.ndarray: Bucket index of every value.
+        """
+        if hasattr(values, "cat"):
+            strings = np.asarray(values.cat.categories, dtype=object).astype(str).tolist() + ["nan"]
+            # Missing values have code -1, which picks the trailing 'nan' entry
+            return _hash_buckets(strings, self.buckets[column])[values.cat.codes.to_numpy()]
+        uniques, inverse = np.unique(np.asarray(values).astype(str), return_inverse=True)
+        return _hash_buckets(uniques.tolist(), self.buckets[column])[inverse.reshape(-1)]
+
+    def get_label(self, column, value):
+        """
+        Get the bucket label of a single value of a hashed column.
+        Args:
+            column (str): A hashed column.
+            value: The value.
+        Returns:
+            str: The bucket label.
+        """
+        return self._labels[column][_hash_buckets([str(value)], self.buckets[column])[0]]
+
+    def to_categorical(self, column, values):
+        """
+        Replace the values of a hashed column with their bucket labels, for counting.
+        Args:
+            column (str): A hashed column.
+            values (pd.Series): Column values.
+        Returns:
+            pd.Series: Category column of bucket labels, with the same index.
+        """
+        import pandas as pd
+        if hasattr(values, "cat"):
+            indices = self.bucket_indices(column, values)
+        else:
+            codes, uniques = pd.factorize(values, use_na_sentinel=False)
+            indices = _hash_buckets(np.asarray(uniques, dtype=object).astype(str).tolist(), self.buckets[column])[codes]
+        return pd.Series(pd.Categorical.from_codes(indices, categories=self._labels[column]), index=values.index)
+
+    def to_json(self):
+        """
+        Returns:
+            dict: Column name -> number of buckets, for saving with the model.
+        """
+        return dict(self.buckets)
@@ -1,17 +1,28 @@
+from naive_bayes_logic.canonical_values import canonical_strings
+from naive_bayes_logic.numeric_bins import NumericBins
+from naive_bayes_logic.tools import Tools
+import numpy as np
 import pandas as pd # Added for type hinting and potential DataFrame operations
 
 class InformationCleaning:
     """
     Class to perform cleaning operations on a dataframe such as
-    converting boolean columns to strings and cleaning column names.
+    converting boolean columns to strings, cleaning column names,
+    giving every value one string form and detecting numeric columns.
     """
-    def __init__(self, info_df):
+    def __init__(self, info_df, numeric_threshold=0, numeric_columns=None):
         """
         Initialize with a dataframe to clean.
         Args:
             info_df (pd.DataFrame): The dataframe to be cleaned.
+            numeric_threshold (int): Feature columns of numbers with more than this many distinct values
+                are numeric: they are converted to floats, to be binned. 0 keeps every column categorical.
+            numeric_columns (list, optional): The numeric columns, instead of detecting them, e.g. the
+                ones detected on the first chunk of a file.
         """
         self._cleaning_info = info_df.copy()
+        self._numeric_threshold = numeric_threshold
+        self._numeric_columns = None if numeric_columns is None else list(numeric_columns)
 
     def clean_all(self):
         """
@@ -19,6 +30,8 @@ class InformationCleaning:
         """
         self._convert_bool_columns_to_str()
         self._clean_column_names()
+        self._normalize_values()
+        self._convert_numeric_columns()
 
     def _convert_bool_columns_to_str(self):
         """
@@ -43,6 +56,46 @@ class InformationCleaning:
         if 'class' in self._cleaning_info.columns:
             self._cleaning_info.rename(columns={'class': 'label'}, inplace=True)
 
+    def _normalize_values(self):
+        """
+        Turn every column into a category column of canonical value strings (see canonical_values).
+        The dtype pandas infers for a column depends on the rows parsed together (one missing value
+        turns integers into floats), so without this a value could get one string when the file is
+        read whole and another when it is read in chunks, or appended later.
+        Only the categories are converted, never the rows.
+        """
+        for col in self._cleaning_info.columns:
+            series = self._cleaning_info[col]
+            if not isinstance(series.dtype, pd.CategoricalDtype):
+                series = series.astype("category")
+            categories = canonical_strings(series.cat.categories)
+            strings, string_codes = np.unique(np.array(categories, dtype=object), return_inverse=True)
+            codes = series.cat.codes.to_numpy()
+            # Missing values keep code -1; categories with the same canonical string share a code
+            codes = np.where(codes < 0, -1, string_codes.reshape(-1)[np.maximum(codes, 0)])
+            self._cleaning_info[col] = pd.Categorical.from_codes(codes, categories=strings.tolist())
+
+    def _convert_numeric_columns(self):
+        """
+        Convert the numeric feature columns to floats; values that are not numbers become missing.
+        """
+        if self._numeric_columns is None:
+            target_column = Tools.get_the_target_column(self._cleaning_info)
+            self._numeric_columns = [] if not self._numeric_threshold else [
+                col for col in self._cleaning_info.columns
+                if col != target_column and NumericBins.is_numeric(self._cleaning_info[col], self._numeric_threshold)]
+        for col in self._numeric_columns:
+            if col in self._cleaning_info.columns:
+                self._cleaning_info[col] = NumericBins.to_numbers(self._cleaning_info[col])[0]
+
+    def get_numeric_columns(self):
+        """
+        Get the columns converted to floats.
+        Returns:
+            list: Names of the numeric columns, after cleaning.
+        """
+        return self._numeric_columns
+
     def get_dataframe(self):
         """
         Get the cleaned dataframe.
@@ -1,166 +1,825 @@
-from naive_bayes_logic.receiving_information import ReceivingInformation
-from naive_bayes_logic.data_analyzer import DataAnalyzer
-from naive_bayes_logic.model_testing import ModelTesting
 from naive_bayes_logic.user_service import UserService
-from naive_bayes_logic.classifier import Classifier
+from naive_bayes_logic.model_storage import save_model, load_model
+from naive_bayes_logic.prediction_cache import PredictionCache
+from naive_bayes_logic.metrics import STAGE_SECONDS, StageTimer
+from naive_bayes_logic.numeric_bins import NumericBins
 from naive_bayes_logic.tools import Tools
-import pandas as pd  # Added for type hinting and potential DataFrame operations
+import itertools
+import os
+import numpy as np
+
+# The training modules (ReceivingInformation, DataAnalyzer, ModelTesting, CountAccumulator,
+# CrossValidation) depend on pandas. They are imported by the functions that train or update
+# a model, so a process that only loads a saved model and serves predictions needs NumPy alone.
+
+# Number of processes feature columns are counted on during training
+COUNT_WORKERS = int(os.environ.get("COUNT_WORKERS", os.cpu_count() or 1))
+
+# Categorical columns with more distinct values than this (IDs, SKUs, ...) are hashed into a fixed number
+# of buckets (FeatureHashing.DEFAULT_BUCKETS) when a model is trained, so their tables stop growing with
+# their cardinality. Set it in the order of the bucket count, as hashing a smaller column only makes its
+# tables larger. 0 (the default) keeps every value of every column
+HASH_THRESHOLD = int(os.environ.get("HASH_THRESHOLD", "0"))
+
+# Feature columns of numbers with more than this many distinct values (ages, prices, ...) are detected
+# as numeric when a dataset is loaded, and binned on their quantiles (NumericBins.DEFAULT_BINS) instead
+# of being counted per distinct value. NUMERIC_THRESHOLD=0 keeps every column categorical
+NUMERIC_THRESHOLD = int(os.environ.get("NUMERIC_THRESHOLD", str(NumericBins.MIN_DISTINCT_VALUES)))
+
+# Size of the LRU cache of single-record predictions kept per model; PREDICTION_CACHE_SIZE=0 disables it
+PREDICTION_CACHE_SIZE = int(os.environ.get("PREDICTION_CACHE_SIZE", "1024"))
+
+# Stages reported while a model trains, in order
+TRAINING_STAGES = ("load", "clean", "split", "count", "evaluate", "cross_validate")
+
+# Stage timers of the prediction workflows, bound once so timing a request costs two clock reads
+_PREDICT_ENCODE_SECONDS = STAGE_SECONDS.labels("predict", "encode")
+_PREDICT_SCORE_SECONDS = STAGE_SECONDS.labels("predict", "score")
+_PREDICT_MANY_ENCODE_SECONDS = STAGE_SECONDS.labels("predict_many", "encode")
+_PREDICT_MANY_SCORE_SECONDS = STAGE_SECONDS.labels("predict_many", "score")
+_PREDICT_BATCH_ENCODE_SECONDS = STAGE_SECONDS.labels("predict_batch", "encode")
+_PREDICT_BATCH_SCORE_SECONDS = STAGE_SECONDS.labels("predict_batch", "score")
+_PREDICT_FILE_ENCODE_SECONDS = STAGE_SECONDS.labels("predict_file", "encode")
+_PREDICT_FILE_SCORE_SECONDS = STAGE_SECONDS.labels("predict_file", "score")
+
+# Output formats of predict_file_workflow
+FILE_OUTPUT_FORMATS = ("csv", "ndjson")
+
+
+def new_model_data():
+    """
+    Creates the state of a served model. The workflows below use trained_model_data
+    unless they are given another state, e.g. one of the named models of the registry.
+    Returns:
+        dict: An empty model state.
+    """
+    return {
+        "model_version": 0,  # Bumped on every model change; cached predictions of other versions are dropped
+        "compiled_model": None,
+        "counts": None,
+        "accuracy": None,
+        "confusion_matrix": None,
+        "class_metrics": None,
+        "cross_validation": None,
+        "target_column": None,
+        "prediction_cache": PredictionCache(PREDICTION_CACHE_SIZE)
+    }
+
 
 # Global variables to store the trained model and related data
 # In a real-world application, this would be persisted in a database or a more robust cache.
 # For this example, we'll use in-memory storage.
-trained_model_data = {
-    "percentage_of_values": None,
-    "train_df": None,
-    "test_df": None,
-    "full_df": None,
-    "accuracy": None,
-    "features": None,
-    "target_column": None
-}
+# Only the compact model is kept: the raw dataframes are released once training is done,
+# and the allowed values of every feature are the vocabularies of the compiled model.
+trained_model_data = new_model_data()
 
 
-def load_data_and_split(dataset_path):
+def _report(progress, stage, rows=None):
+    """
+    Reports a training stage to an optional progress callback.
+    Args:
+        progress (callable, optional): Called as progress(stage, rows).
+        stage (str): One of TRAINING_STAGES.
+        rows (int, optional): Number of rows processed so far in this stage.
+    """
+    if progress is not None:
+        progress(stage, rows)
+
+
+def load_data_and_split(dataset_path, progress=None, numeric_threshold=0):
     """
     Loads the dataset and splits it into training and testing sets.
     Args:
         dataset_path (str): Path to the CSV dataset.
+        progress (callable, optional): Called as progress(stage, rows) when a stage starts.
+        numeric_threshold (int): Distinct values above which a column of numbers is numeric; 0 detects none.
     Returns:
         tuple: (train_df, test_df, full_df) — DataFrames for training, testing, and full original dataset.
     """
-    info = ReceivingInformation(dataset_path)
+    from naive_bayes_logic.receiving_information import ReceivingInformation
+    info = ReceivingInformation(dataset_path, on_stage=lambda stage: _report(progress, stage),
+                                numeric_threshold=numeric_threshold)
+    _report(progress, "split")
     info.split_train_test()
     return info.get_train_df(), info.get_test_df(), info.get_dataframe()
 
 
-def analyze_training_data(train_df, full_df):
+def analyze_training_data(train_df, full_df, workers=1, hash_threshold=0):
     """
-    Analyzes the training data to calculate conditional probabilities for each feature.
+    Analyzes the training data to count each feature value per class.
     Args:
         train_df (pd.DataFrame): The training set.
         full_df (pd.DataFrame): The full dataset before split.
+        workers (int): Number of processes the feature columns are counted on.
+        hash_threshold (int): Cardinality above which a categorical column is hashed; 0 hashes no column.
     Returns:
-        dict: A nested dictionary with class -> feature -> value -> probability.
+        CountAccumulator: Per class -> feature -> value counts, from which the conditional
+                          probabilities are compiled.
     """
-    analyzer = DataAnalyzer(train_df, full_df)
+    from naive_bayes_logic.data_analyzer import DataAnalyzer
+    analyzer = DataAnalyzer(train_df, full_df, workers, hash_threshold)
     analyzer.trainer()
-    return analyzer.get_percentage_of_values()
+    return analyzer.get_counts()
 
 
-def test_model_accuracy(test_df, percentage_of_values, train_df):
+def test_model_accuracy(test_df, compiled_model):
     """
-    Evaluates and returns the model's accuracy on the test set.
+    Evaluates the model on the test set in a single vectorized pass.
     Args:
         test_df (pd.DataFrame): The test set.
-        percentage_of_values (dict): Precomputed probabilities from the training data.
-        train_df (pd.DataFrame): Training data (needed for Classifier initialization).
+        compiled_model (CompiledModel): The compiled model to evaluate.
     Returns:
-        float: Model accuracy.
+        dict: 'accuracy' (float), 'confusion_matrix' and per-class 'class_metrics'.
     """
-    examination = ModelTesting(test_df, percentage_of_values, train_df)  # Pass train_df
+    from naive_bayes_logic.model_testing import ModelTesting
+    examination = ModelTesting(test_df, compiled_model)
     examination.evaluate_model_accuracy()
-    return examination.get_model_accuracy()
+    return {
+        "accuracy": examination.get_model_accuracy(),
+        "confusion_matrix": examination.get_confusion_matrix(),
+        "class_metrics": examination.get_class_metrics()
+    }
 
 
-def collect_user_input(train_df, from_json_request):
+def cross_validate_model(full_df, folds, stratified=False, workers=1, hash_threshold=0):
     """
-    Collects input values for prediction from an external JSON.
+    Estimates the accuracy of the model by k-fold cross-validation on the whole dataset.
     Args:
-        train_df (pd.DataFrame): Training data used for valid value checks.
+        full_df (pd.DataFrame): The full cleaned dataset.
+        folds (int): Number of folds.
+        stratified (bool): Keep the class proportions in every fold.
+        workers (int): Number of processes the folds are evaluated on.
+        hash_threshold (int): Cardinality above which a categorical column is hashed; 0 hashes no column.
+    Returns:
+        dict: 'folds', 'stratified', 'fold_accuracies', 'mean_accuracy' and 'std_accuracy'.
+    """
+    from naive_bayes_logic.cross_validation import CrossValidation
+    validation = CrossValidation(full_df, folds, stratified, workers=workers, hash_threshold=hash_threshold)
+    validation.run()
+    return {
+        "folds": folds,
+        "stratified": stratified,
+        "fold_accuracies": validation.get_fold_accuracies(),
+        "mean_accuracy": validation.get_mean_accuracy(),
+        "std_accuracy": validation.get_std_accuracy()
+    }
+
+
+def collect_user_input(compiled_model, from_json_request):
+    """
+    Collects and validates input values for prediction from an external JSON.
+    Args:
+        compiled_model (CompiledModel): The compiled model, whose vocabularies hold the valid values.
         from_json_request (dict): Input values for prediction (non-interactive mode).
     Returns:
-        dict: A dictionary of feature names and their values for prediction.
+        np.ndarray: The input values encoded as one integer code per feature.
     """
-    user_service = UserService(train_df)
+    user_service = UserService(compiled_model)
     user_service.set_customer_values(from_json_request)
-    return user_service.get_customer_values()
+    return user_service.get_customer_codes()
 
 
-def make_prediction(train_df, percentage_of_values, customer_values):
+def compile_model(counts):
+    """
+    Compiles the accumulated counts into integer-encoded log-probability tables.
+    Args:
+        counts (CountAccumulator): Per-(class, feature, value) counts of the training data.
+    Returns:
+        CompiledModel: The compiled model used for scoring.
+    """
+    return counts.compile()
+
+
+def make_prediction(compiled_model, customer_codes):
     """
     Performs the prediction based on user input.
     Args:
-        train_df (pd.DataFrame): Training data.
-        percentage_of_values (dict): Conditional probabilities for each class.
-        customer_values (dict): Input values for prediction.
+        compiled_model (CompiledModel): The compiled model.
+        customer_codes (np.ndarray): Validated input values, encoded by collect_user_input.
     Returns:
-        dict: Prediction result with predicted class and full probability distribution.
+        dict: Prediction result with predicted class and normalized posterior probabilities.
     """
-    classifier = Classifier(train_df, percentage_of_values, customer_values)
-    classifier.predict()
-    prediction = classifier.get_prediction()
-    return prediction
+    return compiled_model.predict_codes(customer_codes)
 
 
-def train_model_workflow(dataset_path):
+def train_streaming(dataset_path, chunk_size, progress=None, workers=1, hash_threshold=0, numeric_threshold=0):
     """
-    Main workflow to load data, train model, and store results.
+    Trains and evaluates the model while reading the CSV in fixed-size chunks.
+    Rows are assigned to train/test by a hash of their position, counts are accumulated
+    from the training rows in a first pass and the test rows are scored in a second pass,
+    so peak memory depends on chunk_size and the vocabulary sizes, not on the row count.
+    Numeric columns are detected on the first chunk and binned on the quantiles of its training rows,
+    and the columns to hash are chosen on their cardinality in it.
     Args:
         dataset_path (str): Path to the CSV dataset.
+        chunk_size (int): Number of rows read per chunk.
+        progress (callable, optional): Called as progress(stage, rows) after every chunk.
+        workers (int): Number of processes the feature columns are counted on.
+        hash_threshold (int): Cardinality above which a categorical column is hashed; 0 hashes no column.
+        numeric_threshold (int): Distinct values above which a column of numbers is numeric; 0 detects none.
     Returns:
-        dict: A dictionary containing model metadata and accuracy.
+        tuple: (CountAccumulator, CompiledModel, evaluation dict).
     """
-    train_df, test_df, full_df = load_data_and_split(dataset_path)
-    percentage_of_values = analyze_training_data(train_df, full_df)
-    accuracy = test_model_accuracy(test_df, percentage_of_values, train_df)
-
-    target_column = Tools.get_the_target_column(train_df)
-    feature_columns = [col for col in train_df.columns if col != target_column]
-
-    # Store the trained model data globally
-    trained_model_data["percentage_of_values"] = percentage_of_values
-    trained_model_data["train_df"] = train_df
-    trained_model_data["test_df"] = test_df
-    trained_model_data["full_df"] = full_df
-    trained_model_data["accuracy"] = accuracy
-    trained_model_data["features"] = {
-        col: train_df[col].astype(str).unique().tolist() for col in feature_columns
+    from naive_bayes_logic.receiving_information import ReceivingInformation
+    from naive_bayes_logic.count_accumulator import CountAccumulator
+    from naive_bayes_logic.model_testing import ModelTesting
+    accumulator = CountAccumulator(workers, hash_threshold=hash_threshold)
+    rows = 0
+    for start, chunk in ReceivingInformation.read_in_chunks(dataset_path, chunk_size, numeric_threshold):
+        accumulator.add_frame(chunk[ReceivingInformation.hash_split_mask(start, len(chunk))])
+        rows += len(chunk)
+        _report(progress, "count", rows)
+    compiled_model = compile_model(accumulator)
+
+    examination = ModelTesting(None, compiled_model)
+    rows = 0
+    for start, chunk in ReceivingInformation.read_in_chunks(dataset_path, chunk_size):
+        examination.evaluate_chunk(chunk[~ReceivingInformation.hash_split_mask(start, len(chunk))])
+        rows += len(chunk)
+        _report(progress, "evaluate", rows)
+    evaluation = {
+        "accuracy": examination.get_model_accuracy(),
+        "confusion_matrix": examination.get_confusion_matrix(),
+        "class_metrics": examination.get_class_metrics()
     }
-    trained_model_data["target_column"] = target_column
+    return accumulator, compiled_model, evaluation
+
+
+def run_training(dataset_path, streaming=False, chunk_size=100_000, progress=None, workers=None,
+                 cv_folds=0, stratified=False, hash_threshold=None, numeric_threshold=None):
+    """
+    Runs the whole training pipeline without touching the served model, so it can run
+    in another process and be swapped in with install_trained_model once done.
+    Args:
+        dataset_path (str): Path to the CSV dataset, plain or gzip/zstd compressed.
+        streaming (bool): Read the file in chunks with bounded memory instead of loading it whole.
+        chunk_size (int): Number of rows per chunk in streaming mode.
+        progress (callable, optional): Called as progress(stage, rows) as the stages advance.
+        workers (int, optional): Number of processes the feature columns are counted on.
+            Defaults to COUNT_WORKERS.
+        cv_folds (int): Also cross-validate with this many folds; 0 skips cross-validation.
+        stratified (bool): Stratify the cross-validation folds by class.
+        hash_threshold (int, optional): Cardinality above which a categorical column is hashed;
+            0 hashes no column. Defaults to HASH_THRESHOLD.
+        numeric_threshold (int, optional): Distinct values above which a column of numbers is binned;
+            0 bins no column. Defaults to NUMERIC_THRESHOLD.
+    Raises:
+        ValueError: If cross-validation is requested in streaming mode.
+    Returns:
+        dict: 'counts', 'compiled_model', 'evaluation' (with 'cross_validation' when requested)
+              and 'stage_seconds', the duration of every stage.
+    """
+    workers = workers or COUNT_WORKERS
+    hash_threshold = HASH_THRESHOLD if hash_threshold is None else hash_threshold
+    numeric_threshold = NUMERIC_THRESHOLD if numeric_threshold is None else numeric_threshold
+    timer = StageTimer()
+
+    def timed_progress(stage, rows=None):
+        timer(stage, rows)
+        _report(progress, stage, rows)
+
+    if streaming:
+        if cv_folds:
+            raise ValueError("Cross-validation is not available in streaming mode.")
+        timed_progress("count", 0)
+        counts, compiled_model, evaluation = train_streaming(dataset_path, chunk_size, timed_progress, workers,
+                                                             hash_threshold, numeric_threshold)
+    else:
+        train_df, test_df, full_df = load_data_and_split(dataset_path, timed_progress, numeric_threshold)
+        timed_progress("count")
+        counts = analyze_training_data(train_df, full_df, workers, hash_threshold)
+        compiled_model = compile_model(counts)
+        timed_progress("evaluate")
+        evaluation = test_model_accuracy(test_df, compiled_model)
+        if cv_folds:
+            timed_progress("cross_validate")
+            evaluation["cross_validation"] = cross_validate_model(full_df, cv_folds, stratified, workers,
+                                                                  hash_threshold)
+        # The dataframes are not needed to serve predictions; drop them before returning the model
+        del train_df, test_df, full_df
+    # Counting is done: keep the mostly-zero count tables sparse, like their log tables
+    counts.compact()
+    return {"counts": counts, "compiled_model": compiled_model, "evaluation": evaluation,
+            "stage_seconds": timer.get_durations()}
+
+
+def install_trained_model(trained, model_data=None):
+    """
+    Makes a freshly trained model the served one. All entries are replaced in a single
+    dict update, so concurrent readers never see a mix of the old and the new model.
+    The stage durations of the training run, if given, are recorded in the stage metrics here,
+    in the serving process, as training itself usually runs in another process.
+    Args:
+        trained (dict): The output of run_training. Models loaded for inference only have
+            no 'counts' and give their 'target_column' instead.
+        model_data (dict, optional): Model state from new_model_data(); defaults to trained_model_data.
+    Returns:
+        dict: A dictionary containing model metadata and accuracy.
+    """
+    model_data = trained_model_data if model_data is None else model_data
+    counts = trained["counts"]
+    evaluation = trained["evaluation"]
+    target_column = trained["target_column"] if counts is None else counts.target_column
+    for stage, seconds in trained.get("stage_seconds", {}).items():
+        STAGE_SECONDS.labels("train", stage).observe(seconds)
+
+    # Store the trained model data
+    model_data.update({
+        "model_version": model_data["model_version"] + 1,
+        "compiled_model": trained["compiled_model"],
+        "counts": counts,
+        "accuracy": evaluation["accuracy"],
+        "confusion_matrix": evaluation["confusion_matrix"],
+        "class_metrics": evaluation["class_metrics"],
+        "cross_validation": evaluation.get("cross_validation"),
+        "target_column": target_column
+    })
 
     return {
         "message": "Model trained successfully!",
-        "accuracy": accuracy,
-        "features": trained_model_data["features"],
+        "accuracy": evaluation["accuracy"],
+        "confusion_matrix": evaluation["confusion_matrix"],
+        "class_metrics": evaluation["class_metrics"],
+        "cross_validation": evaluation.get("cross_validation"),
+        "features": trained["compiled_model"].get_features(),
         "target_column": target_column
     }
 
 
-def predict_workflow(customer_values):
+def train_model_workflow(dataset_path, streaming=False, chunk_size=100_000, cv_folds=0, stratified=False):
+    """
+    Main workflow to load data, train model, and store results.
+    Args:
+        dataset_path (str): Path to the CSV dataset.
+        streaming (bool): Read the file in chunks with bounded memory instead of loading it whole.
+        chunk_size (int): Number of rows per chunk in streaming mode.
+        cv_folds (int): Also cross-validate with this many folds; 0 skips cross-validation.
+        stratified (bool): Stratify the cross-validation folds by class.
+    Returns:
+        dict: A dictionary containing model metadata and accuracy.
+    """
+    return install_trained_model(run_training(dataset_path, streaming=streaming, chunk_size=chunk_size,
+                                              cv_folds=cv_folds, stratified=stratified))
+
+
+def count_appended_data(dataset_path, chunk_size=100_000, model_data=None):
+    """
+    Counts a new labelled CSV into a copy of the counts of the current model and recompiles it,
+    without touching the served model, so it can run off the event loop. Work is proportional
+    to the new data: only its rows are counted, and only the table rows of the classes it
+    contains are recompiled. New feature values and new classes are added to the model.
+    Args:
+        dataset_path (str or file object): Path to the CSV file with the same columns as the
+            training data, or a binary file object to read it from.
+        chunk_size (int): Number of rows read per chunk.
+        model_data (dict, optional): Model state from new_model_data(); defaults to trained_model_data.
+    Raises:
+        ValueError: If the model is not trained or was loaded without its counts.
+    Returns:
+        dict: 'counts' and 'compiled_model' of the updated model, and 'rows_added'.
+    """
+    from naive_bayes_logic.receiving_information import ReceivingInformation
+    model_data = trained_model_data if model_data is None else model_data
+    if model_data["compiled_model"] is None:
+        raise ValueError("Model not trained yet. Please upload a dataset first.")
+    if model_data["counts"] is None:
+        raise ValueError("The model was loaded for inference only, without its counts, and cannot be updated.")
+
+    # Work on a copy so a failure halfway through the file leaves the served model untouched
+    counts = model_data["counts"].copy()
+    touched_classes = set()
+    rows_added = 0
+    for _, chunk in ReceivingInformation.read_in_chunks(dataset_path, chunk_size):
+        touched_classes |= counts.add_frame(chunk)
+        rows_added += len(chunk)
+    compiled_model = counts.refresh(model_data["compiled_model"], touched_classes)
+    counts.compact()
+    return {"counts": counts, "compiled_model": compiled_model, "rows_added": rows_added}
+
+
+def install_appended_data(appended, model_data=None):
+    """
+    Makes a model updated by count_appended_data the served one, in a single dict update.
+    All new rows are used for training, so the stored accuracy still refers to the last full evaluation.
+    Args:
+        appended (dict): The output of count_appended_data.
+        model_data (dict, optional): Model state from new_model_data(); defaults to trained_model_data.
+    Returns:
+        dict: A dictionary containing the number of rows added and the updated model metadata.
+    """
+    model_data = trained_model_data if model_data is None else model_data
+    model_data.update({
+        "model_version": model_data["model_version"] + 1,
+        "compiled_model": appended["compiled_model"],
+        "counts": appended["counts"]
+    })
+
+    return {
+        "message": f"Model updated with {appended['rows_added']} new rows.",
+        "rows_added": appended["rows_added"],
+        "accuracy": model_data["accuracy"],
+        "features": appended["counts"].get_features(),
+        "target_column": model_data["target_column"]
+    }
+
+
+def append_training_data_workflow(dataset_path, chunk_size=100_000, model_data=None):
+    """
+    Folds the counts of a new labelled CSV into the current model without retraining.
+    See count_appended_data and install_appended_data, which this runs one after the other.
+    Args:
+        dataset_path (str or file object): Path to the CSV file with the same columns as the
+            training data, or a binary file object to read it from.
+        chunk_size (int): Number of rows read per chunk.
+        model_data (dict, optional): Model state from new_model_data(); defaults to trained_model_data.
+    Returns:
+        dict: A dictionary containing the number of rows added and the updated model metadata.
+    """
+    return install_appended_data(count_appended_data(dataset_path, chunk_size, model_data), model_data)
+
+
+def predict_workflow(customer_values, model_data=None):
     """
     Workflow to make a prediction using the currently trained model.
     Args:
         customer_values (dict): Input data for prediction.
+        model_data (dict, optional): Model state from new_model_data(); defaults to trained_model_data.
     Returns:
         dict: Prediction results including predicted class and full probabilities.
     """
-    if trained_model_data["percentage_of_values"] is None:
+    model_data = trained_model_data if model_data is None else model_data
+    if model_data["compiled_model"] is None:
+        raise ValueError("Model not trained yet. Please upload a dataset first.")
+
+    compiled_model = model_data["compiled_model"]
+
+    model_version = model_data["model_version"]
+
+    # Validate customer_values against the allowed values of every feature and encode them
+    with _PREDICT_ENCODE_SECONDS.time():
+        customer_codes = collect_user_input(compiled_model, customer_values)
+
+    cache_key = tuple(customer_codes.tolist())
+    cached = model_data["prediction_cache"].get(model_version, cache_key)
+    if cached is None:
+        with _PREDICT_SCORE_SECONDS.time():
+            cached = make_prediction(compiled_model, customer_codes)
+        model_data["prediction_cache"].put(model_version, cache_key, cached)
+    # Hand out a copy so callers can never alter the cached entry
+    return {"prediction": cached["prediction"], "full_results": dict(cached["full_results"])}
+
+
+def predict_many_workflow(records, model_data=None):
+    """
+    Scores several independent single-record requests together, as the /predict micro-batcher does.
+    Each record is validated on its own and goes through the prediction cache; the records that
+    miss the cache are scored in one vectorized call.
+    Args:
+        records (list): Input data of every request.
+        model_data (dict, optional): Model state from new_model_data(); defaults to trained_model_data.
+    Returns:
+        list: Per record, the same result predict_workflow returns, or the ValueError it would raise.
+    """
+    model_data = trained_model_data if model_data is None else model_data
+    if model_data["compiled_model"] is None:
+        raise ValueError("Model not trained yet. Please upload a dataset first.")
+
+    compiled_model = model_data["compiled_model"]
+    model_version = model_data["model_version"]
+
+    results = [None] * len(records)
+    uncached_positions = []
+    uncached_codes = []
+    with _PREDICT_MANY_ENCODE_SECONDS.time():
+        for position, customer_values in enumerate(records):
+            try:
+                customer_codes = collect_user_input(compiled_model, customer_values)
+            except ValueError as e:
+                results[position] = e
+                continue
+            cached = model_data["prediction_cache"].get(model_version, tuple(customer_codes.tolist()))
+            if cached is None:
+                uncached_positions.append(position)
+                uncached_codes.append(customer_codes)
+            else:
+                results[position] = cached
+
+    if uncached_codes:
+        codes = np.vstack(uncached_codes)
+        with _PREDICT_MANY_SCORE_SECONDS.time():
+            labels, posteriors = compiled_model.predict_batch(codes=codes)
+        for position, row_codes, label, row_posteriors in zip(uncached_positions, codes, labels, posteriors):
+            result = {
+                "prediction": label,
+                "full_results": {class_label: float(p) for class_label, p in zip(compiled_model.class_labels,
+                                                                                  row_posteriors)}
+            }
+            model_data["prediction_cache"].put(model_version, tuple(row_codes.tolist()), result)
+            results[position] = result
+
+    # Hand out copies so callers can never alter the cached entries
+    return [result if isinstance(result, ValueError)
+            else {"prediction": result["prediction"], "full_results": dict(result["full_results"])}
+            for result in results]
+
+
+def _batch_to_columns(expected_features, records=None, columns=None):
+    """
+    Converts a batch payload (row-oriented or column-oriented) into feature columns.
+    Rows with a missing or null feature are reported instead of failing the batch.
+    Args:
+        expected_features (list): Feature names the model was trained on.
+        records (list, optional): List of {feature: value} dicts.
+        columns (dict, optional): {feature: list of values}, all of the same length.
+    Returns:
+        tuple: (number of rows, {feature: list of values}, {row index: error message}).
+    """
+    if (records is None) == (columns is None):
+        raise ValueError("Provide exactly one of 'records' or 'columns'.")
+
+    errors = {}
+    if records is not None:
+        n_rows = len(records)
+        for index, record in enumerate(records):
+            missing = [f for f in expected_features if record.get(f) is None]
+            if missing:
+                errors[index] = f"Missing required features: {', '.join(missing)}"
+        feature_columns = {f: [record.get(f) for record in records] for f in expected_features}
+        return n_rows, feature_columns, errors
+
+    missing_columns = [f for f in expected_features if f not in columns]
+    if missing_columns:
+        raise ValueError(f"Missing feature columns: {', '.join(missing_columns)}")
+    lengths = {len(columns[f]) for f in expected_features}
+    if len(lengths) > 1:
+        raise ValueError("All feature columns must have the same length.")
+    n_rows = lengths.pop() if lengths else 0
+    missing_by_row = {}
+    for f in expected_features:
+        for index, value in enumerate(columns[f]):
+            if value is None:
+                missing_by_row.setdefault(index, []).append(f)
+    for index, missing in missing_by_row.items():
+        errors[index] = f"Missing required features: {', '.join(missing)}"
+    return n_rows, {f: columns[f] for f in expected_features}, errors
+
+
+def predict_batch_workflow(records=None, columns=None, model_data=None):
+    """
+    Workflow to score many records in one vectorized call using the currently trained model.
+    Args:
+        records (list, optional): List of {feature: value} dicts.
+        columns (dict, optional): {feature: list of values}, all of the same length.
+        model_data (dict, optional): Model state from new_model_data(); defaults to trained_model_data.
+    Returns:
+        dict: 'classes', per-row 'predictions' and 'probabilities' (None for rejected rows)
+              and 'errors' as a list of {'row', 'error'}.
+    """
+    model_data = trained_model_data if model_data is None else model_data
+    if model_data["compiled_model"] is None:
+        raise ValueError("Model not trained yet. Please upload a dataset first.")
+
+    compiled_model = model_data["compiled_model"]
+    n_rows, feature_columns, errors = _batch_to_columns(compiled_model.feature_names, records, columns)
+
+    predictions = [None] * n_rows
+    probabilities = [None] * n_rows
+    valid_rows = [index for index in range(n_rows) if index not in errors]
+    if valid_rows:
+        valid_columns = {f: [values[index] for index in valid_rows] for f, values in feature_columns.items()}
+        with _PREDICT_BATCH_ENCODE_SECONDS.time():
+            codes = compiled_model.encode_columns(valid_columns)
+            # Reject rows holding values never seen in training, as the single-record path does
+            unknown = compiled_model.unknown_mask(codes)
+        for row_position, position in zip(*np.nonzero(unknown)):
+            index = valid_rows[row_position]
+            if index not in errors:
+                column = compiled_model.feature_names[position]
+                errors[index] = f"Invalid value '{feature_columns[column][index]}' for feature '{column}'."
+        known_rows = ~unknown.any(axis=1)
+
+        with _PREDICT_BATCH_SCORE_SECONDS.time():
+            labels, posteriors = compiled_model.predict_batch(codes=codes[known_rows])
+        scored_rows = [index for index, known in zip(valid_rows, known_rows) if known]
+        for index, label, row_posteriors in zip(scored_rows, labels, posteriors.tolist()):
+            predictions[index] = label
+            probabilities[index] = row_posteriors
+
+    return {
+        "classes": compiled_model.class_labels,
+        "predictions": predictions,
+        "probabilities": probabilities,
+        "errors": [{"row": index, "error": message} for index, message in sorted(errors.items())]
+    }
+
+
+def predict_file_workflow(dataset_path, chunk_size=100_000, output_format="csv", model_data=None):
+    """
+    Workflow to score a whole file of feature rows, for bulk scoring. The file is read and scored one
+    chunk at a time and the results are produced per chunk, so memory depends on chunk_size, not on
+    the file size. Missing cells are scored as the 'nan' value of their feature, as in evaluation.
+    Rows with an unknown value, or a missing one the model has no 'nan' value for, get an error
+    instead of a prediction; the other rows are still scored. Columns that are not features of the model (e.g. ids) are ignored.
+    The first chunk is read right away, so a file without the model's feature columns is rejected
+    before any output is produced.
+    Args:
+        dataset_path (str or file object): Path to the CSV (plain, gzip or zstd compressed), Parquet or
+            Feather/Arrow file, or a binary file object to read it from.
+        chunk_size (int): Number of rows read and scored at a time.
+        output_format (str): 'csv' (with a header line) or 'ndjson' (one JSON object per line).
+        model_data (dict, optional): Model state from new_model_data(); defaults to trained_model_data.
+    Raises:
+        ValueError: If there is no model, the output format is unknown, or the file lacks feature columns.
+    Returns:
+        generator: Text pieces of the output, one per chunk. Every row has its 'row' index in the file,
+                   the 'prediction', one 'probability_<class>' per class and the 'error', empty when
+                   the row was scored. An error that stops the file from being read is reported as a
+                   last row without a row index.
+    """
+    from naive_bayes_logic.receiving_information import ReceivingInformation
+    model_data = trained_model_data if model_data is None else model_data
+    if model_data["compiled_model"] is None:
         raise ValueError("Model not trained yet. Please upload a dataset first.")
+    if output_format not in FILE_OUTPUT_FORMATS:
+        raise ValueError(f"Unknown output format '{output_format}'. Use one of: {', '.join(FILE_OUTPUT_FORMATS)}.")
+
+    # The model is taken once, so a model swapped in while the file is scored does not mix into its results
+    compiled_model = model_data["compiled_model"]
+    chunks = ReceivingInformation.read_in_chunks(dataset_path, chunk_size)
+    first_chunk = next(chunks, None)
+    if first_chunk is None:
+        raise ValueError("The file has no rows to score.")
+    missing_columns = [f for f in compiled_model.feature_names if f not in first_chunk[1].columns]
+    if missing_columns:
+        chunks.close()  # Now, while the file is still open, rather than whenever it is garbage collected
+        raise ValueError(f"Missing feature columns: {', '.join(missing_columns)}")
+    return _score_file_chunks(compiled_model, itertools.chain([first_chunk], chunks), output_format)
+
+
+def _score_file_chunks(compiled_model, chunks, output_format):
+    """
+    Scores (start, chunk) pairs and renders every scored chunk in the output format.
+    """
+    import pandas as pd
+    output_columns = (["row", "prediction"] + [f"probability_{label}" for label in compiled_model.class_labels]
+                      + ["error"])
+    if output_format == "csv":
+        yield pd.DataFrame(columns=output_columns).to_csv(index=False)
+    try:
+        for start, chunk in chunks:
+            scored = _score_frame(compiled_model, chunk)
+            scored.insert(0, "row", np.arange(start, start + len(chunk)))
+            if output_format == "csv":
+                yield scored.to_csv(header=False, index=False)
+            elif len(scored):
+                yield scored.to_json(orient="records", lines=True, double_precision=15).rstrip("\n") + "\n"
+    except Exception as e:
+        failure = pd.DataFrame([{"row": None, "error": f"Could not read the rest of the file: {e}"}],
+                               columns=output_columns)
+        yield (failure.to_csv(header=False, index=False) if output_format == "csv"
+               else failure.to_json(orient="records", lines=True).rstrip("\n") + "\n")
+
+
+def _score_frame(compiled_model, df):
+    """
+    Validates and scores the rows of a dataframe in one vectorized pass.
+    Args:
+        compiled_model (CompiledModel): The compiled model.
+        df (pd.DataFrame): Rows holding (at least) every feature column.
+    Returns:
+        pd.DataFrame: 'prediction', one 'probability_<class>' per class and 'error', aligned with df.
+    """
+    import pandas as pd
+    feature_names = compiled_model.feature_names
+    with _PREDICT_FILE_ENCODE_SECONDS.time():
+        codes = compiled_model.encode_columns({f: df[f] for f in feature_names})
+        # encode_columns gives missing cells the code of 'nan' (of its bucket for a hashed feature), as
+        # ModelTesting scores them; they are only rejected where the model has no 'nan' value
+        scores_missing = np.array([f in compiled_model.feature_hashing or "nan" in vocabulary
+                                   for f, vocabulary in zip(feature_names, compiled_model.vocabularies)], dtype=bool)
+        missing = np.column_stack([df[f].isna().to_numpy() for f in feature_names]) & ~scores_missing \
+            if feature_names else np.zeros((len(df), 0), dtype=bool)
+        unknown = compiled_model.unknown_mask(codes) & ~missing
 
-    train_df = trained_model_data["train_df"]
-    percentage_of_values = trained_model_data["percentage_of_values"]
+    # Messages are built for the rejected rows only, the same ones predict_batch_workflow gives
+    errors = np.full(len(df), None, dtype=object)
+    for index in np.flatnonzero(missing.any(axis=1)):
+        errors[index] = f"Missing required features: {', '.join(np.asarray(feature_names)[missing[index]])}"
+    for index in np.flatnonzero(unknown.any(axis=1) & ~missing.any(axis=1)):
+        column = feature_names[int(np.argmax(unknown[index]))]
+        errors[index] = f"Invalid value '{df[column].iloc[index]}' for feature '{column}'."
 
-    # Validate customer_values against expected features
-    expected_features = list(trained_model_data["features"].keys())
-    if not all(f in customer_values for f in expected_features):
-        raise ValueError(f"Missing features in input. Expected: {expected_features}")
+    valid = ~(missing.any(axis=1) | unknown.any(axis=1))
+    predictions = np.full(len(df), None, dtype=object)
+    probabilities = np.full((len(df), len(compiled_model.class_labels)), np.nan)
+    if valid.any():
+        with _PREDICT_FILE_SCORE_SECONDS.time():
+            labels, posteriors = compiled_model.predict_batch(codes=codes[valid])
+        predictions[valid] = labels
+        probabilities[valid] = posteriors
 
-    # Ensure input values are strings, matching how they are stored in the model
-    customer_values_str = {k: str(v) for k, v in customer_values.items()}
+    scored = pd.DataFrame({"prediction": predictions})
+    for position, label in enumerate(compiled_model.class_labels):
+        scored[f"probability_{label}"] = probabilities[:, position]
+    scored["error"] = errors
+    return scored
 
-    return make_prediction(train_df, percentage_of_values, customer_values_str)
+
+def save_trained_model(model_path, model_data=None):
+    """
+    Saves the currently trained model (counts, compiled tables and evaluation results) to disk.
+    Args:
+        model_path (str): Destination file path.
+        model_data (dict, optional): Model state from new_model_data(); defaults to trained_model_data.
+    Returns:
+        os.stat_result: Stat of the written file.
+    """
+    model_data = trained_model_data if model_data is None else model_data
+    if model_data["compiled_model"] is None:
+        raise ValueError("Model not trained yet. Please upload a dataset first.")
+    if model_data["counts"] is None:
+        raise ValueError("The model was loaded for inference only, without its counts, and cannot be saved.")
+
+    metadata = {
+        "accuracy": model_data["accuracy"],
+        "confusion_matrix": model_data["confusion_matrix"],
+        "class_metrics": model_data["class_metrics"],
+        "cross_validation": model_data["cross_validation"]
+    }
+    return save_model(model_path, model_data["compiled_model"], model_data["counts"], metadata)
 
 
-def get_model_status():
+def read_trained_model(model_path, with_counts=True):
+    """
+    Loads a saved model from disk without serving it, e.g. off the event loop.
+    Args:
+        model_path (str): Path to the model file.
+        with_counts (bool): Also load the counts. Without them the model serves predictions and its
+            status, but cannot be updated or saved; loading then needs neither pandas nor the training modules.
+    Returns:
+        dict: The model, in the layout of the output of run_training, for install_trained_model.
+    """
+    compiled_model, counts, metadata = load_model(model_path, with_counts)
+    return {
+        "counts": counts,
+        "compiled_model": compiled_model,
+        "target_column": metadata["target_column"],
+        "evaluation": {
+            "accuracy": metadata.get("accuracy"),
+            "confusion_matrix": metadata.get("confusion_matrix"),
+            "class_metrics": metadata.get("class_metrics"),
+            "cross_validation": metadata.get("cross_validation")
+        }
+    }
+
+
+def load_trained_model(model_path, model_data=None, with_counts=True):
+    """
+    Loads a saved model from disk and makes it the currently served model.
+    Args:
+        model_path (str): Path to the model file.
+        model_data (dict, optional): Model state from new_model_data(); defaults to trained_model_data.
+        with_counts (bool): Also load the counts (see read_trained_model).
+    Returns:
+        dict: The model metadata, as returned by install_trained_model.
+    """
+    return install_trained_model(read_trained_model(model_path, with_counts), model_data)
+
+
+def get_memory_usage(model_data=None):
+    """
+    Reports the memory held by the served model and by the whole process.
+    Args:
+        model_data (dict, optional): Model state from new_model_data(); defaults to trained_model_data.
+    Returns:
+        dict: 'model_bytes' (compiled tables and vocabularies), 'counts_bytes'
+              (the raw counts kept for incremental updates) and 'process_rss_bytes'.
+    """
+    model_data = trained_model_data if model_data is None else model_data
+    usage = {"model_bytes": 0, "counts_bytes": 0, "process_rss_bytes": Tools.get_process_rss()}
+    if model_data["compiled_model"] is not None:
+        usage["model_bytes"] = model_data["compiled_model"].memory_usage()
+    if model_data["counts"] is not None:
+        usage["counts_bytes"] = model_data["counts"].memory_usage()
+    return usage
+
+
+def get_model_status(model_data=None):
     """
     Returns the current status of the trained model.
+    Args:
+        model_data (dict, optional): Model state from new_model_data(); defaults to trained_model_data.
     """
-    if trained_model_data["percentage_of_values"] is None:
-        return {"status": "No model trained", "accuracy": None, "features": None, "target_column": None}
+    model_data = trained_model_data if model_data is None else model_data
+    if model_data["compiled_model"] is None:
+        return {"status": "No model trained", "accuracy": None, "features": None, "target_column": None,
+                "memory": get_memory_usage(model_data), "prediction_cache": model_data["prediction_cache"].get_stats()}
 
     return {
         "status": "Model trained",
-        "accuracy": trained_model_data["accuracy"],
-        "features": trained_model_data["features"],
-        "target_column": trained_model_data["target_column"]
+        "accuracy": model_data["accuracy"],
+        "features": model_data["compiled_model"].get_features(),
+        "target_column": model_data["target_column"],
+        "memory": get_memory_usage(model_data),
+        "prediction_cache": model_data["prediction_cache"].get_stats()
     }
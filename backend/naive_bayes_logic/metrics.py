@@ -0,0 +1,245 @@
+from bisect import bisect_left
+import threading
+import time
+
+# Default histogram bucket upper bounds in seconds, from 50 µs (a cached prediction) to 5 minutes (a large training run)
+DEFAULT_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", r"\\").replace("\n", r"\n").replace('"', r'\"') for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+class _Timer:
+    """
+    Context manager observing the time spent in its block into a histogram child.
+    A plain class rather than a generator-based context manager, as it sits on the prediction path.
+    """
+
+    __slots__ = ("_child", "_start")
+
+    def __init__(self, child):
+        self._child = child
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._child.observe(time.perf_counter() - self._start)
+        return False
+
+
+class _HistogramChild:
+    """
+    The series of a histogram for one combination of label values.
+    """
+
+    __slots__ = ("_upper_bounds", "_lock", "bucket_counts", "count", "sum")
+
+    def __init__(self, upper_bounds, lock):
+        self._upper_bounds = upper_bounds
+        self._lock = lock
+        self.bucket_counts = [0] * (len(upper_bounds) + 1)  # The last one is the +Inf bucket
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        """
+        Record one observation.
+        Args:
+            value (float): The observed value, e.g. a duration in seconds.
+        """
+        index = bisect_left(self._upper_bounds, value)
+        with self._lock:
+            self.bucket_counts[index] += 1
+            self.count += 1
+            self.sum += value
+
+    def time(self):
+        """
+        Returns:
+            _Timer: A context manager observing the duration of its block.
+        """
+        return _Timer(self)
+
+
+class Histogram:
+    """
+    A Prometheus histogram: per label combination, the number of observations at or below each
+    bucket bound, their count and their sum. Observing is a bisect and three increments under a lock.
+    """
+
+    def __init__(self, name, documentation, label_names=(), buckets=DEFAULT_BUCKETS):
+        """
+        Initialize the histogram.
+        Args:
+            name (str): Metric name.
+            documentation (str): Help text.
+            label_names (tuple): Names of the labels, given in this order to labels().
+            buckets (tuple): Increasing bucket upper bounds; the +Inf bucket is implied.
+        """
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.upper_bounds = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._children = {}
+
+    def labels(self, *label_values):
+        """
+        Get the series of a label combination, creating it on first use.
+        Keep the returned child to skip the lookup on hot paths.
+        Args:
+            *label_values: One value per label name, in order.
+        Raises:
+            ValueError: If the number of values does not match the label names.
+        Returns:
+            _HistogramChild: The series.
+        """
+        if len(label_values) != len(self.label_names):
+            raise ValueError(f"Metric '{self.name}' expects labels {self.label_names}, got {label_values}.")
+        key = tuple(str(value) for value in label_values)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, _HistogramChild(self.upper_bounds, self._lock))
+        return child
+
+    def collect(self):
+        """
+        Returns:
+            list: Lines of the Prometheus text exposition format.
+        """
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = [(key, list(child.bucket_counts), child.count, child.sum)
+                        for key, child in sorted(self._children.items())]
+        for key, bucket_counts, count, total in snapshot:
+            cumulative = 0
+            for upper_bound, bucket_count in zip(self.upper_bounds + (float("inf"),), bucket_counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.label_names, key, [("le", _format_value(upper_bound))])
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class Gauge:
+    """
+    A Prometheus gauge whose values are read when the metrics are collected, from a callback
+    returning {label values tuple: value}, so values already tracked elsewhere cost nothing between scrapes.
+    """
+
+    def __init__(self, name, documentation, label_names=(), metric_type="gauge", collect_values=None):
+        """
+        Initialize the gauge.
+        Args:
+            name (str): Metric name.
+            documentation (str): Help text.
+            label_names (tuple): Names of the labels.
+            metric_type (str): 'gauge', or 'counter' for values that only grow (e.g. cache hits).
+            collect_values (callable): Returns {label values tuple: value}; None values are skipped.
+        """
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.metric_type = metric_type
+        self.collect_values = collect_values
+
+    def collect(self):
+        """
+        Returns:
+            list: Lines of the Prometheus text exposition format.
+        """
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.metric_type}"]
+        for key, value in sorted(self.collect_values().items()):
+            if value is not None:
+                lines.append(f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    The metrics of a process, rendered together in the Prometheus text format.
+    With several server workers every worker keeps its own metrics; each one is scraped
+    as a separate target or the scraped samples are summed.
+    """
+
+    CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+    def __init__(self):
+        self._metrics = {}
+
+    def register(self, metric):
+        """
+        Add a metric to the registry.
+        Args:
+            metric (Histogram or Gauge): The metric.
+        Raises:
+            ValueError: If a metric with the same name is already registered.
+        Returns:
+            The metric.
+        """
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric '{metric.name}' is already registered.")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self):
+        """
+        Returns:
+            str: All metrics in the Prometheus text exposition format.
+        """
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.collect())
+        return "\n".join(lines) + "\n"
+
+
+class StageTimer:
+    """
+    Progress callback recording when every stage of a pipeline starts.
+    A stage reported several times (e.g. once per chunk) keeps its first start.
+    """
+
+    def __init__(self):
+        self.starts = {}
+
+    def __call__(self, stage, rows=None):
+        self.starts.setdefault(stage, time.perf_counter())
+
+    def get_durations(self, end=None):
+        """
+        Get the duration of every stage, each one lasting until the next one starts.
+        Args:
+            end (float, optional): perf_counter value when the pipeline finished; defaults to now.
+        Returns:
+            dict: Stage name -> seconds, in stage order.
+        """
+        end = time.perf_counter() if end is None else end
+        stages = sorted(self.starts.items(), key=lambda item: item[1])
+        ends = [start for _, start in stages[1:]] + [end]
+        return {stage: stop - start for (stage, start), stop in zip(stages, ends)}
+
+
+# Metrics shared by the workflows and the API of this process
+registry = MetricsRegistry()
+
+STAGE_SECONDS = registry.register(Histogram(
+    "naive_bayes_stage_duration_seconds",
+    "Time spent in each stage of the training and prediction workflows.",
+    ("workflow", "stage")))
@@ -0,0 +1,87 @@
+import hashlib
+import json
+import os
+
+
+class ModelCache:
+    """
+    Small on-disk cache of trained model files, keyed by the content hash of the
+    uploaded dataset plus the training parameters. Re-uploading an identical
+    dataset can then reuse the model instead of retraining it.
+    The least recently used files are evicted once there are more than max_entries.
+    """
+
+    FILE_SUFFIX = ".nbm"
+
+    def __init__(self, directory, max_entries=8):
+        """
+        Initialize the cache.
+        Args:
+            directory (str): Directory the cached model files are kept in.
+            max_entries (int): Maximum number of cached models. 0 disables the cache.
+        """
+        self.directory = directory
+        self.max_entries = max_entries
+        if max_entries > 0:
+            os.makedirs(directory, exist_ok=True)
+
+    def get_key(self, content_hash, params):
+        """
+        Build the cache key of a dataset and its training parameters.
+        Args:
+            content_hash (str): Hex digest of the uploaded file.
+            params (dict): JSON-serializable training parameters that affect the model.
+        Returns:
+            str: The cache key.
+        """
+        payload = json.dumps({"content": content_hash, "params": params}, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get_path(self, key):
+        """
+        Get the file path a key is (or would be) cached at.
+        """
+        return os.path.join(self.directory, key + self.FILE_SUFFIX)
+
+    def lookup(self, key):
+        """
+        Look up a cached model and mark it as recently used.
+        Args:
+            key (str): The cache key.
+        Returns:
+            str: Path of the cached model file, or None on a miss.
+        """
+        if self.max_entries <= 0:
+            return None
+        path = self.get_path(key)
+        try:
+            os.utime(path)  # The modification time records recency
+        except FileNotFoundError:
+            return None
+        return path
+
+    def evict(self):
+        """
+        Remove the least recently used model files beyond max_entries.
+        Returns:
+            int: Number of files removed.
+        """
+        if self.max_entries <= 0:
+            return 0
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(self.FILE_SUFFIX):
+                path = os.path.join(self.directory, name)
+                try:
+                    entries.append((os.path.getmtime(path), path))
+                except FileNotFoundError:
+                    continue
+        entries.sort()
+        removed = 0
+        for _, path in entries[:max(0, len(entries) - self.max_entries)]:
+            try:
+                os.remove(path)
+                removed += 1
+            except FileNotFoundError:
+                pass
+        return removed
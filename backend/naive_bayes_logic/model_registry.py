@@ -0,0 +1,183 @@
+from naive_bayes_logic.management import new_model_data, install_trained_model, save_trained_model, \
+    load_trained_model
+from naive_bayes_logic.model_store import ModelStore
+from collections import OrderedDict
+import os
+import re
+import threading
+
+
+class ModelRegistry:
+    """
+    Named models served next to each other, e.g. one per tenant or target.
+    Every model is saved to its own file when it changes, so the in-memory registry is
+    only a cache of those files: when the loaded models exceed the memory budget, the
+    least recently used ones are dropped and loaded again on their next use.
+    A file replaced by another worker is picked up the same way as the default model's.
+    The API calls it from the thread pool, since it reads and writes model files; a lock guards
+    the bookkeeping of the loaded models, never the file I/O.
+    """
+
+    NAME_PATTERN = re.compile(r"[A-Za-z0-9][A-Za-z0-9_.-]{0,63}")
+    FILE_SUFFIX = ".nbm"
+
+    def __init__(self, directory, memory_budget_bytes=512 * 1024 * 1024):
+        """
+        Initialize the registry.
+        Args:
+            directory (str): Directory the model files are kept in.
+            memory_budget_bytes (int): Memory the loaded models may hold together. The most
+                recently used model is always kept, even if it exceeds the budget on its own.
+        """
+        self.directory = directory
+        self.memory_budget_bytes = memory_budget_bytes
+        self._loaded = OrderedDict()  # name -> (model state, file signature), least recently used first
+        self._lock = threading.RLock()
+        self.loads = 0
+        self.evictions = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def check_name(self, name):
+        """
+        Validate a model name, which is also its file name.
+        Raises:
+            ValueError: If the name is not 1-64 letters, digits, '_', '.' or '-', starting with a letter or digit.
+        """
+        if not self.NAME_PATTERN.fullmatch(name):
+            raise ValueError(f"Invalid model name '{name}'. Use up to 64 letters, digits, '_', '.' or '-', "
+                             f"starting with a letter or digit.")
+
+    def get_path(self, name):
+        """
+        Get the file path of a named model.
+        """
+        return os.path.join(self.directory, name + self.FILE_SUFFIX)
+
+    def get(self, name):
+        """
+        Get the state of a named model, loading it from its file if it is not loaded or has changed on disk.
+        Args:
+            name (str): The model name.
+        Raises:
+            ValueError: If the name is invalid.
+            KeyError: If there is no model with this name.
+        Returns:
+            dict: The model state, for the management workflows.
+        """
+        self.check_name(name)
+        try:
+            signature = ModelStore.get_signature(os.stat(self.get_path(name)))
+        except FileNotFoundError:
+            with self._lock:
+                self._loaded.pop(name, None)
+            raise KeyError(f"Unknown model '{name}'.")
+
+        with self._lock:
+            entry = self._loaded.get(name)
+            if entry is not None and entry[1] == signature:
+                self._loaded.move_to_end(name)
+                return entry[0]
+            self.loads += 1
+
+        model_data = entry[0] if entry is not None else new_model_data()
+        load_trained_model(self.get_path(name), model_data)
+        self._remember(name, model_data, signature)
+        return model_data
+
+    def install(self, name, trained):
+        """
+        Make a freshly trained model the named model and save it.
+        Args:
+            name (str): The model name.
+            trained (dict): The output of run_training.
+        Returns:
+            dict: The model metadata, as returned by install_trained_model.
+        """
+        self.check_name(name)
+        with self._lock:
+            entry = self._loaded.get(name)
+        model_data = entry[0] if entry is not None else new_model_data()
+        result = install_trained_model(trained, model_data)
+        self._remember(name, model_data, ModelStore.get_signature(save_trained_model(self.get_path(name), model_data)))
+        return result
+
+    def install_file(self, name, model_path):
+        """
+        Make a saved model file (e.g. from the model cache) the named model.
+        Args:
+            name (str): The model name.
+            model_path (str): Path to the model file.
+        Returns:
+            dict: The model metadata, as returned by install_trained_model.
+        """
+        self.check_name(name)
+        with self._lock:
+            entry = self._loaded.get(name)
+        model_data = entry[0] if entry is not None else new_model_data()
+        result = load_trained_model(model_path, model_data)
+        self._remember(name, model_data, ModelStore.get_signature(save_trained_model(self.get_path(name), model_data)))
+        return result
+
+    def _remember(self, name, model_data, signature):
+        with self._lock:
+            self._loaded[name] = (model_data, signature)
+            self._loaded.move_to_end(name)
+            self.evict()
+
+    @staticmethod
+    def get_model_bytes(model_data):
+        """
+        Estimate the memory held by a loaded model.
+        """
+        return model_data["compiled_model"].memory_usage() + model_data["counts"].memory_usage()
+
+    def get_memory_usage(self):
+        """
+        Returns:
+            int: Approximate memory in bytes held by the loaded models together.
+        """
+        with self._lock:
+            return sum(self.get_model_bytes(model_data) for model_data, _ in self._loaded.values())
+
+    def evict(self):
+        """
+        Drop the least recently used models until the loaded ones fit in the memory budget.
+        Their files stay on disk, so they are loaded again on their next use.
+        Returns:
+            list: Names of the evicted models.
+        """
+        evicted = []
+        with self._lock:
+            memory = self.get_memory_usage()
+            while memory > self.memory_budget_bytes and len(self._loaded) > 1:
+                name, (model_data, _) = self._loaded.popitem(last=False)
+                memory -= self.get_model_bytes(model_data)
+                evicted.append(name)
+            self.evictions += len(evicted)
+        return evicted
+
+    def list_models(self):
+        """
+        Returns:
+            list: Names of all models on disk, sorted.
+        """
+        return sorted(entry[:-len(self.FILE_SUFFIX)] for entry in os.listdir(self.directory)
+                      if entry.endswith(self.FILE_SUFFIX) and self.NAME_PATTERN.fullmatch(entry[:-len(self.FILE_SUFFIX)]))
+
+    def get_stats(self):
+        """
+        Get the registry state.
+        Returns:
+            dict: 'models' (all names), 'loaded' (loaded names, least recently used first),
+                  'memory_bytes', 'memory_budget_bytes', 'loads' and 'evictions'.
+        """
+        models = self.list_models()
+        with self._lock:
+            return {
+                "models": models,
+                "loaded": list(self._loaded),
+                "memory_bytes": self.get_memory_usage(),
+                "memory_budget_bytes": self.memory_budget_bytes,
+                "loads": self.loads,
+                "evictions": self.evictions
+            }
@@ -0,0 +1,171 @@
+from naive_bayes_logic.compiled_model import CompiledModel
+from naive_bayes_logic.feature_hashing import FeatureHashing
+from naive_bayes_logic.numeric_bins import NumericBins
+from naive_bayes_logic.sparse_table import SparseTable
+import json
+import os
+import struct
+import tempfile
+import numpy as np
+
+# File layout:
+#   8-byte magic, uint32 format version, uint32 header length   (little-endian)
+#   JSON header: metadata, vocabularies, numeric bins, hashed columns, the shapes of the sparse tables
+#   and the offset/shape/dtype of every array
+#   padding up to ARRAY_ALIGNMENT, then the raw arrays, each aligned to ARRAY_ALIGNMENT
+# A feature whose compiled table is sparse stores its stored cells once (sparse/<position>/indptr and
+# indices), and its count and log-probability tables hold the values of these cells only.
+# Arrays are read back with np.memmap, so loading costs no copy and processes that load
+# the same file share its pages through the OS page cache.
+MAGIC = b"NBMODEL\x00"
+FORMAT_VERSION = 4
+# Older files load as models without what their header lacks: numeric bins (version 1), hashed columns
+# (1 and 2) and sparse tables (1 to 3)
+SUPPORTED_VERSIONS = (1, 2, 3, 4)
+ARRAY_ALIGNMENT = 64
+_PREAMBLE = struct.Struct("<8sII")
+
+
+def _aligned(offset):
+    return -(-offset // ARRAY_ALIGNMENT) * ARRAY_ALIGNMENT
+
+
+def save_model(path, compiled_model, counts, metadata=None):
+    """
+    Writes the model to a versioned binary file. The file is written next to its
+    destination and renamed into place, so readers never see a partial file and
+    processes that still map the previous version keep a valid mapping.
+    Args:
+        path (str): Destination file path.
+        compiled_model (CompiledModel): The compiled model.
+        counts (CountAccumulator): The counts the compiled model was built from.
+        metadata (dict, optional): JSON-serializable model metadata (accuracy, metrics, ...).
+    Raises:
+        ValueError: If the sparse count and log-probability tables of a feature store different cells.
+    Returns:
+        os.stat_result: Stat of the written file, which identifies this version of it.
+    """
+    arrays = {
+        "class_counts": np.ascontiguousarray(counts.class_counts, dtype=np.int64),
+        "log_priors": np.ascontiguousarray(compiled_model.log_priors, dtype=np.float64),
+        "fallback_log_probs": np.ascontiguousarray(compiled_model.fallback_log_probs, dtype=np.float64),
+    }
+    sparse_shapes = {}
+    for position in range(len(counts.feature_names)):
+        log_table = compiled_model.log_tables[position]
+        count_table = counts.counts[position]
+        if isinstance(log_table, SparseTable):
+            # The log table was built from the cells of the counts, so both store the same cells
+            if not isinstance(count_table, SparseTable):
+                count_table = SparseTable.from_dense(count_table)
+            if not np.array_equal(count_table.indptr, log_table.indptr):
+                raise ValueError(f"The counts of feature '{counts.feature_names[position]}' "
+                                 "do not match the compiled model.")
+            sparse_shapes[str(position)] = list(log_table.shape)
+            arrays[f"sparse/{position}/indptr"] = np.ascontiguousarray(log_table.indptr, dtype=np.int64)
+            arrays[f"sparse/{position}/indices"] = np.ascontiguousarray(log_table.indices, dtype=np.int32)
+            count_table, log_table = count_table.data, log_table.data
+        arrays[f"counts/{position}"] = np.ascontiguousarray(SparseTable.as_dense(count_table), dtype=np.int64)
+        arrays[f"log_tables/{position}"] = np.ascontiguousarray(log_table, dtype=np.float64)
+
+    layout = {}
+    offset = 0
+    for name, array in arrays.items():
+        offset = _aligned(offset)
+        layout[name] = {"offset": offset, "shape": list(array.shape), "dtype": array.dtype.str}
+        offset += array.nbytes
+
+    header = json.dumps({
+        "metadata": metadata or {},
+        "target_column": counts.target_column,
+        "feature_names": counts.feature_names,
+        "class_labels": counts.class_labels,
+        "vocabularies": [list(vocabulary) for vocabulary in counts.vocabularies],
+        "numeric_bins": compiled_model.numeric_bins.to_json(),
+        "feature_hashing": compiled_model.feature_hashing.to_json(),
+        "sparse_tables": sparse_shapes,
+        "arrays": layout
+    }).encode("utf-8")
+    data_start = _aligned(_PREAMBLE.size + len(header))
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(_PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(header)))
+            handle.write(header)
+            for name, array in arrays.items():
+                handle.seek(data_start + layout[name]["offset"])
+                handle.write(array.tobytes())
+            handle.truncate(data_start + offset)
+        os.chmod(temp_path, 0o644)
+        stat_result = os.stat(temp_path)  # Renaming keeps the inode and modification time
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return stat_result
+
+
+def load_model(path, with_counts=True):
+    """
+    Loads a model file written by save_model, memory-mapping its arrays read-only.
+    Args:
+        path (str): Path to the model file.
+        with_counts (bool): Also load the counts, which are only needed to update or save the model.
+            Without them, loading needs neither pandas nor the training modules.
+    Raises:
+        ValueError: If the file is not a model file or has an unsupported format version.
+    Returns:
+        tuple: (CompiledModel, CountAccumulator or None, metadata dict). The metadata also
+               holds the 'target_column' of the model.
+    """
+    with open(path, "rb") as handle:
+        magic, version, header_length = _PREAMBLE.unpack(handle.read(_PREAMBLE.size))
+        if magic != MAGIC:
+            raise ValueError(f"'{path}' is not a Naive Bayes model file.")
+        if version not in SUPPORTED_VERSIONS:
+            raise ValueError(f"Unsupported model format version {version} (expected one of {SUPPORTED_VERSIONS}).")
+        header = json.loads(handle.read(header_length).decode("utf-8"))
+    data_start = _aligned(_PREAMBLE.size + header_length)
+
+    mapped = np.memmap(path, dtype=np.uint8, mode="r")
+
+    def array(name):
+        spec = header["arrays"][name]
+        dtype = np.dtype(spec["dtype"])
+        count = int(np.prod(spec["shape"], dtype=np.int64))
+        return np.frombuffer(mapped, dtype=dtype, count=count,
+                             offset=data_start + spec["offset"]).reshape(spec["shape"])
+
+    sparse_shapes = header.get("sparse_tables", {})
+
+    def table(kind, position):
+        data = array(f"{kind}/{position}")
+        if str(position) not in sparse_shapes:
+            return data
+        return SparseTable(sparse_shapes[str(position)], array(f"sparse/{position}/indptr"),
+                           array(f"sparse/{position}/indices"), data)
+
+    def vocabularies():
+        return [{value: index for index, value in enumerate(values)} for values in header["vocabularies"]]
+
+    # The compiled model is always derived from the counts, so both share labels and vocabularies;
+    # each still gets its own dicts because the counts grow theirs in place when data is appended
+    n_features = len(header["feature_names"])
+    numeric_bins = NumericBins(header.get("numeric_bins"))
+    feature_hashing = FeatureHashing(header.get("feature_hashing"))
+    counts = None
+    if with_counts:
+        from naive_bayes_logic.count_accumulator import CountAccumulator
+        counts = CountAccumulator.from_arrays(
+            header["target_column"], header["feature_names"], header["class_labels"], array("class_counts"),
+            vocabularies(), [table("counts", position) for position in range(n_features)],
+            numeric_bins=numeric_bins, feature_hashing=feature_hashing)
+    compiled_model = CompiledModel(
+        header["class_labels"], array("log_priors"), header["feature_names"], vocabularies(),
+        [table("log_tables", position) for position in range(n_features)], array("fallback_log_probs"),
+        numeric_bins, feature_hashing)
+    return compiled_model, counts, {**header["metadata"], "target_column": header["target_column"]}
@@ -0,0 +1,107 @@
+from contextlib import contextmanager, asynccontextmanager
+import asyncio
+import os
+import time
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows; updates are then not serialized across processes
+    fcntl = None
+
+
+class ModelStore:
+    """
+    The model file shared by all worker processes on a host.
+    Every save replaces the file atomically with a new inode, so a worker detects a
+    new version with a single stat call and remaps it; readers of the old version keep
+    a valid mapping until they are done with it.
+    """
+
+    # Time between two attempts to take the lock from the event loop
+    LOCK_RETRY_SECONDS = 0.05
+
+    def __init__(self, path, check_interval_ms=0.0):
+        """
+        Initialize the store.
+        Args:
+            path (str): Path of the shared model file.
+            check_interval_ms (float): Minimum time between two checks for a new version. 0 checks on every call.
+        """
+        self.path = path
+        self.check_interval_ms = check_interval_ms
+        self.loaded_signature = None
+        self._last_check = 0.0
+
+    @staticmethod
+    def get_signature(stat_result):
+        """
+        Identify a version of the model file from its stat result.
+        Returns:
+            tuple: (inode, modification time in ns, size).
+        """
+        return stat_result.st_ino, stat_result.st_mtime_ns, stat_result.st_size
+
+    def changed(self):
+        """
+        Check whether the file holds another version than the one loaded by this process.
+        Returns:
+            tuple: The signature of the new version, or None if there is nothing new to load.
+        """
+        now = time.monotonic()
+        if self.check_interval_ms and (now - self._last_check) * 1000 < self.check_interval_ms:
+            return None
+        self._last_check = now
+        try:
+            signature = self.get_signature(os.stat(self.path))
+        except FileNotFoundError:
+            return None
+        return None if signature == self.loaded_signature else signature
+
+    def mark_loaded(self, signature):
+        """
+        Record the version this process now serves, either loaded from or just written to the file.
+        Args:
+            signature (tuple): Signature of that version.
+        """
+        self.loaded_signature = signature
+
+    @contextmanager
+    def lock(self):
+        """
+        Hold an exclusive lock across processes, for read-modify-write updates of the model
+        such as appending data, so concurrent updates in different workers are not lost.
+        """
+        if fcntl is None:
+            yield
+            return
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        with open(self.path + ".lock", "a") as handle:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+    @asynccontextmanager
+    async def async_lock(self):
+        """
+        Same lock as lock(), taken from the event loop. While another process holds it, the lock is
+        retried every LOCK_RETRY_SECONDS without blocking, so the loop keeps serving other requests.
+        """
+        if fcntl is None:
+            yield
+            return
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        with open(self.path + ".lock", "a") as handle:
+            while True:
+                try:
+                    fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    break
+                except BlockingIOError:
+                    await asyncio.sleep(self.LOCK_RETRY_SECONDS)
+            try:
+                yield
+            finally:
+                fcntl.flock(handle, fcntl.LOCK_UN)
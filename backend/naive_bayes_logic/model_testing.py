@@ -1,5 +1,5 @@
-from naive_bayes_logic.classifier import Classifier
 from naive_bayes_logic.tools import Tools
+import numpy as np
 import pandas as pd  # Added for type hinting and potential DataFrame operations
 
 
@@ -8,45 +8,62 @@ class ModelTesting:
     Class to test a trained model's accuracy on a test dataframe.
     """
 
-    def __init__(self, test_df, percentage_of_values, train_df):  # Added train_df
+    def __init__(self, test_df, compiled_model):
         """
-        Initialize with test data and precomputed feature value percentages.
+        Initialize with test data and the compiled model.
         Args:
-            test_df (pd.DataFrame): The testing dataframe.
-            percentage_of_values (dict): Nested dictionary of feature probabilities.
-            train_df (pd.DataFrame): The training dataframe, needed for Classifier initialization.
+            test_df (pd.DataFrame): The testing dataframe. May be None when the
+                test set is streamed in with evaluate_chunk instead.
+            compiled_model (CompiledModel): The compiled model to evaluate.
         """
         self.test_df = test_df
-        self.percentage_of_values = percentage_of_values
+        self.compiled_model = compiled_model
         self.correct = 0
+        self.total = 0
         self.accuracy = 0.0
-        # Pass train_df to Classifier as it needs it to determine target column and class counts
-        self.classifier = Classifier(train_df, self.percentage_of_values)
+        self.confusion_matrix = np.zeros((len(compiled_model.class_labels),) * 2, dtype=np.int64)
 
     def evaluate_model_accuracy(self):
         """
-        Evaluate the model accuracy by predicting each row and
-        comparing with actual labels. Stores the accuracy as a percentage.
+        Evaluate the model accuracy by scoring the whole test set in one pass and
+        comparing with actual labels. Stores the accuracy as a percentage and the
+        confusion matrix (rows are actual classes, columns are predicted classes).
         """
-        total = len(self.test_df)
-        # Ensure feature columns are correctly identified, excluding the target column
-        label_column = Tools.get_the_target_column(self.test_df)
-        features = [col for col in self.test_df.columns if col != label_column]
+        self.evaluate_chunk(self.test_df)
 
-        for index, row in self.test_df.iterrows():  # Use iterrows for easier dict conversion
-            row_dict = {feature: str(row[feature]) for feature in features}  # Convert values to string
-            self.classifier.predict(row_dict)
-            prediction_result = self.classifier.get_prediction()
-            prediction = prediction_result['prediction']
-            actual = str(row[label_column])  # Convert actual to string for consistent comparison
+    def evaluate_chunk(self, test_chunk):
+        """
+        Score a chunk of test rows and add its results to the running totals.
+        Args:
+            test_chunk (pd.DataFrame): Test rows, with the target as the last column.
+        """
+        if len(test_chunk) == 0:
+            return
 
-            if prediction == actual:
-                self.correct += 1
+        label_column = Tools.get_the_target_column(test_chunk)
+        codes = self.compiled_model.encode_columns(test_chunk)
+        predicted = np.argmax(self.compiled_model.log_scores(codes), axis=1)
 
-        if total > 0:
-            self.accuracy = self.correct / total * 100
+        # Convert actual labels to strings for consistent comparison; labels never seen in training get -1
+        class_labels = self.compiled_model.class_labels
+        class_index = pd.Index(class_labels)
+        labels = test_chunk[label_column]
+        if isinstance(labels.dtype, pd.CategoricalDtype):
+            # Look up each category once; missing labels (code -1) pick the trailing 'nan' entry
+            category_index = class_index.get_indexer(list(labels.cat.categories.astype(str)) + ["nan"])
+            actual = category_index[labels.cat.codes.to_numpy()]
         else:
-            self.accuracy = 0.0  # Handle empty test_df case
+            actual = class_index.get_indexer(labels.astype(str))
+
+        self.correct += int(np.count_nonzero(predicted == actual))
+        self.total += len(test_chunk)
+        self.accuracy = self.correct / self.total * 100
+
+        known = actual >= 0
+        n_classes = len(class_labels)
+        self.confusion_matrix += np.bincount(
+            actual[known] * n_classes + predicted[known], minlength=n_classes * n_classes
+        ).reshape(n_classes, n_classes)
 
     def get_model_accuracy(self):
         """
@@ -57,3 +74,34 @@ class ModelTesting:
         # No printing to terminal in API context
         # print(f"The accuracy is {self.accuracy:.0f}%")
         return self.accuracy
+
+    def get_confusion_matrix(self):
+        """
+        Return the confusion matrix of the last evaluation.
+        Returns:
+            dict: {actual_class: {predicted_class: count}}.
+        """
+        class_labels = self.compiled_model.class_labels
+        return {
+            actual: {predicted: int(self.confusion_matrix[i, j]) for j, predicted in enumerate(class_labels)}
+            for i, actual in enumerate(class_labels)
+        }
+
+    def get_class_metrics(self):
+        """
+        Return per-class precision and recall derived from the confusion matrix.
+        Classes that were never predicted (or never present) get 0.0.
+        Returns:
+            dict: {class: {"precision": float, "recall": float}}.
+        """
+        true_positives = np.diag(self.confusion_matrix).astype(np.float64)
+        predicted_totals = self.confusion_matrix.sum(axis=0)
+        actual_totals = self.confusion_matrix.sum(axis=1)
+        precision = np.divide(true_positives, predicted_totals,
+                              out=np.zeros_like(true_positives), where=predicted_totals > 0)
+        recall = np.divide(true_positives, actual_totals,
+                           out=np.zeros_like(true_positives), where=actual_totals > 0)
+        return {
+            label: {"precision": float(precision[i]), "recall": float(recall[i])}
+            for i, label in enumerate(self.compiled_model.class_labels)
+        }
@@ -0,0 +1,202 @@
+import numpy as np
+
+# Bin index of a missing value and of a value that is not a number
+MISSING_BIN = -1
+INVALID_BIN = -2
+
+
+def _parse_number(value):
+    """
+    Parse one value as a float. Returns NaN for a missing value and None for a value that is not a number.
+    """
+    if value is None:
+        return np.nan
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _format_edge(edge):
+    text = repr(float(edge))
+    return text[:-2] if text.endswith(".0") else text
+
+
+class NumericBins:
+    """
+    Quantile bins of the numeric feature columns of a model.
+    A numeric column is counted as a categorical column of its bins, so model size grows with
+    the number of bins (classes x bins), not with the number of distinct values, and every
+    number, seen in training or not, falls into a bin with real counts. Bins are right-closed
+    intervals; the first and last are open-ended. Numeric columns are detected at ingest
+    (InformationCleaning), which converts them to floats. Scoring only needs NumericBins and NumPy.
+    """
+
+    # Default detection threshold: columns with this many distinct numbers or fewer (codes, ratings,
+    # small counts) stay categorical
+    MIN_DISTINCT_VALUES = 20
+
+    # Number of quantile bins of a numeric column (fewer when its values are heavily tied)
+    DEFAULT_BINS = 10
+
+    def __init__(self, edges=None):
+        """
+        Initialize from the bin edges of every numeric column.
+        Args:
+            edges (dict, optional): Column name -> increasing interior bin edges.
+        """
+        self.edges = {column: np.asarray(column_edges, dtype=np.float64)
+                      for column, column_edges in (edges or {}).items()}
+        self._labels = {column: self._make_labels(column_edges) for column, column_edges in self.edges.items()}
+
+    def __eq__(self, other):
+        return (isinstance(other, NumericBins) and self.edges.keys() == other.edges.keys()
+                and all(np.array_equal(self.edges[column], other.edges[column]) for column in self.edges))
+
+    def __contains__(self, column):
+        return column in self.edges
+
+    @staticmethod
+    def _make_labels(edges):
+        bounds = ["-inf"] + [_format_edge(edge) for edge in edges] + ["inf"]
+        return [f"({lower}, {upper}]" if upper != "inf" else f"({lower}, inf)"
+                for lower, upper in zip(bounds[:-1], bounds[1:])]
+
+    @staticmethod
+    def to_numbers(values):
+        """
+        Convert a column to floats, telling missing values apart from values that are not numbers.
+        Category columns are converted from their categories, once per category.
+        Args:
+            values: Column values (list, np.ndarray or pd.Series).
+        Returns:
+            tuple: (float np.ndarray with NaN where missing or invalid, bool np.ndarray flagging invalid values).
+        """
+        if hasattr(values, "cat"):
+            numbers, invalid = NumericBins.to_numbers(np.asarray(values.cat.categories, dtype=object))
+            codes = values.cat.codes.to_numpy()
+            # Missing values have code -1, which picks the appended NaN
+            return np.append(numbers, np.nan)[codes], np.append(invalid, False)[codes]
+        array = np.asarray(values)
+        if array.dtype.kind in "iuf":
+            return array.astype(np.float64, copy=False), np.zeros(len(array), dtype=bool)
+        try:
+            numbers = array.astype(np.float64)
+            return numbers, np.zeros(len(array), dtype=bool)
+        except (TypeError, ValueError):
+            parsed = [_parse_number(value) for value in array.tolist()]
+            invalid = np.array([number is None for number in parsed], dtype=bool)
+            numbers = np.array([np.nan if number is None else number for number in parsed], dtype=np.float64)
+            return numbers, invalid
+
+    @staticmethod
+    def is_numeric(values, min_distinct=MIN_DISTINCT_VALUES):
+        """
+        Tell whether a column holds numbers only, with more than min_distinct distinct ones.
+        Boolean columns are not numeric.
+        Args:
+            values: Column values (np.ndarray or pd.Series).
+            min_distinct (int): Number of distinct numbers a column must exceed to be binned.
+        Returns:
+            bool: True if the column should be binned.
+        """
+        if hasattr(values, "cat"):
+            categories = np.asarray(values.cat.categories, dtype=object)
+            if len(categories) <= min_distinct:
+                return False
+            values = categories
+        array = np.asarray(values)
+        if array.dtype.kind == "b":
+            return False
+        if array.dtype.kind not in "iuf":
+            try:
+                array = array.astype(np.float64)
+            except (TypeError, ValueError):
+                return False
+        return len(np.unique(array[~np.isnan(array)] if array.dtype.kind == "f" else array)) > min_distinct
+
+    @classmethod
+    def fit(cls, df, columns, n_bins=DEFAULT_BINS):
+        """
+        Compute the quantile bin edges of the numeric columns of a dataframe, in one pass over each of them.
+        The numeric columns are the ones converted to floats at ingest (see InformationCleaning).
+        Args:
+            df (pd.DataFrame): Data the bins are estimated from, e.g. the first training chunk.
+            columns (list): Feature columns to consider; those with a float dtype are binned.
+            n_bins (int): Number of bins per numeric column.
+        Returns:
+            NumericBins: The bins of the numeric columns (none if no column is numeric).
+        """
+        edges = {}
+        for column in columns:
+            if df[column].dtype.kind != "f":
+                continue
+            numbers, _ = cls.to_numbers(df[column])
+            numbers = numbers[~np.isnan(numbers)]
+            quantiles = np.quantile(numbers, np.linspace(0, 1, n_bins + 1)[1:-1])
+            # Rounded to 10 significant digits, so interpolation noise (29.590000000000018) stays out of the labels
+            edges[column] = np.unique([float(f"{quantile:.10g}") for quantile in quantiles])
+        return cls(edges)
+
+    def get_labels(self, column):
+        """
+        Get the bin labels of a numeric column, in bin order; they are its values in the model.
+        Args:
+            column (str): A numeric column.
+        Returns:
+            list: Interval labels such as '(-inf, 23]', '(23, 31.5]', ..., '(67, inf)'.
+        """
+        return self._labels[column]
+
+    def bin_indices(self, column, values):
+        """
+        Find the bin of every value of a numeric column.
+        Args:
+            column (str): A numeric column.
+            values: Column values (list, np.ndarray or pd.Series).
+        Returns:
+            np.ndarray: Bin index of every value; MISSING_BIN for missing values, INVALID_BIN for non-numbers.
+        """
+        numbers, invalid = self.to_numbers(values)
+        indices = np.searchsorted(self.edges[column], numbers, side="left")
+        indices[np.isnan(numbers)] = MISSING_BIN
+        indices[invalid] = INVALID_BIN
+        return indices
+
+    def get_label(self, column, value):
+        """
+        Get the bin label of a single value of a numeric column.
+        Args:
+            column (str): A numeric column.
+            value: The value.
+        Returns:
+            str: The bin label, 'nan' for a missing value, or None if the value is not a number.
+        """
+        number = _parse_number(value)
+        if number is None:
+            return None
+        if np.isnan(number):
+            return "nan"
+        return self._labels[column][int(np.searchsorted(self.edges[column], number, side="left"))]
+
+    def to_categorical(self, column, values):
+        """
+        Replace the values of a numeric column with their bin labels, for counting.
+        Values that are not numbers are counted as missing.
+        Args:
+            column (str): A numeric column.
+            values (pd.Series): Column values.
+        Returns:
+            pd.Series: Category column of bin labels, with the same index.
+        """
+        import pandas as pd
+        indices = self.bin_indices(column, values)
+        indices[indices == INVALID_BIN] = MISSING_BIN
+        return pd.Series(pd.Categorical.from_codes(indices, categories=self._labels[column]), index=values.index)
+
+    def to_json(self):
+        """
+        Returns:
+            dict: Column name -> list of edges, for saving with the model.
+        """
+        return {column: column_edges.tolist() for column, column_edges in self.edges.items()}
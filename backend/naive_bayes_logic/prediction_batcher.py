@@ -0,0 +1,112 @@
+from collections import deque
+import asyncio
+import time
+import numpy as np
+
+
+class PredictionBatcher:
+    """
+    Collects single-record prediction requests that arrive within a short window and
+    scores them as one batch, resolving each caller's future with its own result.
+    A batch is flushed when the window of its first request expires or when it is full,
+    whichever comes first. Everything runs on the event loop, so no locking is needed.
+    """
+
+    # Number of recent queueing delays kept for the latency percentiles
+    LATENCY_SAMPLES = 10_000
+
+    def __init__(self, score_batch, max_batch_size=64, max_wait_ms=2.0):
+        """
+        Initialize the batcher.
+        Args:
+            score_batch (callable): Called with a list of records; returns one result or
+                exception per record. An exception it raises fails the whole batch.
+            max_batch_size (int): Largest number of records scored together.
+            max_wait_ms (float): Longest time the first request of a batch waits for others.
+        """
+        self.score_batch = score_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self._pending = []
+        self._timer = None
+        self.batches = 0
+        self.requests = 0
+        self.batch_size_histogram = {}
+        self.queue_waits_ms = deque(maxlen=self.LATENCY_SAMPLES)
+        self.max_queue_wait_ms = 0.0
+
+    async def submit(self, record):
+        """
+        Queue a record for the next batch and wait for its result.
+        Must be called from the running event loop.
+        Args:
+            record: The record to score.
+        Raises:
+            Exception: Whatever score_batch returned or raised for this record.
+        Returns:
+            The result of the record.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((record, future, time.perf_counter()))
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait_ms / 1000, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        flushed_at = time.perf_counter()
+        self._record(len(batch), [(flushed_at - queued_at) * 1000 for _, _, queued_at in batch])
+        try:
+            results = self.score_batch([record for record, _, _ in batch])
+        except Exception as e:
+            results = [e] * len(batch)
+        for (_, future, _), result in zip(batch, results):
+            if future.done():  # The caller went away (e.g. the request was cancelled)
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    def _record(self, batch_size, queue_waits_ms):
+        self.batches += 1
+        self.requests += batch_size
+        # Power-of-two buckets: a batch of 5 is counted under "8" (5 to 8 records)
+        bucket = str(1 << (batch_size - 1).bit_length())
+        self.batch_size_histogram[bucket] = self.batch_size_histogram.get(bucket, 0) + 1
+        self.queue_waits_ms.extend(queue_waits_ms)
+        self.max_queue_wait_ms = max(self.max_queue_wait_ms, max(queue_waits_ms))
+
+    def get_stats(self):
+        """
+        Get the batching metrics.
+        Returns:
+            dict: 'max_batch_size', 'max_wait_ms', 'batches', 'requests', 'mean_batch_size',
+                  'batch_size_histogram' (batches per power-of-two size bucket, keyed by its upper bound)
+                  and 'queue_wait_ms' (mean, p50, p95 and p99 over recent requests, and the overall max).
+        """
+        waits = np.fromiter(self.queue_waits_ms, dtype=np.float64)
+        if len(waits):
+            p50, p95, p99 = np.percentile(waits, [50, 95, 99]).tolist()
+            queue_wait = {"mean": float(waits.mean()), "p50": p50, "p95": p95, "p99": p99}
+        else:
+            queue_wait = {"mean": None, "p50": None, "p95": None, "p99": None}
+        queue_wait["max"] = self.max_queue_wait_ms
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_ms,
+            "batches": self.batches,
+            "requests": self.requests,
+            "mean_batch_size": self.requests / self.batches if self.batches else None,
+            "batch_size_histogram": dict(sorted(self.batch_size_histogram.items(), key=lambda item: int(item[0]))),
+            "queue_wait_ms": queue_wait
+        }
@@ -0,0 +1,87 @@
+from collections import OrderedDict
+import threading
+
+
+class PredictionCache:
+    """
+    Bounded LRU cache of prediction results, keyed by the tuple of encoded feature values.
+    Entries belong to one model version: looking up with a different version empties the
+    cache first, so a retrained or updated model never serves stale results.
+    """
+
+    def __init__(self, max_size=1024):
+        """
+        Initialize an empty cache.
+        Args:
+            max_size (int): Maximum number of cached results. 0 disables the cache.
+        """
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._version = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _check_version(self, version):
+        if version != self._version:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self._version = version
+
+    def get(self, version, key):
+        """
+        Look up a cached result.
+        Args:
+            version: Version of the model that is currently served.
+            key (tuple): Encoded feature values.
+        Returns:
+            dict: The cached result, or None on a miss.
+        """
+        if self.max_size <= 0:
+            return None
+        with self._lock:
+            self._check_version(version)
+            result = self._entries.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return result
+
+    def put(self, version, key, result):
+        """
+        Store a result, evicting the least recently used one when the cache is full.
+        Args:
+            version: Version of the model that produced the result.
+            key (tuple): Encoded feature values.
+            result (dict): The prediction result.
+        """
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._check_version(version)
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_stats(self):
+        """
+        Get the cache counters.
+        Returns:
+            dict: 'size', 'max_size', 'hits', 'misses', 'evictions' and 'invalidations'.
+        """
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations
+            }
@@ -1,19 +1,43 @@
+import numpy as np
 import pandas as pd
 from naive_bayes_logic.information_cleaning import InformationCleaning
 
 class ReceivingInformation:
     """
-    Class responsible for loading data from a CSV file, cleaning it,
+    Class responsible for loading data from a CSV, Parquet or Feather/Arrow file, cleaning it,
     and managing train/test split of the dataset.
     """
-    def __init__(self, path):
+    TRAIN_FRACTION = 0.7
+    SPLIT_SEED = 42
+
+    # Leading bytes of the compressed formats accepted besides plain CSV
+    COMPRESSION_MAGIC = {b"\x1f\x8b": "gzip", b"\x28\xb5\x2f\xfd": "zstd"}
+
+    # Leading bytes of the columnar formats; anything else is read as CSV
+    FORMAT_MAGIC = {b"PAR1": "parquet", b"ARROW1": "feather", b"FEA1": "feather", b"\xff\xff\xff\xff": "arrow_stream"}
+
+    def __init__(self, path, on_stage=None, numeric_threshold=0):
         """
-        Initialize ReceivingInformation by reading CSV and cleaning data.
+        Initialize ReceivingInformation by reading the file and cleaning data.
+        Every column is loaded as category dtype; CSV values are read as text, as in read_in_chunks,
+        so a file gives the same values whether it is read whole or in chunks.
         Args:
-        path (str): Path to the CSV file.
+        path (str or file object): Path to the file, or a binary file object to read it from.
+            Gzip and zstd compressed CSV files are decompressed while they are parsed.
+        on_stage (callable, optional): Called with "load" and then "clean" as each step starts.
+        numeric_threshold (int): Feature columns of numbers with more than this many distinct values are
+            converted to floats, to be binned (see InformationCleaning). 0 keeps every column categorical.
         """
-        df = pd.read_csv(path)
-        cleaner = InformationCleaning(df)
+        if on_stage is not None:
+            on_stage("load")
+        file_format = ReceivingInformation.detect_format(path)
+        if file_format == "csv":
+            df = ReceivingInformation._read_csv(path, dtype="category")
+        else:
+            df = ReceivingInformation._to_categorical_frame(ReceivingInformation._read_table(path, file_format))
+        if on_stage is not None:
+            on_stage("clean")
+        cleaner = InformationCleaning(df, numeric_threshold)
         cleaner.clean_all()
         self._df = cleaner.get_dataframe()
         self._train_df = None
@@ -21,10 +45,11 @@ class ReceivingInformation:
 
     def split_train_test(self):
         """
-        Split the cleaned dataframe into training (70%) and testing (30%) datasets.
+        Split the cleaned dataframe into training (TRAIN_FRACTION, 70%) and testing (30%) datasets.
         """
         # Ensure reproducibility with a fixed random_state
-        self._train_df = self._df.sample(frac=0.7, random_state=42)
+        self._train_df = self._df.sample(frac=ReceivingInformation.TRAIN_FRACTION,
+                                         random_state=ReceivingInformation.SPLIT_SEED)
         self._test_df = self._df.drop(self._train_df.index)
 
     def get_dataframe(self):
@@ -54,3 +79,177 @@ class ReceivingInformation:
         if self._test_df is None:
             raise ValueError("Train/Test split has not been performed yet. Please call split_train_test() first.")
         return self._test_df
+
+    @staticmethod
+    def _read_head(source, size=8):
+        """
+        Read the first bytes of a path or of a seekable binary file object, which is rewound to where it was.
+        """
+        if hasattr(source, "read"):
+            position = source.tell()
+            head = source.read(size)
+            source.seek(position)
+            return head
+        with open(source, "rb") as handle:
+            return handle.read(size)
+
+    @staticmethod
+    def detect_compression(source):
+        """
+        Detect gzip or zstd compression from the first bytes of a file, whatever its name.
+        Args:
+            source (str or file object): Path to the file, or a seekable binary file object.
+        Returns:
+            str: 'gzip', 'zstd', or None for an uncompressed file.
+        """
+        head = ReceivingInformation._read_head(source)
+        for magic, compression in ReceivingInformation.COMPRESSION_MAGIC.items():
+            if head.startswith(magic):
+                return compression
+        return None
+
+    @staticmethod
+    def detect_format(source):
+        """
+        Detect the file format from the first bytes of a file, whatever its name.
+        Args:
+            source (str or file object): Path to the file, or a seekable binary file object.
+        Returns:
+            str: 'parquet', 'feather' (Feather or Arrow IPC file), 'arrow_stream' (Arrow IPC stream) or 'csv'.
+        """
+        head = ReceivingInformation._read_head(source)
+        for magic, file_format in ReceivingInformation.FORMAT_MAGIC.items():
+            if head.startswith(magic):
+                return file_format
+        return "csv"
+
+    @staticmethod
+    def _import_pyarrow():
+        """
+        Import pyarrow, which is only needed for Parquet and Feather/Arrow files.
+        Raises:
+            ValueError: If pyarrow is not installed.
+        """
+        try:
+            import pyarrow
+            import pyarrow.compute
+            import pyarrow.ipc
+            import pyarrow.parquet
+        except ImportError as e:
+            raise ValueError(f"Reading Parquet or Arrow files requires the 'pyarrow' package: {e}")
+        return pyarrow
+
+    @staticmethod
+    def _read_table(source, file_format):
+        """
+        Read a whole Parquet or Feather/Arrow file into an Arrow table.
+        """
+        pa = ReceivingInformation._import_pyarrow()
+        if file_format == "parquet":
+            return pa.parquet.read_table(source)
+        if file_format == "feather":
+            import pyarrow.feather
+            return pyarrow.feather.read_table(source)
+        return pa.ipc.open_stream(source).read_all()
+
+    @staticmethod
+    def _iter_batches(source, file_format, chunk_size):
+        """
+        Read a Parquet or Feather/Arrow file as Arrow record batches of at most chunk_size rows.
+        Parquet files and Arrow streams are read incrementally.
+        """
+        pa = ReceivingInformation._import_pyarrow()
+        if file_format == "parquet":
+            batches = pa.parquet.ParquetFile(source).iter_batches(batch_size=chunk_size)
+        elif file_format == "arrow_stream":
+            batches = pa.ipc.open_stream(source)
+        else:
+            batches = ReceivingInformation._read_table(source, file_format).to_batches()
+        for batch in batches:
+            for offset in range(0, batch.num_rows, chunk_size):
+                yield batch.slice(offset, chunk_size)
+
+    @staticmethod
+    def _to_categorical_frame(table):
+        """
+        Convert an Arrow table or record batch to a dataframe of category columns.
+        Columns are dictionary-encoded by Arrow first, so pandas receives integer codes
+        and one small array of categories per column instead of a Python object per value.
+        """
+        pa = ReceivingInformation._import_pyarrow()
+        columns = [column if pa.types.is_dictionary(column.type) else pa.compute.dictionary_encode(column)
+                   for column in table.columns]
+        return pa.table(columns, names=table.column_names).to_pandas()
+
+    @staticmethod
+    def _read_csv(source, **kwargs):
+        """
+        pd.read_csv with the compression detected from the content.
+        Raises:
+            ValueError: If the file is zstd compressed and no zstd codec is installed.
+        """
+        try:
+            return pd.read_csv(source, compression=ReceivingInformation.detect_compression(source), **kwargs)
+        except ImportError as e:
+            raise ValueError(f"Cannot read a zstd compressed file: {e}")
+
+    @staticmethod
+    def read_in_chunks(path, chunk_size=100_000, numeric_threshold=0):
+        """
+        Read and clean the file one chunk at a time, so memory stays bounded by chunk_size.
+        Every column is loaded as category dtype. CSV values are read as text and given one
+        string form by InformationCleaning, so a value is encoded the same way whichever chunk
+        it lands in, and the same way as when the file is read whole.
+        Args:
+            path (str or file object): Path to the CSV, Parquet or Feather/Arrow file, or a binary
+                file object to read it from. Gzip and zstd compressed CSV files are decompressed while they are parsed.
+            chunk_size (int): Number of rows per chunk.
+            numeric_threshold (int): Numeric columns are detected on the first chunk with this threshold
+                (see InformationCleaning) and converted to floats in every chunk. 0 keeps every column
+                categorical, e.g. to append to a model, which bins its numeric columns itself.
+        Yields:
+            tuple: (index of the chunk's first row in the file, cleaned chunk dataframe).
+        """
+        file_format = ReceivingInformation.detect_format(path)
+        if file_format == "csv":
+            with ReceivingInformation._read_csv(path, chunksize=chunk_size, dtype="category") as reader:
+                yield from ReceivingInformation._clean_chunks(reader, numeric_threshold)
+        else:
+            yield from ReceivingInformation._clean_chunks(
+                (ReceivingInformation._to_categorical_frame(batch)
+                 for batch in ReceivingInformation._iter_batches(path, file_format, chunk_size)), numeric_threshold)
+
+    @staticmethod
+    def _clean_chunks(chunks, numeric_threshold=0):
+        """
+        Clean dataframe chunks, pairing each with the index of its first row in the file.
+        The numeric columns detected on the first chunk are the numeric columns of every chunk.
+        """
+        start = 0
+        numeric_columns = None
+        for chunk in chunks:
+            cleaner = InformationCleaning(chunk, numeric_threshold, numeric_columns)
+            cleaner.clean_all()
+            numeric_columns = cleaner.get_numeric_columns()
+            yield start, cleaner.get_dataframe()
+            start += len(chunk)
+
+    @staticmethod
+    def hash_split_mask(start, length, train_fraction=TRAIN_FRACTION, seed=SPLIT_SEED):
+        """
+        Deterministic train/test assignment for a run of rows, computed from each row's position
+        in the file (splitmix64 hash), so the split can be made without seeing the whole dataset.
+        Args:
+            start (int): Index of the first row in the file.
+            length (int): Number of rows.
+            train_fraction (float): Expected share of rows assigned to training.
+            seed (int): Hash seed.
+        Returns:
+            np.ndarray: Boolean mask, True for training rows.
+        """
+        offset = np.uint64((seed * 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF)
+        z = np.arange(start, start + length, dtype=np.uint64) + offset
+        z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        z = z ^ (z >> np.uint64(31))
+        return (z >> np.uint64(11)).astype(np.float64) / float(1 << 53) < train_fraction
@@ -0,0 +1,189 @@
+import numpy as np
+
+
+class SparseTable:
+    """
+    A (n_classes, n_values) count or log-probability table keeping only the cells of the values
+    seen with each class. Cells are stored by value, in compressed sparse column form: the classes
+    seen with value v are indices[indptr[v]:indptr[v + 1]] and their cells data[indptr[v]:indptr[v + 1]].
+    Every other cell holds a default given by the caller: zero for counts, and the smoothing fallback
+    of the class for log probabilities, so the fallback is never stored and is applied on the fly.
+    """
+
+    # Tables with at most this share of non-zero cells are stored sparse. A stored cell costs 12 bytes
+    # (class index and value) against 8 for a dense cell, so a sparse table is at most ~40% of the dense
+    # size, and scoring it touches few enough cells to stay close to a dense gather.
+    MAX_DENSITY = 0.25
+
+    def __init__(self, shape, indptr, indices, data):
+        """
+        Initialize from the compressed sparse column arrays.
+        Args:
+            shape (tuple): (n_classes, n_values).
+            indptr (np.ndarray): int64, shape (n_values + 1,); the cells of value v are indptr[v]:indptr[v + 1].
+            indices (np.ndarray): int32 class index of every stored cell.
+            data (np.ndarray): Value of every stored cell.
+        """
+        self.shape = tuple(int(size) for size in shape)
+        self.indptr = indptr
+        self.indices = indices
+        self.data = data
+
+    @property
+    def nbytes(self):
+        return self.indptr.nbytes + self.indices.nbytes + self.data.nbytes
+
+    @classmethod
+    def is_sparse(cls, table):
+        """
+        Tell whether a table should be stored sparse.
+        Args:
+            table (np.ndarray or SparseTable): The table.
+        Returns:
+            bool: True if at most MAX_DENSITY of its cells are non-zero.
+        """
+        if isinstance(table, SparseTable):
+            return len(table.data) <= cls.MAX_DENSITY * table.shape[0] * table.shape[1]
+        return table.size > 0 and np.count_nonzero(table) <= cls.MAX_DENSITY * table.size
+
+    @staticmethod
+    def as_dense(table):
+        """
+        Get a table as a dense array, whichever form it is stored in.
+        Args:
+            table (np.ndarray or SparseTable): The table.
+        Returns:
+            np.ndarray: The dense table; a dense input is returned as it is.
+        """
+        return table.to_dense() if isinstance(table, SparseTable) else table
+
+    @staticmethod
+    def cells(table):
+        """
+        Get the non-zero cells of a table, whichever form it is stored in, ordered by value, then by class.
+        Args:
+            table (np.ndarray or SparseTable): The table.
+        Returns:
+            tuple: (class index, value code and content of every cell), as three np.ndarrays.
+        """
+        if isinstance(table, SparseTable):
+            return table.indices, table._cell_values(), table.data
+        table = np.asarray(table)
+        values, classes = np.nonzero(table.T)
+        return classes, values, table[classes, values]
+
+    @classmethod
+    def _from_cells(cls, shape, classes, values, data):
+        """
+        Build a table from cells already ordered by value, then by class.
+        """
+        indptr = np.zeros(shape[1] + 1, dtype=np.int64)
+        np.cumsum(np.bincount(values, minlength=shape[1]), out=indptr[1:])
+        return cls(shape, indptr, classes.astype(np.int32, copy=False), data)
+
+    @classmethod
+    def from_dense(cls, table):
+        """
+        Build a sparse table from the non-zero cells of a dense one.
+        Args:
+            table (np.ndarray): Dense table, shape (n_classes, n_values).
+        Returns:
+            SparseTable: The sparse table.
+        """
+        table = np.asarray(table)
+        return cls._from_cells(table.shape, *cls.cells(table))
+
+    def _cell_values(self):
+        """
+        Get the value code of every stored cell.
+        """
+        return np.repeat(np.arange(self.shape[1]), np.diff(self.indptr))
+
+    def added(self, shape, classes, values, data):
+        """
+        Get a table holding the cells of this one plus the given cells, e.g. the counts of new rows.
+        Only the stored cells are touched, never the whole (n_classes, n_values) table. Cells that
+        add up to zero are dropped. This table is left unchanged.
+        Args:
+            shape (tuple): Shape of the new table, at least as large as this one (classes and values may be added).
+            classes (np.ndarray): Class index of every cell to add.
+            values (np.ndarray): Value code of every cell to add; the (class, value) pairs are distinct.
+            data (np.ndarray): Content added to every cell.
+        Returns:
+            SparseTable: The new table.
+        """
+        n_classes = shape[0]
+        # Cells ordered by value, then by class, are ordered by this key, whatever the number of classes
+        keys = self._cell_values().astype(np.int64) * n_classes + self.indices
+        added_keys = np.asarray(values, dtype=np.int64) * n_classes + np.asarray(classes, dtype=np.int64)
+        order = np.argsort(added_keys, kind="stable")
+        added_keys, data = added_keys[order], np.asarray(data)[order]
+        positions = np.searchsorted(keys, added_keys)
+        found = positions < len(keys)
+        found[found] = keys[positions[found]] == added_keys[found]
+        merged = self.data.astype(np.result_type(self.data, data))
+        merged[positions[found]] += data[found]
+        keys = np.insert(keys, positions[~found], added_keys[~found])
+        merged = np.insert(merged, positions[~found], data[~found])
+        kept = merged != 0
+        values, classes = np.divmod(keys[kept], n_classes)
+        return self._from_cells(shape, classes, values, merged[kept])
+
+    def with_data(self, data):
+        """
+        Get a table with the same stored cells holding other values, e.g. the log probabilities of counts.
+        Args:
+            data (np.ndarray): Value of every stored cell.
+        Returns:
+            SparseTable: The new table, sharing indptr and indices with this one.
+        """
+        return SparseTable(self.shape, self.indptr, self.indices, data)
+
+    def to_dense(self, default=0):
+        """
+        Get the table as a dense array.
+        Args:
+            default (scalar or np.ndarray): Value of the cells that are not stored, or one value per class.
+        Returns:
+            np.ndarray: Dense table, shape (n_classes, n_values).
+        """
+        dense = np.empty(self.shape, dtype=np.result_type(self.data, np.asarray(default)))
+        dense[:] = np.asarray(default)[:, None] if np.ndim(default) else default
+        dense[self.indices, self._cell_values()] = self.data
+        return dense
+
+    def add_column(self, out, value, default):
+        """
+        Add the stored cells of one value, minus the default of their class, to a score vector.
+        Args:
+            out (np.ndarray): Scores of every class, shape (n_classes,), updated in place.
+            value (int): Value code; a code past the table adds nothing.
+            default (np.ndarray): Default cell of every class, shape (n_classes,).
+        """
+        value = int(value)
+        if value >= self.shape[1]:
+            return
+        start, end = self.indptr[value], self.indptr[value + 1]
+        classes = self.indices[start:end]
+        out[classes] += self.data[start:end] - default[classes]
+
+    def add_columns(self, out, values, default):
+        """
+        Add the stored cells of every value, minus the default of their class, to a score matrix.
+        Only the distinct values of the batch are expanded to dense columns, which are then gathered
+        per row like a dense table.
+        Args:
+            out (np.ndarray): Scores, shape (n_classes, n_rows), updated in place.
+            values (np.ndarray): Value code of every row; codes past the table add nothing.
+            default (np.ndarray): Default cell of every class, shape (n_classes,).
+        """
+        uniques, inverse = np.unique(values, return_inverse=True)
+        clipped = np.minimum(uniques, self.shape[1])
+        starts, ends = self.indptr[clipped], self.indptr[np.minimum(clipped + 1, self.shape[1])]
+        lengths = ends - starts
+        columns = np.zeros((self.shape[0], len(uniques)), dtype=self.data.dtype)
+        # Position of every expanded cell: the start of its value plus its rank within the value
+        cells = np.arange(int(lengths.sum())) + np.repeat(starts - (np.cumsum(lengths) - lengths), lengths)
+        classes = self.indices[cells]
+        columns[classes, np.repeat(np.arange(len(uniques)), lengths)] = self.data[cells] - default[classes]
+        out += np.take(columns, inverse.reshape(-1), axis=1)
@@ -1,4 +1,10 @@
-import pandas as pd # Added for type hinting
+from typing import TYPE_CHECKING
+import os
+import sys
+import time
+
+if TYPE_CHECKING:  # pandas is only needed for training, so serving processes never import it here
+    import pandas as pd
 
 class Tools:
     """
@@ -27,7 +33,7 @@ class Tools:
         return " ".join(words)
 
     @staticmethod
-    def get_the_target_column(df: pd.DataFrame) -> str:
+    def get_the_target_column(df: "pd.DataFrame") -> str:
         """
         Get the last column name of a dataframe, assumed as the target column.
         Args:
@@ -38,3 +44,51 @@ class Tools:
         if df.empty:
             raise ValueError("DataFrame is empty, cannot determine target column.")
         return df.columns[-1]
+
+    @staticmethod
+    def get_vocabularies_size(vocabularies):
+        """
+        Estimate the memory held by value -> index vocabularies (the dicts and their keys).
+        Args:
+            vocabularies (list): List of dicts keyed by string values.
+        Returns:
+            int: Approximate size in bytes.
+        """
+        return sum(sys.getsizeof(vocabulary) + sum(sys.getsizeof(value) for value in vocabulary)
+                   for vocabulary in vocabularies)
+
+    @staticmethod
+    def get_process_rss():
+        """
+        Get the resident set size of the current process.
+        Returns:
+            int: Resident memory in bytes, or None when it cannot be determined on this platform.
+        """
+        try:
+            with open("/proc/self/statm") as statm:
+                return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except (OSError, ValueError, AttributeError):
+            pass
+        try:
+            import resource
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            # ru_maxrss is in bytes on macOS and in kilobytes elsewhere; it is the peak, the closest available figure
+            return peak if sys.platform == "darwin" else peak * 1024
+        except (ImportError, OSError):
+            return None
+
+    @staticmethod
+    def get_startup_report(started_at):
+        """
+        Describe the cost of starting a server process, for comparing entry points.
+        Args:
+            started_at (float): perf_counter value taken before the entry point imported its dependencies.
+        Returns:
+            dict: 'startup_seconds' (imports and model loading), 'startup_rss_bytes'
+                  and 'pandas_loaded' (whether pandas had to be imported).
+        """
+        return {
+            "startup_seconds": time.perf_counter() - started_at,
+            "startup_rss_bytes": Tools.get_process_rss(),
+            "pandas_loaded": "pandas" in sys.modules
+        }
@@ -0,0 +1,256 @@
+from naive_bayes_logic.management import run_training, TRAINING_STAGES
+from concurrent.futures import ProcessPoolExecutor, CancelledError
+import asyncio
+import cProfile
+import inspect
+import multiprocessing
+import os
+import time
+import uuid
+
+
+class TrainingCancelled(Exception):
+    """
+    Raised inside a training process when its job has been cancelled.
+    """
+
+
+def _run_training_job(job_id, shared_state, dataset_path, options, profile_path=None):
+    """
+    Entry point of a training job inside a worker process. Progress is published to
+    the shared state after every stage (or chunk), which is also where a pending
+    cancellation is noticed.
+    Args:
+        job_id (str): The job identifier.
+        shared_state (DictProxy): Manager dict shared with the API process.
+        dataset_path (str): Path to the dataset.
+        options (dict): Keyword arguments for run_training.
+        profile_path (str, optional): Run under cProfile and write the stats to this file,
+            even if the job fails or is cancelled. Work done in forked counting processes is not included.
+    Returns:
+        dict: The output of run_training.
+    """
+    def progress(stage, rows=None):
+        if shared_state.get(f"{job_id}:cancel"):
+            raise TrainingCancelled(f"Training job {job_id} was cancelled.")
+        shared_state[job_id] = {"stage": stage, "stage_index": TRAINING_STAGES.index(stage), "rows": rows}
+
+    if profile_path is None:
+        return run_training(dataset_path, progress=progress, **options)
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(run_training, dataset_path, progress=progress, **options)
+    finally:
+        profiler.dump_stats(profile_path)
+
+
+class TrainingJobManager:
+    """
+    Runs training in a process pool so the API event loop stays responsive.
+    Every job gets an id whose status and stage-level progress can be polled, and
+    which can be cancelled. The trained model is handed to on_complete on the event
+    loop, so swapping it in never interleaves with a request being served.
+    Only the most recently finished jobs are kept, as their results hold every feature vocabulary.
+    """
+
+    def __init__(self, max_workers=1, profile_dir=None, max_finished_jobs=100):
+        """
+        Initialize the manager. The pool and the shared progress store start lazily with the first job.
+        Args:
+            max_workers (int): Number of training processes that can run at the same time.
+            profile_dir (str, optional): Profile the next training job with cProfile and write its
+                stats to <profile_dir>/train_<job id>.prof. Only that one job is profiled.
+            max_finished_jobs (int): Number of finished (completed, failed or cancelled) jobs kept for
+                polling; older ones are forgotten. At least the last finished job is kept.
+        """
+        self.max_workers = max_workers
+        self.max_finished_jobs = max(1, max_finished_jobs)
+        self.profile_dir = profile_dir
+        self._profile_next = profile_dir is not None
+        self._context = multiprocessing.get_context("spawn")
+        self._executor = None
+        self._manager = None
+        self._shared_state = None
+        self.jobs = {}
+
+    def _ensure_started(self):
+        if self._executor is None:
+            self._manager = self._context.Manager()
+            self._shared_state = self._manager.dict()
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=self._context)
+
+    def submit(self, dataset_path, on_complete, remove_file=True, **options):
+        """
+        Submit a training job. Must be called from the running event loop.
+        Args:
+            dataset_path (str): Path to the dataset.
+            on_complete (callable): Called on the event loop with the output of run_training;
+                its return value, awaited if it is awaitable, becomes the job result.
+            remove_file (bool): Delete dataset_path once the job has finished.
+            **options: Keyword arguments for run_training (streaming, chunk_size, ...).
+        Returns:
+            str: The job id.
+        """
+        self._ensure_started()
+        job_id = uuid.uuid4().hex
+        profile_path = None
+        if self._profile_next:
+            self._profile_next = False
+            os.makedirs(self.profile_dir, exist_ok=True)
+            profile_path = os.path.join(self.profile_dir, f"train_{job_id}.prof")
+        future = self._executor.submit(_run_training_job, job_id, self._shared_state, dataset_path, options,
+                                       profile_path)
+        self.jobs[job_id] = {
+            "status": "queued",
+            "submitted_at": time.time(),
+            "finished_at": None,
+            "last_progress": None,
+            "result": None,
+            "error": None,
+            "profile_path": profile_path,
+            "future": future
+        }
+        self.jobs[job_id]["task"] = asyncio.get_running_loop().create_task(
+            self._finish(job_id, future, dataset_path, on_complete, remove_file))
+        return job_id
+
+    def record_completed(self, result):
+        """
+        Record a job that needs no training, e.g. because its model was found in a cache.
+        Args:
+            result (dict): The job result.
+        Returns:
+            str: The job id.
+        """
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        self.jobs[job_id] = {
+            "status": "completed",
+            "submitted_at": now,
+            "finished_at": now,
+            "last_progress": None,
+            "result": result,
+            "error": None,
+            "profile_path": None,
+            "future": None,
+            "task": None
+        }
+        self._prune()
+        return job_id
+
+    def _prune(self):
+        """
+        Forget the oldest finished jobs beyond max_finished_jobs.
+        """
+        finished = sorted((job["finished_at"], job_id) for job_id, job in self.jobs.items()
+                          if job["finished_at"] is not None)
+        for _, job_id in finished[:max(len(finished) - self.max_finished_jobs, 0)]:
+            del self.jobs[job_id]
+
+    async def _finish(self, job_id, future, dataset_path, on_complete, remove_file):
+        job = self.jobs[job_id]
+        try:
+            trained = await asyncio.wrap_future(future)
+            if self._shared_state.get(f"{job_id}:cancel"):
+                # Cancelled after the last checkpoint: the model is ready but must not be swapped in
+                raise TrainingCancelled(f"Training job {job_id} was cancelled.")
+            result = on_complete(trained)
+            job["result"] = await result if inspect.isawaitable(result) else result
+            job["status"] = "completed"
+        except (asyncio.CancelledError, CancelledError, TrainingCancelled):
+            job["status"] = "cancelled"
+        except Exception as e:
+            job["status"] = "failed"
+            job["error"] = str(e)
+        finally:
+            job["last_progress"] = self._shared_state.pop(job_id, None)
+            job["finished_at"] = time.time()
+            self._shared_state.pop(f"{job_id}:cancel", None)
+            if remove_file and os.path.exists(dataset_path):
+                os.remove(dataset_path)
+            self._prune()
+
+    async def wait(self, job_id):
+        """
+        Wait for a job to finish.
+        Args:
+            job_id (str): The job id.
+        Returns:
+            dict: The job status, as returned by get_status.
+        """
+        task = self._get_job(job_id)["task"]
+        if task is not None:
+            await task
+        return self.get_status(job_id)
+
+    def _get_job(self, job_id):
+        if job_id not in self.jobs:
+            raise KeyError(f"Unknown training job '{job_id}'.")
+        return self.jobs[job_id]
+
+    def get_status(self, job_id):
+        """
+        Get the status and progress of a job.
+        Args:
+            job_id (str): The job id.
+        Raises:
+            KeyError: If the job does not exist.
+        Returns:
+            dict: 'job_id', 'status' (queued, running, cancelling, completed, failed or cancelled),
+                  'stage', 'progress' (completed fraction of TRAINING_STAGES), 'rows', 'result', 'error'
+                  and 'profile_path' (the cProfile stats file of a profiled job, None otherwise).
+        """
+        job = self._get_job(job_id)
+        if job["finished_at"] is None:
+            progress = self._shared_state.get(job_id)
+        else:
+            progress = job["last_progress"]
+        status = job["status"]
+        if status == "queued" and progress is not None:
+            status = "running"
+        if status in ("queued", "running") and self._shared_state.get(f"{job_id}:cancel"):
+            status = "cancelling"
+
+        if job["status"] == "completed":
+            fraction = 1.0
+        elif progress is not None:
+            fraction = progress["stage_index"] / len(TRAINING_STAGES)
+        else:
+            fraction = 0.0
+        return {
+            "job_id": job_id,
+            "status": status,
+            "stage": progress["stage"] if progress else None,
+            "progress": fraction,
+            "rows": progress["rows"] if progress else None,
+            "result": job["result"],
+            "error": job["error"],
+            "profile_path": job["profile_path"]
+        }
+
+    def cancel(self, job_id):
+        """
+        Cancel a job. A queued job is dropped right away; a running one stops at its next stage or chunk,
+        and a job that finishes before noticing is discarded instead of being swapped in.
+        Args:
+            job_id (str): The job id.
+        Raises:
+            KeyError: If the job does not exist.
+        Returns:
+            bool: False if the job had already finished.
+        """
+        job = self._get_job(job_id)
+        if job["finished_at"] is not None:
+            return False
+        if not job["future"].cancel():
+            self._shared_state[f"{job_id}:cancel"] = True
+        return True
+
+    def shutdown(self):
+        """
+        Stop the worker processes and the shared progress store.
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._manager.shutdown()
+            self._executor = None
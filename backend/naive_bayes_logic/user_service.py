@@ -1,63 +1,95 @@
 from naive_bayes_logic.tools import Tools
-import pandas as pd  # Added for type hinting
+import numpy as np
 
 
 class UserService:
     """
     Handles interaction with the user to collect input values for prediction.
+    Input is validated against the vocabularies of the compiled model, which are
+    built once at training time, so checking a value is a single dict lookup
+    (after finding its bin, for a numeric feature).
     """
 
-    def __init__(self, train_df):
+    # Maximum number of allowed values quoted in an invalid-value error message
+    MAX_VALUES_IN_ERROR = 20
+
+    def __init__(self, compiled_model, target_column=None):
         """
-        Initialize with training dataframe to know possible feature values.
+        Initialize with the compiled model to know possible feature values.
         Args:
-            train_df (pd.DataFrame): The training dataframe.
+            compiled_model (CompiledModel): The compiled model, whose vocabularies hold the allowed values.
+            target_column (str, optional): Name of the target column, used in interactive prompts.
         """
-        self.train_df = train_df
+        self.compiled_model = compiled_model
+        self.target_column = target_column
         self.customer_values = {}
+        self.customer_codes = None
 
     def collect_customer_values(self):
         """
         This method is for interactive terminal use and will not be used in the API.
         It's kept for reference to the original logic.
         """
-        target_column = Tools.get_the_target_column(self.train_df)
-        readable_target = Tools.split_camel_case(target_column)
+        readable_target = Tools.split_camel_case(self.target_column or "")
         # print(f'Get a prediction on whether to {readable_target} this time.')
         # print('Please enter values from the options as requested to receive a prediction.')
-        for column in self.train_df.columns[:-1]:
+        for column, vocabulary in zip(self.compiled_model.feature_names, self.compiled_model.vocabularies):
             # print(column)
-            # print(self.train_df[column].unique())
+            # print(list(vocabulary))
             # value = input('>')
-            # while value not in self.train_df[column].astype(str).unique():
+            # while value not in vocabulary:
             #     print("Invalid value. Please choose from the list above.")
             #     value = input("> ").strip()
             # self.customer_values[column] = value
             pass  # No interactive input in API context
 
+    @classmethod
+    def describe_allowed_values(cls, vocabulary):
+        """
+        List the allowed values of a feature for an error message, truncated for high-cardinality columns.
+        Args:
+            vocabulary (dict): Value -> code mapping of the feature.
+        Returns:
+            str: Comma separated values, followed by how many were left out.
+        """
+        shown = []
+        for value in vocabulary:
+            if len(shown) == cls.MAX_VALUES_IN_ERROR:
+                break
+            shown.append(value)
+        description = ', '.join(shown)
+        if len(vocabulary) > len(shown):
+            description += f" ... and {len(vocabulary) - len(shown)} more"
+        return description
+
     def set_customer_values(self, values_dict):
         """
-        Set customer values directly from a dictionary.
+        Set customer values directly from a dictionary, validating and encoding them in one pass.
         Args:
             values_dict (dict): Dictionary of feature values.
         """
         # Basic validation: ensure all expected feature columns are present
-        target_column = Tools.get_the_target_column(self.train_df)
-        expected_features = [col for col in self.train_df.columns if col != target_column]
-
-        if not all(feature in values_dict for feature in expected_features):
-            missing_features = [f for f in expected_features if f not in values_dict]
+        expected_features = self.compiled_model.feature_names
+        missing_features = [f for f in expected_features if f not in values_dict]
+        if missing_features:
             raise ValueError(f"Missing required features: {', '.join(missing_features)}")
 
-        # Validate values against unique values from training data
-        for column, value in values_dict.items():
-            if column in expected_features:  # Only validate feature columns
-                allowed_values = self.train_df[column].astype(str).unique()
-                if str(value) not in allowed_values:
-                    raise ValueError(
-                        f"Invalid value '{value}' for feature '{column}'. Allowed values: {', '.join(allowed_values)}")
+        # Validate values against the values seen in training; the codes are reused for scoring
+        codes = np.empty(len(expected_features), dtype=np.intp)
+        for position, column in enumerate(expected_features):
+            vocabulary = self.compiled_model.vocabularies[position]
+            key = self.compiled_model.get_value_key(column, values_dict[column])
+            if key is None:
+                raise ValueError(f"Invalid value '{values_dict[column]}' for feature '{column}'. Expected a number.")
+            code = vocabulary.get(key)
+            if code is None:
+                raise ValueError(
+                    f"Invalid value '{values_dict[column]}' for feature '{column}'. "
+                    f"Allowed values: {self.describe_allowed_values(vocabulary)}")
+            codes[position] = code
 
         self.customer_values = {k: str(v) for k, v in values_dict.items()}  # Ensure all values are strings
+        self.customer_codes = codes
 
     def get_customer_values(self):
         """
@@ -66,3 +98,11 @@ class UserService:
             dict: Customer feature values.
         """
         return self.customer_values
+
+    def get_customer_codes(self):
+        """
+        Get the encoded customer values, one code per feature of the compiled model.
+        Returns:
+            np.ndarray: Integer codes, or None if no values were set.
+        """
+        return self.customer_codes
@@ -0,0 +1,50 @@
+"""
+The original pandas implementation of training (DataAnalyzer.trainer, one value_counts per class and
+feature) and of per-row scoring (Classifier.predict over iterrows), kept as the reference the
+vectorized code is checked against.
+"""
+import numpy as np
+
+
+def percentage_of_values(train_df):
+    """
+    Returns:
+        dict: {class_label: {feature_column: pd.Series of value percentages}}, every class reindexed
+              on all the values of the feature in the training set.
+    """
+    target_column = train_df.columns[-1]
+    feature_columns = list(train_df.columns[:-1])
+    # The baseline's astype(str) turned missing cells into 'nan'; current pandas keeps them missing,
+    # so every value is converted with str() instead
+    train_df = train_df.assign(**{column: train_df[column].astype(object).map(str) for column in feature_columns})
+    all_unique_values = {column: train_df[column].unique() for column in feature_columns}
+    percentages = {}
+    for class_name, group in train_df.groupby(target_column, observed=True):
+        percentages[class_name] = {}
+        for column in feature_columns:
+            counts = group[column].value_counts()
+            percentages[class_name][column] = counts.reindex(all_unique_values[column], fill_value=0) / group.shape[0]
+    return percentages
+
+
+def predict_rows(train_df, percentages, test_df):
+    """
+    Returns:
+        list: The predicted class of every test row, scored one row at a time.
+    """
+    classification = train_df.iloc[:, -1].value_counts()
+    classification = classification[classification > 0]
+    predictions = []
+    for _, row in test_df.iterrows():
+        results = {}
+        for class_name in classification.index:
+            prior = classification[class_name] / train_df.shape[0]
+            probs = []
+            for column in test_df.columns[:-1]:
+                prob = percentages[class_name][column].get(str(row[column]), 0)
+                if prob == 0:
+                    prob = 1 / (classification[class_name] + 1)
+                probs.append(prob)
+            results[class_name] = prior * np.prod(probs)
+        predictions.append(max(results, key=results.get))
+    return predictions
@@ -0,0 +1,50 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+
+# The backend modules import each other as top-level packages (naive_bayes_logic, benchmarks)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic_data import generate_dataset  # noqa: E402
+from naive_bayes_logic.receiving_information import ReceivingInformation  # noqa: E402
+
+
+@pytest.fixture
+def dataset():
+    """
+    Categorical dataset with dense features (f0..f3, few values seen with every class) and one
+    ID-like feature (h0, most values seen with a single class) whose tables are stored sparse.
+    """
+    df = generate_dataset(rows=4_000, features=4, cardinality=6, classes=5, seed=7,
+                          high_cardinality_features=1, high_cardinality=100_000)
+    return df.astype("category")
+
+
+@pytest.fixture
+def mixed_split(tmp_path):
+    """
+    Train and test sets of a mixed CSV, loaded as the API loads it: text, number and boolean columns,
+    a column with missing cells and an unbalanced target (about 80/15/5). A few test rows hold values
+    never seen in training.
+    """
+    rng = np.random.default_rng(13)
+    rows = 1_500
+    label = rng.choice(["common", "rare", "scarce"], size=rows, p=[0.8, 0.15, 0.05])
+    shift = np.searchsorted(["common", "rare", "scarce"], label)
+    df = pd.DataFrame({
+        "color": np.array(["red", "green", "blue", "black"])[(rng.integers(0, 3, size=rows) + shift) % 4],
+        "size": (rng.integers(1, 5, size=rows) + 2 * shift).astype(float),
+        "flag": (rng.random(size=rows) < 0.3 + 0.3 * shift),
+        "note": np.where(rng.random(size=rows) < 0.15, None, rng.choice(["a", "b", "c"], size=rows)),
+        "label": label,
+    })
+    path = tmp_path / "mixed.csv"
+    df.to_csv(path, index=False)
+    info = ReceivingInformation(str(path))
+    info.split_train_test()
+    test_df = info.get_test_df().copy()
+    test_df["color"] = test_df["color"].cat.add_categories(["purple"])
+    test_df.loc[test_df.index[:10], "color"] = "purple"
+    return info.get_train_df(), test_df
@@ -0,0 +1,78 @@
+from naive_bayes_logic.canonical_values import canonical_value
+from naive_bayes_logic.management import new_model_data, run_training, install_trained_model, predict_workflow, \
+    predict_batch_workflow
+import numpy as np
+import pandas as pd
+import pytest
+
+
+@pytest.fixture
+def float_csv(tmp_path):
+    """
+    CSV whose feature 'a' is parsed as floats (1.0, 2.0, 3.0 and missing), and whose feature 'code'
+    is an ID-like column of float-formatted values, hashed above a threshold of 20.
+    """
+    rng = np.random.default_rng(5)
+    rows = 600
+    label = rng.choice(["no", "yes"], size=rows)
+    df = pd.DataFrame({
+        "a": np.where(label == "yes", rng.choice([1.0, 2.0, np.nan], size=rows), rng.choice([2.0, 3.0], size=rows)),
+        "code": [f"{value}.0" for value in rng.integers(0, 200, size=rows)],
+        "label": label,
+    })
+    path = tmp_path / "floats.csv"
+    df.to_csv(path, index=False)
+    return str(path)
+
+
+def trained(path, hash_threshold=0):
+    model_data = new_model_data()
+    install_trained_model(run_training(path, hash_threshold=hash_threshold, numeric_threshold=0), model_data)
+    return model_data
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("3", "3"), ("3.0", "3"), ("03", "3"), ("+3", "3"), ("2.50", "2.5"), ("1e3", "1000"), ("-0.0", "0"),
+    ("12345678901234567890", "12345678901234567890"), ("1e20", "1e+20"),
+    ("true", "True"), ("FALSE", "False"), ("nan", "nan"), ("red", "red"), ("1.0.0", "1.0.0"),
+])
+def test_canonical_value(text, expected):
+    assert canonical_value(text) == expected
+    assert canonical_value(expected) == expected
+
+
+def test_predicts_with_the_raw_training_values(float_csv):
+    model_data = trained(float_csv)
+    assert list(model_data["compiled_model"].vocabularies[0]) == ["1", "2", "3", "nan"]
+
+    # Codes seen in training, spelled as in the file ('7.0') and canonically ('7')
+    codes = list(model_data["compiled_model"].vocabularies[1])[:4]
+    expected = predict_workflow({"a": "1", "code": codes[0]}, model_data)
+    for value in ("1.0", 1.0, 1, "01"):
+        assert predict_workflow({"a": value, "code": f"{codes[0]}.0"}, model_data) == expected
+    assert predict_workflow({"a": float("nan"), "code": float(codes[0])}, model_data) == \
+        predict_workflow({"a": "nan", "code": codes[0]}, model_data)
+
+    values = [1.0, "2.0", 3, np.nan]
+    batch = predict_batch_workflow(records=[{"a": value, "code": f"{code}.0"} for value, code in zip(values, codes)],
+                                   model_data=model_data)
+    assert not batch["errors"]
+    canonical = predict_batch_workflow(records=[{"a": value, "code": code} for value, code in
+                                                zip(["1", "2", "3", "nan"], codes)], model_data=model_data)
+    assert batch == canonical
+    assert batch["probabilities"][0] == pytest.approx(list(expected["full_results"].values()))
+    columns = predict_batch_workflow(columns={"a": np.array([1.0, 2.0, 3.0, np.nan]),
+                                              "code": [float(code) for code in codes]}, model_data=model_data)
+    assert columns == canonical
+
+
+def test_hashed_values_land_in_their_training_bucket(float_csv):
+    model_data = trained(float_csv, hash_threshold=20)
+    compiled_model = model_data["compiled_model"]
+    assert "code" in compiled_model.feature_hashing
+
+    hashing = compiled_model.feature_hashing
+    assert hashing.get_label("code", 7.0) == hashing.get_label("code", "7.0") == hashing.get_label("code", "7")
+    assert hashing.bucket_indices("code", [7.0, "8.0"]).tolist() == hashing.bucket_indices("code", ["7", "8"]).tolist()
+    assert predict_workflow({"a": 2.0, "code": 7.0}, model_data) == \
+        predict_workflow({"a": "2", "code": "7"}, model_data)
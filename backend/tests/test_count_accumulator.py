@@ -0,0 +1,118 @@
+from naive_bayes_logic.count_accumulator import CountAccumulator
+from naive_bayes_logic.management import new_model_data, count_appended_data, install_appended_data
+from naive_bayes_logic.receiving_information import ReceivingInformation
+from naive_bayes_logic.sparse_table import SparseTable
+import numpy as np
+import pandas as pd
+import pytest
+
+
+def train(df):
+    counts = CountAccumulator()
+    counts.add_frame(df)
+    counts.compact()
+    return counts
+
+
+def cell_counts(counts):
+    """
+    The non-zero counts by (feature, class, value), whatever order the classes and values were added in.
+    """
+    cells = {}
+    for position, feature in enumerate(counts.feature_names):
+        values = list(counts.vocabularies[position])
+        table = SparseTable.as_dense(counts.counts[position])
+        for class_code, value_code in zip(*np.nonzero(table)):
+            cells[feature, counts.class_labels[class_code], values[value_code]] = int(table[class_code, value_code])
+    return cells
+
+
+def class_counts(counts):
+    return {label: int(count) for label, count in zip(counts.class_labels, counts.class_counts) if count}
+
+
+@pytest.fixture
+def halves(dataset):
+    first, second = dataset.iloc[:2_000], dataset.iloc[2_000:].copy()
+    # The appended rows bring a class the first half has never seen
+    second["label"] = second["label"].cat.add_categories(["c_new"])
+    second.loc[second.index[:50], "label"] = "c_new"
+    return first, second
+
+
+def test_append_matches_full_retrain(halves):
+    first, second = halves
+    full = train(pd.concat([first, second]))
+
+    counts = train(first)
+    compiled_model = counts.compile()
+    appended = counts.copy()
+    touched_classes = appended.add_frame(second)
+    refreshed_model = appended.refresh(compiled_model, touched_classes)
+
+    assert class_counts(appended) == class_counts(full)
+    assert cell_counts(appended) == cell_counts(full)
+    assert "c_new" in refreshed_model.class_labels
+
+    columns = {column: second[column].astype(str).tolist() for column in full.feature_names}
+    labels, posteriors = full.compile().predict_batch(columns)
+    refreshed_labels, refreshed_posteriors = refreshed_model.predict_batch(columns)
+    order = [refreshed_model.class_labels.index(label) for label in full.class_labels]
+    assert refreshed_labels == labels
+    assert np.allclose(refreshed_posteriors[:, order], posteriors)
+
+
+def test_append_leaves_the_copied_counts_untouched(halves):
+    first, second = halves
+    counts = train(first)
+    before = cell_counts(counts), class_counts(counts)
+    # The ID-like feature is stored sparse, and appending to it must not change the shared table
+    assert isinstance(counts.counts[-1], SparseTable)
+
+    appended = counts.copy()
+    appended.add_frame(second)
+
+    assert (cell_counts(counts), class_counts(counts)) == before
+    assert cell_counts(appended) != before[0]
+
+
+def test_merge_then_subtract_round_trips(halves):
+    first, second = halves
+    counts, other = train(first), train(second)
+    merged = counts.copy()
+    merged.merge(other)
+
+    assert cell_counts(merged) == cell_counts(train(pd.concat([first, second])))
+    assert cell_counts(merged.subtract(other)) == cell_counts(counts)
+    assert class_counts(merged.subtract(other)) == class_counts(counts)
+
+
+def test_append_rejects_other_columns(halves):
+    first, second = halves
+    counts = train(first)
+    with pytest.raises(ValueError, match="Columns do not match"):
+        counts.add_frame(second.drop(columns=["f0"]))
+
+
+def test_append_workflow_matches_full_retrain(tmp_path, halves):
+    first, second = halves
+    first_path, second_path, full_path = tmp_path / "first.csv", tmp_path / "second.csv", tmp_path / "full.csv"
+    first.to_csv(first_path, index=False)
+    second.to_csv(second_path, index=False)
+    pd.concat([first, second]).to_csv(full_path, index=False)
+
+    def read(path):
+        counts = CountAccumulator()
+        for _, chunk in ReceivingInformation.read_in_chunks(str(path), 1_000):
+            counts.add_frame(chunk)
+        return counts
+
+    model_data = new_model_data()
+    counts = read(first_path)
+    model_data.update({"counts": counts, "compiled_model": counts.compile()})
+    result = install_appended_data(count_appended_data(str(second_path), 700, model_data), model_data)
+
+    assert result["rows_added"] == len(second)
+    full = read(full_path)
+    assert class_counts(model_data["counts"]) == class_counts(full)
+    assert cell_counts(model_data["counts"]) == cell_counts(full)
@@ -0,0 +1,84 @@
+from naive_bayes_logic.count_accumulator import CountAccumulator
+from naive_bayes_logic.cross_validation import CrossValidation
+from naive_bayes_logic.model_testing import ModelTesting
+from naive_bayes_logic.numeric_bins import NumericBins
+from naive_bayes_logic.receiving_information import ReceivingInformation
+import warnings
+import numpy as np
+import pandas as pd
+import pytest
+
+
+@pytest.fixture
+def numeric_df(tmp_path):
+    """
+    Dataset with a numeric column (age), loaded with numeric detection on, and categorical columns.
+    """
+    rng = np.random.default_rng(17)
+    rows = 2_000
+    label = rng.choice(["no", "yes"], size=rows, p=[0.7, 0.3])
+    df = pd.DataFrame({
+        "age": np.where(label == "yes", rng.normal(55, 10, size=rows), rng.normal(40, 12, size=rows)).round(1),
+        "color": rng.choice(["red", "green", "blue"], size=rows),
+        "rating": rng.integers(1, 6, size=rows),
+        "label": label,
+    })
+    path = tmp_path / "numeric.csv"
+    df.to_csv(path, index=False)
+    return ReceivingInformation(str(path), numeric_threshold=NumericBins.MIN_DISTINCT_VALUES).get_dataframe()
+
+
+def retrained_accuracies(df, fold_ids, folds):
+    accuracies = []
+    for fold in range(folds):
+        # A fresh model fits its bins on its own training rows, as a model trained on them would
+        counts = CountAccumulator()
+        counts.add_frame(df[fold_ids != fold])
+        examination = ModelTesting(df[fold_ids == fold], counts.compile())
+        examination.evaluate_model_accuracy()
+        accuracies.append(examination.get_model_accuracy())
+    return accuracies
+
+
+@pytest.mark.parametrize("stratified", [False, True])
+def test_folds_match_models_retrained_without_them(numeric_df, stratified):
+    assert numeric_df["age"].dtype == np.float64
+    cross_validation = CrossValidation(numeric_df, 5, stratified)
+    cross_validation.run()
+
+    expected = retrained_accuracies(numeric_df, cross_validation.assign_folds(), 5)
+    assert np.allclose(cross_validation.get_fold_accuracies(), expected)
+
+
+def test_numeric_bins_are_fitted_without_the_held_out_fold(numeric_df, monkeypatch):
+    fitted_rows = []
+    fit = NumericBins.fit.__func__
+
+    def recording_fit(cls, df, columns, n_bins=NumericBins.DEFAULT_BINS):
+        fitted_rows.append(set(df.index))
+        return fit(cls, df, columns, n_bins)
+
+    monkeypatch.setattr(NumericBins, "fit", classmethod(recording_fit))
+    cross_validation = CrossValidation(numeric_df, 4)
+    cross_validation.run()
+
+    fold_ids = cross_validation.assign_folds()
+    assert len(fitted_rows) == 4
+    for fold, rows in enumerate(fitted_rows):
+        assert rows == set(numeric_df.index[fold_ids != fold])
+
+
+def test_refresh_with_an_emptied_class_does_not_warn(numeric_df):
+    counts = CountAccumulator()
+    counts.add_frame(numeric_df)
+    compiled_model = counts.compile()
+    yes_rows = CountAccumulator(numeric_bins=counts.numeric_bins)
+    yes_rows.add_frame(numeric_df[numeric_df["label"] == "yes"])
+    remaining = counts.subtract(yes_rows)
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        refreshed = remaining.refresh(compiled_model, {remaining.class_index["yes"]})
+    assert refreshed.log_priors[remaining.class_index["yes"]] == -np.inf
+    labels, _ = refreshed.predict_batch({column: numeric_df[column] for column in refreshed.feature_names})
+    assert set(labels) == {"no"}
@@ -0,0 +1,30 @@
+from baseline_model import percentage_of_values
+from naive_bayes_logic.data_analyzer import DataAnalyzer
+import pandas as pd
+import pytest
+
+
+@pytest.mark.parametrize("dtype", ["category", object])
+@pytest.mark.parametrize("workers", [1, 2])
+def test_percentages_match_value_counts(mixed_split, dtype, workers):
+    train_df, test_df = mixed_split
+    train_df = train_df.astype(dtype)
+    full_df = pd.concat([train_df, test_df])
+    analyzer = DataAnalyzer(train_df, full_df, workers)
+    analyzer.trainer()
+
+    percentages = analyzer.get_percentage_of_values()
+    expected = percentage_of_values(train_df)
+    # The scarce class is ~5% of the rows, and every class is present
+    assert sorted(percentages) == sorted(expected) == ["common", "rare", "scarce"]
+    for class_name, columns in expected.items():
+        assert list(percentages[class_name]) == list(columns)
+        for column, series in columns.items():
+            actual = percentages[class_name][column]
+            # Same values, every class on all the values of the feature, 'nan' for missing cells
+            assert sorted(actual.index) == sorted(series.index)
+            pd.testing.assert_series_equal(actual.reindex(series.index), series, check_names=False,
+                                           check_index_type=False)
+    assert "nan" in expected["common"]["note"].index
+    # Values only seen in the test set are in neither
+    assert "purple" not in percentages["common"]["color"].index
@@ -0,0 +1,68 @@
+from naive_bayes_logic.count_accumulator import CountAccumulator
+from naive_bayes_logic.feature_hashing import FeatureHashing
+from naive_bayes_logic.model_storage import save_model, load_model
+from naive_bayes_logic.sparse_table import SparseTable
+import zlib
+import numpy as np
+import pandas as pd
+
+
+def test_fit_hashes_columns_above_the_threshold(dataset):
+    columns = [column for column in dataset.columns if column != "label"]
+
+    assert FeatureHashing.fit(dataset, columns, 100).buckets == {"h0": FeatureHashing.DEFAULT_BUCKETS}
+    assert FeatureHashing.fit(dataset, columns, 100, n_buckets=64).buckets == {"h0": 64}
+    assert FeatureHashing.fit(dataset, columns, dataset["h0"].nunique()).buckets == {}
+    assert FeatureHashing.fit(dataset, columns, 0).buckets == {}
+
+
+def test_buckets_are_stable_and_agree_across_inputs():
+    hashing = FeatureHashing({"h0": 64})
+    values = ["id1", "id2", "id3", "id1", "id42"]
+    expected = [zlib.crc32(value.encode("utf-8")) % 64 for value in values]
+
+    assert hashing.bucket_indices("h0", values).tolist() == expected
+    assert hashing.bucket_indices("h0", pd.Series(values, dtype="category")).tolist() == expected
+    assert [hashing.get_label("h0", value) for value in values] == [f"#{bucket}" for bucket in expected]
+    assert hashing.to_categorical("h0", pd.Series(values)).tolist() == [f"#{bucket}" for bucket in expected]
+
+
+def test_hashed_counts_sum_the_counts_of_their_values(dataset):
+    exact = CountAccumulator()
+    exact.add_frame(dataset)
+    hashing = FeatureHashing({"h0": 64})
+    hashed = CountAccumulator(feature_hashing=hashing)
+    hashed.add_frame(dataset)
+
+    assert list(hashed.vocabularies[-1]) == hashing.get_labels("h0")
+    assert [list(vocabulary) for vocabulary in hashed.vocabularies[:-1]] == \
+        [list(vocabulary) for vocabulary in exact.vocabularies[:-1]]
+    exact_table = SparseTable.as_dense(exact.counts[-1])
+    buckets = hashing.bucket_indices("h0", list(exact.vocabularies[-1]))
+    expected = np.zeros((len(exact.class_labels), 64), dtype=np.int64)
+    np.add.at(expected.T, buckets, exact_table.T)
+    assert np.array_equal(SparseTable.as_dense(hashed.counts[-1]), expected)
+
+
+def test_unseen_values_score_as_their_bucket(tmp_path, dataset):
+    counts = CountAccumulator(hash_threshold=100)
+    counts.add_frame(dataset)
+    compiled_model = counts.compile()
+    assert "h0" in compiled_model.feature_hashing
+    assert len(compiled_model.vocabularies[-1]) == FeatureHashing.DEFAULT_BUCKETS
+
+    seen = dataset["h0"].astype(str).iloc[0]
+    # An unseen ID sharing the bucket of a seen one gets its counts
+    bucket = compiled_model.feature_hashing.get_label("h0", seen)
+    unseen = next(f"new{index}" for index in range(1_000_000)
+                  if compiled_model.feature_hashing.get_label("h0", f"new{index}") == bucket)
+    record = {column: dataset[column].astype(str).iloc[0] for column in compiled_model.feature_names}
+    assert compiled_model.predict({**record, "h0": unseen}) == compiled_model.predict(record)
+
+    # The hashed columns are saved with the model
+    path = tmp_path / "model.nbm"
+    save_model(str(path), compiled_model, counts)
+    loaded_model, loaded_counts, _ = load_model(str(path))
+    assert loaded_model.feature_hashing == compiled_model.feature_hashing
+    assert loaded_counts.feature_hashing == counts.feature_hashing
+    assert loaded_model.predict({**record, "h0": unseen}) == compiled_model.predict(record)
@@ -0,0 +1,86 @@
+from naive_bayes_logic.count_accumulator import CountAccumulator
+from naive_bayes_logic.model_storage import save_model, load_model, MAGIC
+from naive_bayes_logic.sparse_table import SparseTable
+import numpy as np
+import pytest
+
+
+def train(df):
+    counts = CountAccumulator()
+    counts.add_frame(df)
+    counts.compact()
+    return counts, counts.compile()
+
+
+def prediction_columns(df, feature_names):
+    # Training rows plus a few values the model has never seen
+    columns = {column: df[column].astype(str).tolist() for column in feature_names}
+    for column in feature_names:
+        columns[column][:3] = ["never seen"] * 3
+    return columns
+
+
+@pytest.mark.parametrize("with_counts", [True, False])
+def test_round_trip_predicts_identically(tmp_path, dataset, with_counts):
+    counts, compiled_model = train(dataset)
+    # The dataset has both kinds of tables, so both are written and read back
+    assert any(isinstance(table, SparseTable) for table in compiled_model.log_tables)
+    assert any(isinstance(table, np.ndarray) for table in compiled_model.log_tables)
+
+    path = tmp_path / "model.nbm"
+    save_model(str(path), compiled_model, counts, {"accuracy": 91.5})
+    loaded_model, loaded_counts, metadata = load_model(str(path), with_counts=with_counts)
+
+    assert metadata == {"accuracy": 91.5, "target_column": "label"}
+    assert loaded_model.class_labels == compiled_model.class_labels
+    assert loaded_model.feature_names == compiled_model.feature_names
+    assert [type(table) for table in loaded_model.log_tables] == [type(table) for table in compiled_model.log_tables]
+
+    columns = prediction_columns(dataset, compiled_model.feature_names)
+    labels, posteriors = compiled_model.predict_batch(columns)
+    loaded_labels, loaded_posteriors = loaded_model.predict_batch(columns)
+    assert loaded_labels == labels
+    assert np.array_equal(loaded_posteriors, posteriors)
+
+    if with_counts:
+        assert np.array_equal(loaded_counts.class_counts, counts.class_counts)
+        for table, loaded_table in zip(counts.counts, loaded_counts.counts):
+            assert np.array_equal(SparseTable.as_dense(loaded_table), SparseTable.as_dense(table))
+    else:
+        assert loaded_counts is None
+
+
+def test_loaded_counts_compile_to_the_same_model(tmp_path, dataset):
+    counts, compiled_model = train(dataset)
+    path = tmp_path / "model.nbm"
+    save_model(str(path), compiled_model, counts)
+    _, loaded_counts, _ = load_model(str(path))
+
+    columns = prediction_columns(dataset, compiled_model.feature_names)
+    labels, posteriors = compiled_model.predict_batch(columns)
+    recompiled_labels, recompiled_posteriors = loaded_counts.compile().predict_batch(columns)
+    assert recompiled_labels == labels
+    assert np.array_equal(recompiled_posteriors, posteriors)
+
+
+def test_arrays_are_memory_mapped(tmp_path, dataset):
+    counts, compiled_model = train(dataset)
+    path = tmp_path / "model.nbm"
+    save_model(str(path), compiled_model, counts)
+    loaded_model, _, _ = load_model(str(path), with_counts=False)
+
+    # Views of the read-only mapping of the file, not copies of it
+    for array in (loaded_model.log_priors, *loaded_model.log_tables[:-1]):
+        assert not array.flags.owndata
+        assert not array.flags.writeable
+
+
+def test_load_rejects_other_files(tmp_path):
+    path = tmp_path / "model.nbm"
+    path.write_bytes(b"not a model file at all")
+    with pytest.raises(ValueError, match="not a Naive Bayes model file"):
+        load_model(str(path))
+
+    path.write_bytes(MAGIC + (99).to_bytes(4, "little") + (0).to_bytes(4, "little"))
+    with pytest.raises(ValueError, match="Unsupported model format version 99"):
+        load_model(str(path))
@@ -0,0 +1,45 @@
+from baseline_model import percentage_of_values, predict_rows
+from naive_bayes_logic.count_accumulator import CountAccumulator
+from naive_bayes_logic.model_testing import ModelTesting
+import numpy as np
+
+
+def test_vectorized_evaluation_matches_per_row_scoring(mixed_split):
+    train_df, test_df = mixed_split
+    counts = CountAccumulator()
+    counts.add_frame(train_df)
+    compiled_model = counts.compile()
+
+    examination = ModelTesting(test_df, compiled_model)
+    examination.evaluate_model_accuracy()
+
+    expected = predict_rows(train_df, percentage_of_values(train_df), test_df)
+    predicted = [compiled_model.class_labels[index]
+                 for index in np.argmax(compiled_model.log_scores(compiled_model.encode_columns(test_df)), axis=1)]
+    assert predicted == expected
+
+    actual = test_df["label"].astype(str).tolist()
+    expected_accuracy = sum(p == a for p, a in zip(expected, actual)) / len(actual) * 100
+    assert examination.get_model_accuracy() == expected_accuracy
+    confusion = examination.get_confusion_matrix()
+    for label in compiled_model.class_labels:
+        assert sum(confusion[label].values()) == actual.count(label)
+        for predicted_label in compiled_model.class_labels:
+            assert confusion[label][predicted_label] == \
+                sum(a == label and p == predicted_label for p, a in zip(expected, actual))
+
+
+def test_chunked_evaluation_matches_whole_evaluation(mixed_split):
+    train_df, test_df = mixed_split
+    counts = CountAccumulator()
+    counts.add_frame(train_df)
+    compiled_model = counts.compile()
+
+    whole = ModelTesting(test_df, compiled_model)
+    whole.evaluate_model_accuracy()
+    chunked = ModelTesting(None, compiled_model)
+    for start in range(0, len(test_df), 100):
+        chunked.evaluate_chunk(test_df.iloc[start:start + 100])
+
+    assert chunked.get_model_accuracy() == whole.get_model_accuracy()
+    assert chunked.get_confusion_matrix() == whole.get_confusion_matrix()
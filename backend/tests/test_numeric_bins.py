@@ -0,0 +1,107 @@
+from naive_bayes_logic.count_accumulator import CountAccumulator
+from naive_bayes_logic.information_cleaning import InformationCleaning
+from naive_bayes_logic.model_storage import save_model, load_model
+from naive_bayes_logic.numeric_bins import NumericBins, MISSING_BIN, INVALID_BIN
+from naive_bayes_logic.receiving_information import ReceivingInformation
+import numpy as np
+import pandas as pd
+import pytest
+
+
+@pytest.fixture
+def numeric_csv(tmp_path):
+    """
+    CSV with a numeric column (age), a column of few numbers (rating) and a categorical one (color).
+    """
+    rng = np.random.default_rng(3)
+    rows = 3_000
+    label = rng.choice(["no", "yes"], size=rows)
+    df = pd.DataFrame({
+        "age": np.where(label == "yes", rng.integers(40, 80, size=rows), rng.integers(18, 60, size=rows)),
+        "rating": rng.integers(1, 6, size=rows),
+        "color": rng.choice(["red", "green", "blue"], size=rows),
+        "label": label,
+    })
+    path = tmp_path / "numeric.csv"
+    df.to_csv(path, index=False)
+    return str(path)
+
+
+def cleaned(df, numeric_threshold):
+    cleaner = InformationCleaning(df, numeric_threshold)
+    cleaner.clean_all()
+    return cleaner
+
+
+def test_ingest_detects_numeric_columns(numeric_csv):
+    df = ReceivingInformation(numeric_csv, numeric_threshold=NumericBins.MIN_DISTINCT_VALUES).get_dataframe()
+
+    assert df["age"].dtype == np.float64
+    assert df["rating"].dtype == "category"
+    assert df["color"].dtype == "category"
+    assert df["label"].dtype == "category"
+
+
+def test_detection_threshold_is_configurable(numeric_csv):
+    raw = pd.read_csv(numeric_csv, dtype="category")
+
+    assert cleaned(raw, NumericBins.MIN_DISTINCT_VALUES).get_numeric_columns() == ["age"]
+    assert cleaned(raw, 4).get_numeric_columns() == ["age", "rating"]
+    assert cleaned(raw, 1_000).get_numeric_columns() == []
+    # 0 turns detection off
+    assert cleaned(raw, 0).get_numeric_columns() == []
+    assert (ReceivingInformation(numeric_csv).get_dataframe().dtypes == "category").all()
+
+
+def test_chunks_share_the_numeric_columns_of_the_first_chunk(tmp_path):
+    # Only the first chunk has enough distinct ages to be numeric
+    df = pd.DataFrame({"age": list(range(50)) + [30] * 50, "label": ["a", "b"] * 50})
+    path = tmp_path / "chunks.csv"
+    df.to_csv(path, index=False)
+
+    chunks = [chunk for _, chunk in ReceivingInformation.read_in_chunks(str(path), 50, numeric_threshold=20)]
+    assert [chunk["age"].dtype for chunk in chunks] == [np.float64, np.float64]
+    chunks = [chunk for _, chunk in ReceivingInformation.read_in_chunks(str(path), 50)]
+    assert [chunk["age"].dtype for chunk in chunks] == ["category", "category"]
+
+
+def test_bins_place_values_and_flag_invalid_ones():
+    bins = NumericBins({"age": [30.0, 50.0]})
+
+    assert bins.get_labels("age") == ["(-inf, 30]", "(30, 50]", "(50, inf)"]
+    assert bins.bin_indices("age", ["10", "30", "30.5", "50", "99", None, "abc"]).tolist() == \
+        [0, 0, 1, 1, 2, MISSING_BIN, INVALID_BIN]
+    assert bins.get_label("age", 42) == "(30, 50]"
+    assert bins.get_label("age", None) == "nan"
+    assert bins.get_label("age", "abc") is None
+
+
+def test_fit_bins_the_float_columns_only(numeric_csv):
+    df = ReceivingInformation(numeric_csv, numeric_threshold=NumericBins.MIN_DISTINCT_VALUES).get_dataframe()
+    bins = NumericBins.fit(df, ["age", "rating", "color"], n_bins=4)
+
+    assert "age" in bins and "rating" not in bins and "color" not in bins
+    assert np.allclose(bins.edges["age"], np.quantile(df["age"], [0.25, 0.5, 0.75]))
+
+
+def test_numeric_model_predicts_any_number_and_round_trips(tmp_path, numeric_csv):
+    df = ReceivingInformation(numeric_csv, numeric_threshold=NumericBins.MIN_DISTINCT_VALUES).get_dataframe()
+    counts = CountAccumulator()
+    counts.add_frame(df)
+    compiled_model = counts.compile()
+    assert "age" in compiled_model.numeric_bins
+    assert set(compiled_model.vocabularies[0]) <= set(compiled_model.numeric_bins.get_labels("age")) | {"nan"}
+
+    # Ages never seen in training fall into the first and last bins
+    columns = {"age": [5, 20, 45, 70, 120], "rating": ["3"] * 5, "color": ["red"] * 5}
+    labels, posteriors = compiled_model.predict_batch(columns)
+    assert labels[0] == labels[1] == "no" and labels[-1] == labels[-2] == "yes"
+
+    path = tmp_path / "model.nbm"
+    save_model(str(path), compiled_model, counts)
+    loaded_model, loaded_counts, _ = load_model(str(path))
+    assert loaded_model.numeric_bins == compiled_model.numeric_bins
+    assert loaded_counts.numeric_bins == counts.numeric_bins
+    loaded_labels, loaded_posteriors = loaded_model.predict_batch(columns)
+    assert loaded_labels == labels
+    assert np.array_equal(loaded_posteriors, posteriors)
@@ -0,0 +1,46 @@
+from naive_bayes_logic.management import new_model_data, run_training, install_trained_model, predict_file_workflow
+import io
+import numpy as np
+import pandas as pd
+import pytest
+
+
+@pytest.fixture
+def model_data(tmp_path):
+    """
+    Model trained on a CSV where feature 'a' has missing cells (so its vocabulary holds 'nan') and 'b' has none.
+    """
+    rng = np.random.default_rng(11)
+    rows = 500
+    label = rng.choice(["no", "yes"], size=rows)
+    df = pd.DataFrame({
+        "a": np.where(label == "yes", rng.choice(["x", "y", None], size=rows), rng.choice(["y", "z"], size=rows)),
+        "b": rng.choice(["p", "q"], size=rows),
+        "label": label,
+    })
+    path = tmp_path / "train.csv"
+    df.to_csv(path, index=False)
+    model_data = new_model_data()
+    install_trained_model(run_training(str(path)), model_data)
+    return model_data
+
+
+def score(csv_text, model_data):
+    output = "".join(predict_file_workflow(io.BytesIO(csv_text.encode("utf-8")), model_data=model_data))
+    return pd.read_csv(io.StringIO(output), keep_default_na=False)
+
+
+def test_missing_cells_score_as_nan_when_the_model_has_it(model_data):
+    compiled_model = model_data["compiled_model"]
+    assert "nan" in compiled_model.vocabularies[0] and "nan" not in compiled_model.vocabularies[1]
+
+    scored = score("a,b\n,p\nnan,q\nx,p\ny,\n", model_data)
+
+    labels, posteriors = compiled_model.predict_batch({"a": ["nan", "nan", "x"], "b": ["p", "q", "p"]})
+    assert scored["prediction"].tolist()[:3] == labels
+    probability_columns = [f"probability_{label}" for label in compiled_model.class_labels]
+    assert np.allclose(scored[probability_columns].to_numpy()[:3].astype(float), posteriors)
+    assert scored["error"].tolist()[:3] == ["", "", ""]
+    # 'b' was never missing in training, so a row missing it is still rejected
+    assert scored["prediction"].iloc[3] == ""
+    assert scored["error"].iloc[3] == "Missing required features: b"
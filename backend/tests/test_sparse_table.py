@@ -0,0 +1,84 @@
+from naive_bayes_logic.count_accumulator import CountAccumulator
+from naive_bayes_logic.sparse_table import SparseTable
+import numpy as np
+import pytest
+
+
+def random_table(rng, shape, density):
+    return np.where(rng.random(shape) < density, rng.integers(1, 9, size=shape), 0)
+
+
+def train(df):
+    counts = CountAccumulator()
+    counts.add_frame(df)
+    counts.compact()
+    return counts
+
+
+def test_dense_round_trip():
+    table = random_table(np.random.default_rng(0), (4, 30), 0.2)
+    sparse = SparseTable.from_dense(table)
+
+    assert sparse.shape == (4, 30)
+    assert len(sparse.data) == np.count_nonzero(table)
+    assert np.array_equal(sparse.to_dense(), table)
+    defaults = np.array([-1.0, -2.0, -3.0, -4.0])
+    assert np.array_equal(sparse.to_dense(defaults), np.where(table != 0, table, defaults[:, None]))
+
+
+def test_added_matches_dense_addition():
+    rng = np.random.default_rng(1)
+    table = random_table(rng, (3, 20), 0.2)
+    # New rows grow the table by a class and by values, and cancel some stored cells out
+    grown = np.zeros((4, 25), dtype=np.int64)
+    grown[:3, :20] = table
+    addition = random_table(rng, (4, 25), 0.1)
+    addition[np.nonzero(table)[0][:3], np.nonzero(table)[1][:3]] = -table[np.nonzero(table)][:3]
+
+    classes, values, data = SparseTable.cells(addition)
+    result = SparseTable.from_dense(table).added((4, 25), classes, values, data)
+
+    assert result.shape == (4, 25)
+    assert np.array_equal(result.to_dense(), grown + addition)
+    assert np.all(result.data != 0)
+
+
+def test_scoring_columns_matches_dense_gather():
+    rng = np.random.default_rng(2)
+    table = random_table(rng, (3, 15), 0.2).astype(np.float64)
+    defaults = np.array([0.5, 1.5, 2.5])
+    sparse = SparseTable.from_dense(table)
+    dense = np.where(table != 0, table, defaults[:, None]) - defaults[:, None]
+    # Codes past the table are unseen values and add nothing
+    values = np.array([0, 3, 3, 14, 15, 7])
+
+    out = np.zeros((3, len(values)))
+    sparse.add_columns(out, values, defaults)
+    assert np.allclose(out, np.column_stack([dense[:, value] if value < 15 else np.zeros(3) for value in values]))
+
+    for value in values:
+        column = np.zeros(3)
+        sparse.add_column(column, value, defaults)
+        assert np.allclose(column, dense[:, value] if value < 15 else 0)
+
+
+def test_sparse_model_predicts_as_dense_model(monkeypatch, dataset):
+    sparse_model = train(dataset).compile()
+    assert any(isinstance(table, SparseTable) for table in sparse_model.log_tables)
+    # No table is sparse enough below a negative density
+    monkeypatch.setattr(SparseTable, "MAX_DENSITY", -1)
+    dense_counts = train(dataset)
+    dense_model = dense_counts.compile()
+    assert not any(isinstance(table, SparseTable) for table in dense_counts.counts + dense_model.log_tables)
+
+    columns = {column: dataset[column].astype(str).tolist() for column in dense_model.feature_names}
+    columns["h0"][:5] = ["never seen"] * 5
+    labels, posteriors = sparse_model.predict_batch(columns)
+    dense_labels, dense_posteriors = dense_model.predict_batch(columns)
+    assert labels == dense_labels
+    assert np.allclose(posteriors, dense_posteriors)
+
+    record = {column: values[0] for column, values in columns.items()}
+    prediction, dense_prediction = sparse_model.predict(record), dense_model.predict(record)
+    assert prediction["prediction"] == dense_prediction["prediction"]
+    assert prediction["full_results"] == pytest.approx(dense_prediction["full_results"])